@@ -2,15 +2,20 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import pathlib
 import re
+import time
 import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 
 
 SCRIPT_PATH = pathlib.Path(__file__).resolve()
 STACK_ROOT = SCRIPT_PATH.parent.parent
 TEMPLATES_DIR = STACK_ROOT / "templates" / "agents"
+# Every repo that was initialized or rendered, one path per line; `render --all` walks it.
+REPO_REGISTRY = STACK_ROOT / ".agents-repos"
 
 
 def slugify(value: str) -> str:
@@ -19,6 +24,7 @@ def slugify(value: str) -> str:
     return slug or "project"
 
 
+@functools.lru_cache(maxsize=None)
 def read_template(name: str) -> str:
     path = TEMPLATES_DIR / name
     if not path.exists():
@@ -42,6 +48,16 @@ def write_if_missing(path: pathlib.Path, content: str, force: bool = False) -> b
 
 
 def render_guideline(path: pathlib.Path) -> str:
+    if path.is_relative_to(STACK_ROOT):
+        return render_shared_guideline(path)
+    if not path.exists():
+        return f"_Missing file: `{path}`_"
+    return path.read_text(encoding="utf-8").rstrip()
+
+
+@functools.lru_cache(maxsize=None)
+def render_shared_guideline(path: pathlib.Path) -> str:
+    # Stack-level guidelines are the same file for every repo; read them once per process.
     if not path.exists():
         return f"_Missing file: `{path}`_"
     return path.read_text(encoding="utf-8").rstrip()
@@ -318,6 +334,7 @@ def init_repo(args: argparse.Namespace) -> int:
     agents_path = repo_root / "AGENTS.md"
     agents_path.write_text(agents_md, encoding="utf-8")
     created.append(agents_path)
+    register_repos([repo_root])
 
     print(f"Initialized AI scaffolding for: {repo_root}")
     print("Updated files:")
@@ -326,19 +343,110 @@ def init_repo(args: argparse.Namespace) -> int:
     return 0
 
 
+def read_registry() -> list[pathlib.Path]:
+    if not REPO_REGISTRY.exists():
+        return []
+    return read_repo_list(REPO_REGISTRY)
+
+
+def register_repos(repo_roots: list[pathlib.Path]) -> None:
+    known = read_registry()
+    added = [root for root in repo_roots if root not in known]
+    if not added:
+        return
+    tmp = REPO_REGISTRY.with_name(f"{REPO_REGISTRY.name}.tmp")
+    tmp.write_text("".join(f"{root}\n" for root in known + added), encoding="utf-8")
+    tmp.replace(REPO_REGISTRY)
+
+
+def read_repo_list(path: pathlib.Path) -> list[pathlib.Path]:
+    roots: list[pathlib.Path] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        root = pathlib.Path(line).expanduser().resolve()
+        if root not in roots:
+            roots.append(root)
+    return roots
+
+
+def write_agents_md(repo_root: pathlib.Path) -> bool:
+    """Render AGENTS.md for one repo; only write it when the content changed."""
+    config = load_config(repo_root)
+    rendered = build_agents_markdown(repo_root, config).encode("utf-8")
+    out_path = repo_root / "AGENTS.md"
+    try:
+        if out_path.read_bytes() == rendered:
+            return False
+    except FileNotFoundError:
+        pass
+    out_path.write_bytes(rendered)
+    return True
+
+
 def render_repo(args: argparse.Namespace) -> int:
+    if args.all or args.repos_from:
+        if args.stdout:
+            raise SystemExit("render: --stdout only works with a single --repo")
+        return render_many(args)
+    if not args.repo:
+        raise SystemExit("render: one of --repo, --repos-from or --all is required")
     repo_root = pathlib.Path(args.repo).expanduser().resolve()
-    config = load_config(repo_root)
-    rendered = build_agents_markdown(repo_root, config)
     if args.stdout:
-        print(rendered, end="")
+        config = load_config(repo_root)
+        print(build_agents_markdown(repo_root, config), end="")
         return 0
     out_path = repo_root / "AGENTS.md"
-    out_path.write_text(rendered, encoding="utf-8")
-    print(f"Rendered: {out_path}")
+    if write_agents_md(repo_root):
+        print(f"Rendered: {out_path}")
+    else:
+        print(f"Unchanged: {out_path}")
+    register_repos([repo_root])
     return 0
 
 
+def render_many(args: argparse.Namespace) -> int:
+    repo_roots = read_repo_list(pathlib.Path(args.repos_from).expanduser()) if args.repos_from else []
+    if args.all:
+        repo_roots += [root for root in read_registry() if root not in repo_roots]
+    if args.repo:
+        extra = pathlib.Path(args.repo).expanduser().resolve()
+        if extra not in repo_roots:
+            repo_roots.append(extra)
+    if not repo_roots:
+        print(f"No repositories to render (registry: {REPO_REGISTRY})")
+        return 0
+
+    started = time.monotonic()
+    rendered = unchanged = 0
+    failed: list[tuple[pathlib.Path, str]] = []
+    # Rendering is file reads plus string formatting; threads share the cached stack guidelines.
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {root: pool.submit(write_agents_md, root) for root in repo_roots}
+        for root, future in futures.items():
+            try:
+                changed = future.result()
+            except (OSError, tomllib.TOMLDecodeError) as exc:
+                failed.append((root, str(exc)))
+                continue
+            if changed:
+                rendered += 1
+                print(f"Rendered: {root / 'AGENTS.md'}")
+            else:
+                unchanged += 1
+
+    register_repos([root for root in repo_roots if all(root != bad for bad, _ in failed)])
+    for root, error in failed:
+        print(f"Failed: {root}: {error}")
+    elapsed = time.monotonic() - started
+    print(
+        f"Rendered {rendered}, unchanged {unchanged}, failed {len(failed)} "
+        f"of {len(repo_roots)} repositories in {elapsed:.2f}s"
+    )
+    return 1 if failed else 0
+
+
 def print_prompt(args: argparse.Namespace) -> int:
     repo_root = pathlib.Path(args.repo).expanduser().resolve()
     config = load_config(repo_root)
@@ -377,7 +485,14 @@ def build_parser() -> argparse.ArgumentParser:
     init_cmd.set_defaults(func=init_repo)
 
     render_cmd = sub.add_parser("render", help="Render AGENTS.md from .ai/agents.toml")
-    render_cmd.add_argument("--repo", required=True, help="Repository root path")
+    render_cmd.add_argument("--repo", help="Repository root path")
+    render_cmd.add_argument(
+        "--repos-from", help="File with one repository root per line (blank lines and # comments ignored)"
+    )
+    render_cmd.add_argument(
+        "--all", action="store_true", help=f"Render every initialized/rendered repository ({REPO_REGISTRY.name})"
+    )
+    render_cmd.add_argument("--jobs", type=int, default=8, help="Concurrent renders for --all/--repos-from")
     render_cmd.add_argument("--stdout", action="store_true", help="Print instead of writing AGENTS.md")
     render_cmd.set_defaults(func=render_repo)
 
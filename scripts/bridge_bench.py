@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for mcp_stdio_line_bridge.py.
+
+`echo` is a tiny newline-delimited JSON-RPC server used as the bridged child.
+`roundtrip` drives a bridge over framed stdio and reports per-message latency.
+`frames` microbenchmarks the framed->line parse/forward path in-process.
+`sessions` opens concurrent sessions and reports time to the first tools/list
+reply and RSS, per session, shared daemon, or warm pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import pathlib
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import BinaryIO, List
+
+SCRIPT_PATH = pathlib.Path(__file__).resolve()
+BRIDGE_PATH = SCRIPT_PATH.parent / "mcp_stdio_line_bridge.py"
+FRAME_SIZES = {"1KB": 1024, "64KB": 64 * 1024, "8MB": 8 * 1024 * 1024}
+
+
+def percentile(values: List[float], pct: int) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    idx = max(0, (len(ordered) * pct + 99) // 100 - 1)
+    return ordered[idx]
+
+
+def read_frame(stream: BinaryIO) -> bytes:
+    length = -1
+    while True:
+        line = stream.readline()
+        if not line:
+            raise EOFError("bridge closed stdout")
+        if line in (b"\r\n", b"\n"):
+            break
+        key, _, value = line.partition(b":")
+        if key.strip().lower() == b"content-length":
+            length = int(value)
+    return stream.read(length)
+
+
+def write_frame(stream: BinaryIO, payload: bytes) -> None:
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(payload) + payload)
+    stream.flush()
+
+
+def echo_server(args: argparse.Namespace) -> int:
+    # Stand-in for server startup work such as indexing the project root.
+    time.sleep(args.startup_delay)
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    progress = b'{"jsonrpc":"2.0","method":"notifications/progress","params":{"progress":1}}\n'
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        msg = json.loads(line)
+        if "id" not in msg:
+            continue
+        for _ in range(args.burst):
+            stdout.write(progress)
+            stdout.flush()
+        reply = {"jsonrpc": "2.0", "id": msg["id"], "result": msg.get("params", {})}
+        stdout.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+        stdout.flush()
+    return 0
+
+
+def roundtrip(args: argparse.Namespace) -> int:
+    child = [sys.executable, str(SCRIPT_PATH), "echo", "--burst", str(args.burst)]
+    proc = subprocess.Popen(
+        [sys.executable, args.bridge, *args.bridge_arg, "--", *child],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    assert proc.stdin is not None and proc.stdout is not None
+    blob = "x" * args.payload_bytes
+    samples: List[float] = []
+    try:
+        for i in range(args.warmup + args.messages):
+            payload = json.dumps(
+                {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"blob": blob}},
+                separators=(",", ":"),
+            ).encode()
+            start = time.perf_counter()
+            write_frame(proc.stdin, payload)
+            reply = json.loads(read_frame(proc.stdout))
+            while "id" not in reply:
+                reply = json.loads(read_frame(proc.stdout))
+            elapsed = (time.perf_counter() - start) * 1000.0
+            if reply.get("id") != i:
+                raise RuntimeError(f"unexpected reply id {reply.get('id')!r} for request {i}")
+            if i >= args.warmup:
+                samples.append(elapsed)
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=10)
+
+    label = args.label or pathlib.Path(args.bridge).name
+    print("target\ttest\truns\tavg_ms\tp50_ms\tp95_ms\tp99_ms")
+    print(
+        f"{label}\troundtrip_{args.payload_bytes}b_burst{args.burst}\t{len(samples)}\t"
+        f"{statistics.fmean(samples):.3f}\t{percentile(samples, 50):.3f}\t"
+        f"{percentile(samples, 95):.3f}\t{percentile(samples, 99):.3f}"
+    )
+    return 0
+
+
+def _legacy_read_framed(stream: BinaryIO) -> bytes | None:
+    # Pre-FrameParser implementation, kept as the comparison baseline.
+    headers: dict[str, str] = {}
+    while True:
+        line = stream.readline()
+        if line == b"":
+            return None
+        if line in (b"\n", b"\r\n"):
+            break
+        decoded = line.decode("utf-8", errors="replace").strip()
+        if ":" in decoded:
+            key, value = decoded.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    length = int(headers["content-length"])
+    return stream.read(length)
+
+
+def frames(args: argparse.Namespace) -> int:
+    from mcp_stdio_line_bridge import NEWLINE, READ_CHUNK, FrameParser
+
+    sink = os.open(os.devnull, os.O_WRONLY)
+    print("frame\timpl\tframes\tus_per_frame\tMB_per_s")
+    try:
+        for label, size in FRAME_SIZES.items():
+            count = max(4, min(5000, args.total_mb * 1024 * 1024 // size))
+            body = b"x" * size
+            frame = b"Content-Length: %d\r\n\r\n" % size + body
+            stream = frame * count
+            total_mb = len(stream) / (1024 * 1024)
+
+            start = time.perf_counter()
+            src = io.BufferedReader(io.BytesIO(stream), buffer_size=READ_CHUNK)
+            while (payload := _legacy_read_framed(src)) is not None:
+                os.write(sink, payload + b"\n")
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parser = FrameParser()
+            view = memoryview(stream)
+            for offset in range(0, len(stream), READ_CHUNK):
+                for payload in parser.feed(bytes(view[offset: offset + READ_CHUNK])):
+                    os.writev(sink, (payload, NEWLINE))
+            chunked = time.perf_counter() - start
+            view.release()
+
+            for impl, elapsed in (("legacy", legacy), ("frame_parser", chunked)):
+                print(f"{label}\t{impl}\t{count}\t{elapsed / count * 1e6:.2f}\t{total_mb / elapsed:.1f}")
+    finally:
+        os.close(sink)
+    return 0
+
+
+def _tagged_rss_kb(tag: str) -> tuple[int, list[int]]:
+    """Sum VmRSS over every process whose command line carries `tag` (Linux /proc only)."""
+    total = 0
+    pids: list[int] = []
+    for entry in pathlib.Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            if tag.encode() not in (entry / "cmdline").read_bytes():
+                continue
+            for line in (entry / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+            pids.append(int(entry.name))
+        except OSError:
+            continue
+    return total, pids
+
+
+def sessions(args: argparse.Namespace) -> int:
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    child = [sys.executable, str(SCRIPT_PATH), "echo", "--startup-delay", str(args.startup_delay), "--tag", tag]
+    mode_args = ["--daemon"] if args.daemon else ["--pool", str(args.pool)] if args.pool else []
+    bridge = [sys.executable, str(BRIDGE_PATH), *mode_args, "--", *child]
+    env = os.environ.copy()
+    env["MCP_BRIDGE_RUNTIME_DIR"] = tempfile.mkdtemp(prefix="bridge-bench-")
+    init = {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}}
+
+    procs: List[subprocess.Popen[bytes]] = []
+    startup: List[float] = []
+    rss_kb = 0
+    try:
+        for index in range(args.sessions):
+            if index and args.gap:
+                # Lets the pool refill between arrivals, as with sessions opened minutes apart.
+                time.sleep(args.gap)
+            start = time.perf_counter()
+            proc = subprocess.Popen(bridge, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+            procs.append(proc)
+            assert proc.stdin is not None and proc.stdout is not None
+            for req_id, method, params in ((1, "initialize", init), (2, "tools/list", {})):
+                write_frame(proc.stdin, json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}).encode())
+                reply = json.loads(read_frame(proc.stdout))
+                if reply.get("id") != req_id:
+                    raise RuntimeError(f"unexpected reply {reply!r}")
+            startup.append((time.perf_counter() - start) * 1000.0)
+        rss_kb, _ = _tagged_rss_kb(tag)
+    finally:
+        for proc in procs:
+            if proc.stdin is not None:
+                proc.stdin.close()
+        for proc in procs:
+            proc.wait(timeout=10)
+        for pid in _tagged_rss_kb(tag)[1]:
+            try:
+                if b"--serve" in pathlib.Path(f"/proc/{pid}/cmdline").read_bytes():
+                    os.kill(pid, signal.SIGTERM)
+            except (OSError, ProcessLookupError):
+                continue
+
+    warm = startup[1:] or startup
+    print("mode\tsessions\tfirst_ms\tnext_avg_ms\tnext_p95_ms\ttotal_rss_mb\trss_per_session_mb")
+    print(
+        f"{'daemon' if args.daemon else f'pool{args.pool}' if args.pool else 'per_session'}\t{len(startup)}\t{startup[0]:.1f}\t"
+        f"{statistics.fmean(warm):.1f}\t{percentile(warm, 95):.1f}\t"
+        f"{rss_kb / 1024:.1f}\t{rss_kb / 1024 / len(startup):.1f}"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the framed<->line stdio bridge.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    echo_cmd = sub.add_parser("echo", help="Run a line-delimited JSON-RPC echo server")
+    echo_cmd.add_argument("--burst", type=int, default=0, help="Progress notifications emitted before each reply")
+    echo_cmd.add_argument("--startup-delay", type=float, default=0.0, help="Seconds to sleep before serving")
+    echo_cmd.add_argument("--tag", default="", help="Marker used by `sessions` to find bench processes")
+    echo_cmd.set_defaults(func=echo_server)
+
+    rt_cmd = sub.add_parser("roundtrip", help="Measure per-message round-trip latency through a bridge")
+    rt_cmd.add_argument("--bridge", default=str(BRIDGE_PATH), help="Bridge script to benchmark")
+    rt_cmd.add_argument("--label", default="", help="Label for the result row")
+    rt_cmd.add_argument("--messages", type=int, default=2000)
+    rt_cmd.add_argument("--warmup", type=int, default=100)
+    rt_cmd.add_argument("--payload-bytes", type=int, default=256)
+    rt_cmd.add_argument("--burst", type=int, default=0, help="Progress notifications the echo child emits per reply")
+    rt_cmd.add_argument(
+        "--bridge-arg",
+        action="append",
+        default=[],
+        help="Extra bridge option (repeatable), e.g. --bridge-arg=--max-batch-delay-ms=1",
+    )
+    rt_cmd.set_defaults(func=roundtrip)
+
+    frames_cmd = sub.add_parser("frames", help="Microbenchmark frame parsing for 1KB/64KB/8MB frames")
+    frames_cmd.add_argument("--total-mb", type=int, default=256, help="Approximate stream size per frame size")
+    frames_cmd.set_defaults(func=frames)
+
+    sessions_cmd = sub.add_parser("sessions", help="Time to first tools/list and RSS for concurrent sessions")
+    sessions_cmd.add_argument("--sessions", type=int, default=8)
+    sessions_cmd.add_argument("--startup-delay", type=float, default=1.0, help="Simulated server indexing time")
+    sessions_cmd.add_argument("--daemon", action="store_true", help="Run sessions through the shared daemon")
+    sessions_cmd.add_argument("--pool", type=int, default=0, help="Run sessions through a warm pool of this size")
+    sessions_cmd.add_argument("--gap", type=float, default=0.0, help="Seconds between session starts")
+    sessions_cmd.set_defaults(func=sessions)
+
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("PYTHONUNBUFFERED", "1")
+    raise SystemExit(main())
@@ -19,6 +19,12 @@ fi
 echo "[ci] python compile"
 python3 -m py_compile scripts/*.py
 
+echo "[ci] load benchmark against stub servers"
+python3 scripts/runtime_load_bench.py --stub --runs 20 --concurrency 4 --check >/dev/null
+
+echo "[ci] embedding sidecar batching/cache check against the stub model"
+python3 scripts/embed_bench.py --check --clients 4 --requests 5 >/dev/null
+
 echo "[ci] json manifest validation"
 jq empty configs/mcp_stack_manifest.json
 
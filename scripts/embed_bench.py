@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark the embedding sidecar: concurrent clients (one per simulated
+mcpx-qdrant session) post small embedding requests against an in-process
+embed_sidecar.py, unbatched versus dynamically batched, and batched with the
+content-hash caches over a workload where `--duplicates` of the texts repeat.
+
+The default `--provider stub` charges a fixed cost per model call plus a
+per-text cost, which is what makes batching pay off on a real model; pass
+`--provider fastembed` (under `uv run --no-project --with fastembed`) to
+measure the real thing. `--check` verifies that vectors do not depend on
+batching or caching and exits 1 otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+import embed_sidecar
+from runtime_load_bench import ConnectionPool, percentile
+
+HEADERS = {"Content-Type": "application/json"}
+
+
+def client_texts(client: int, requests: int, per_request: int, duplicates: float, shared: List[str]) -> List[List[str]]:
+    rng = random.Random(client)
+    batches = []
+    for req in range(requests):
+        batch = []
+        for item in range(per_request):
+            if shared and rng.random() < duplicates:
+                batch.append(rng.choice(shared))
+            else:
+                batch.append(f"session {client} note {req}.{item}: decision record about module {rng.randrange(10**6)}")
+        batches.append(batch)
+    return batches
+
+
+def embed(pool: ConnectionPool, texts: List[str], input_type: str = "passage") -> List[List[float]]:
+    body = json.dumps({"input": texts, "input_type": input_type}).encode()
+    status, body = pool.fetch("POST", "/v1/embeddings", body, HEADERS)
+    if status != 200:
+        raise RuntimeError(f"sidecar returned {status}: {body[:200]!r}")
+    return [item["embedding"] for item in json.loads(body)["data"]]
+
+
+def start(args: argparse.Namespace, max_batch: int, cache: bool, cache_file: str) -> embed_sidecar.SidecarServer:
+    service = embed_sidecar.EmbeddingService(
+        embed_sidecar.build_embedder(args),
+        max_batch=max_batch,
+        max_wait_ms=args.max_wait_ms,
+        cache_entries=args.cache_entries if cache else 0,
+        cache_file=cache_file if cache else "",
+        disk_max_entries=args.disk_max_entries,
+    )
+    server = embed_sidecar.SidecarServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_case(args: argparse.Namespace, label: str, max_batch: int, cache: bool, cache_file: str) -> dict:
+    server = start(args, max_batch, cache, cache_file)
+    pool = ConnectionPool(f"http://127.0.0.1:{server.server_port}", timeout=120)
+    shared = [f"shared snippet {i}: how the stack wires mcpx-qdrant" for i in range(args.shared_texts)]
+    workloads = [
+        client_texts(client, args.requests, args.texts_per_request, args.duplicates, shared)
+        for client in range(args.clients)
+    ]
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def client(batches: List[List[str]]) -> None:
+        for texts in batches:
+            started = time.perf_counter()
+            try:
+                embed(pool, texts)
+            except (RuntimeError, ValueError) as exc:
+                with lock:
+                    errors.append(str(exc))
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client, args=(batches,)) for batches in workloads]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    metrics = server.service.metrics()
+    server.shutdown()
+    server.server_close()
+    pool.close()
+    latencies.sort()
+    texts = metrics["texts"]
+    hits = metrics["memory_hits"] + metrics["disk_hits"] + metrics["batch_dedup"]
+    return {
+        "case": label,
+        "texts": texts,
+        "errors": len(errors),
+        "wall_s": f"{wall:.2f}",
+        "texts_per_sec": f"{texts / wall:.0f}",
+        "model_emb_per_sec": f"{metrics['model_embeddings_per_sec']:.0f}",
+        "avg_batch": f"{metrics['avg_batch']:.1f}",
+        "hit_rate": f"{hits / texts:.2f}" if texts else "0.00",
+        "p50_ms": f"{percentile(latencies, 50):.1f}" if latencies else "NA",
+        "p95_ms": f"{percentile(latencies, 95):.1f}" if latencies else "NA",
+    }
+
+
+def check(args: argparse.Namespace, cache_file: str) -> List[str]:
+    """Vectors must not depend on batch composition, cache state or a restart onto the disk cache."""
+    problems = []
+    texts = ["alpha", "beta", "alpha", "gamma " * 50, ""]
+    # Uncached: every request really reaches the embedder.
+    server = start(args, args.max_batch, False, "")
+    pool = ConnectionPool(f"http://127.0.0.1:{server.server_port}", timeout=120)
+    together = embed(pool, texts)
+    alone = [embed(pool, [text])[0] for text in texts]
+    dim = server.service.embedder.dim
+    server.shutdown()
+    server.server_close()
+    cached = []
+    for _ in range(2):
+        server = start(args, args.max_batch, True, cache_file)
+        pool = ConnectionPool(f"http://127.0.0.1:{server.server_port}", timeout=120)
+        cached += [embed(pool, texts), embed(pool, texts)]
+        disk_hits = server.service.metrics()["disk_hits"]
+        server.shutdown()
+        server.server_close()
+    if {len(vec) for vec in together} != {dim}:
+        problems.append(f"vector sizes {sorted({len(vec) for vec in together})} != dim {dim}")
+    if together[0] != together[2]:
+        problems.append("duplicate texts in one request got different vectors")
+    if not all(_close(a, b) for a, b in zip(together, alone)):
+        problems.append("batched and single-text vectors differ")
+    if not all(_close(a, b) for response in cached for a, b in zip(together, response)):
+        problems.append("cached vectors differ from freshly embedded ones")
+    if disk_hits != len(set(texts)):
+        problems.append(f"expected {len(set(texts))} disk hits after restart, got {disk_hits}")
+    return problems
+
+
+def _close(a: List[float], b: List[float]) -> bool:
+    # Real models may differ in the last float32 bits between batch sizes.
+    return len(a) == len(b) and all(abs(x - y) <= 1e-5 for x, y in zip(a, b))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the shared embedding sidecar")
+    embed_sidecar.add_service_args(parser)
+    parser.set_defaults(provider="stub", stub_latency_ms=8.0, stub_item_ms=0.4)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=25, help="requests per client")
+    parser.add_argument("--texts-per-request", type=int, default=2)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="fraction of texts drawn from a shared pool")
+    parser.add_argument("--shared-texts", type=int, default=50, help="size of the shared pool")
+    parser.add_argument("--check", action="store_true", help="verify vectors are batch/cache independent")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="embed-bench-") as tmp:
+        if args.check:
+            problems = check(args, f"{tmp}/check.sqlite")
+            for problem in problems:
+                print(f"check failed: {problem}", file=sys.stderr)
+            if problems:
+                return 1
+        columns = [
+            "case", "texts", "errors", "wall_s", "texts_per_sec",
+            "model_emb_per_sec", "avg_batch", "hit_rate", "p50_ms", "p95_ms",
+        ]  # fmt: skip
+        print("\t".join(columns))
+        failed = 0
+        for label, max_batch, cache in (
+            ("unbatched", 1, False),
+            ("batched", args.max_batch, False),
+            ("batched+cache", args.max_batch, True),
+        ):
+            row = run_case(args, label, max_batch, cache, f"{tmp}/bench.sqlite")
+            failed += row["errors"]
+            print("\t".join(str(row[column]) for column in columns))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Shared local embedding sidecar for mcpx-qdrant sessions.
+
+Every `mcp-server-qdrant` process otherwise loads its own fastembed model and
+re-embeds identical text. The sidecar loads the model once and serves all
+sessions over HTTP:
+
+- concurrent requests are batched dynamically: the batcher takes whatever is
+  queued, waits up to `--max-wait-ms` for more, and embeds up to `--max-batch`
+  texts in one model call
+- vectors are cached by content hash (provider, model, input type, text) in an
+  in-memory LRU and an on-disk sqlite store shared across restarts
+- `/metrics` and a periodic stderr line report served texts/sec, model
+  embeddings/sec, cache hits and batch sizes
+
+API (OpenAI-style):
+  POST /v1/embeddings {"input": str | [str], "input_type"?: "passage" | "query"}
+      -> {"object": "list", "model": ..., "data": [{"index": i, "embedding": [...]}, ...]}
+  GET /healthz -> {"status": "ok", "provider": ..., "model": ..., "dim": ...}
+  GET /metrics -> counters and rates
+Until the model has loaded every endpoint answers 503 {"status": "loading"}.
+
+`--provider stub` serves deterministic hash-seeded unit vectors (no model,
+optional simulated latency) for tests and benchmarks; `--provider fastembed`
+needs the `fastembed` package (present in the `uvx mcp-server-qdrant`
+environment, or `uv run --no-project --with fastembed`).
+
+Usage:
+  embed_sidecar.py serve [--listen HOST:PORT] [--provider fastembed|stub] [--model NAME] ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import hashlib
+import json
+import math
+import os
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from array import array
+from http.server import ThreadingHTTPServer
+from typing import List
+
+from runtime_load_bench import JsonHandler
+from workspace_scan import stack_cache_dir
+
+DEFAULT_URL = "http://127.0.0.1:17860"
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+INPUT_TYPES = ("passage", "query")
+# Upper bound on one request, so a single client cannot pin the batcher.
+MAX_REQUEST_TEXTS = 2048
+REQUEST_TIMEOUT = 120.0
+
+
+def env_int(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
+def default_cache_file() -> str:
+    override = os.environ.get("MCP_EMBED_SIDECAR_CACHE_FILE")
+    if override is not None:
+        return override
+    return os.path.join(stack_cache_dir(), "embeddings.sqlite")
+
+
+class StubEmbedder:
+    """Deterministic unit vectors seeded from the text hash; `latency_ms` + `item_ms` per call mimic a model."""
+
+    provider = "stub"
+
+    def __init__(self, model: str, dim: int, latency_ms: float = 0.0, item_ms: float = 0.0) -> None:
+        self.model = model
+        self.dim = dim
+        self.latency = latency_ms / 1000
+        self.item = item_ms / 1000
+
+    def vector(self, text: str) -> array:
+        seed = int.from_bytes(hashlib.sha256(f"{self.model}\0{text}".encode()).digest()[:8], "big")
+        rng = random.Random(seed)
+        values = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return array("f", [v / norm for v in values])
+
+    def embed(self, texts: List[str], input_type: str) -> List[array]:
+        if self.latency or self.item:
+            time.sleep(self.latency + self.item * len(texts))
+        return [self.vector(text) for text in texts]
+
+
+class FastEmbedder:
+    """fastembed TextEmbedding, loaded once; passage/query use the model's own prefixes."""
+
+    provider = "fastembed"
+
+    def __init__(self, model: str, max_batch: int, threads: int | None = None) -> None:
+        try:
+            from fastembed import TextEmbedding
+        except ImportError:
+            raise SystemExit(
+                "embed_sidecar: fastembed is not installed; run through "
+                "`uv run --no-project --with fastembed` or use --provider stub"
+            ) from None
+        self.model = model
+        self.max_batch = max_batch
+        self.engine = TextEmbedding(model_name=model, threads=threads)
+        self.dim = len(self.embed(["dimension probe"], "passage")[0])
+
+    def embed(self, texts: List[str], input_type: str) -> List[array]:
+        fn = self.engine.query_embed if input_type == "query" else self.engine.passage_embed
+        vectors = []
+        for vec in fn(texts, batch_size=self.max_batch):
+            out = array("f")
+            out.frombytes(vec.astype("float32").tobytes())
+            vectors.append(out)
+        return vectors
+
+
+class DiskCache:
+    """sqlite key -> float32 blob store; only the batcher thread touches it."""
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, vec BLOB NOT NULL, used INTEGER NOT NULL)"
+            " WITHOUT ROWID"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS vectors_used ON vectors(used)")
+        self.max_entries = max_entries
+        self.entries = self.db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def get_many(self, keys: List[bytes]) -> dict[bytes, array]:
+        found: dict[bytes, array] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            marks = ",".join("?" * len(chunk))
+            for key, blob in self.db.execute(f"SELECT key, vec FROM vectors WHERE key IN ({marks})", chunk):
+                vec = array("f")
+                vec.frombytes(blob)
+                found[key] = vec
+        if found:
+            now = int(time.time())
+            self.db.executemany("UPDATE vectors SET used = ? WHERE key = ?", [(now, key) for key in found])
+            self.db.commit()
+        return found
+
+    def put_many(self, items: dict[bytes, array]) -> None:
+        now = int(time.time())
+        self.db.executemany(
+            "INSERT OR REPLACE INTO vectors (key, vec, used) VALUES (?, ?, ?)",
+            [(key, vec.tobytes(), now) for key, vec in items.items()],
+        )
+        self.entries += len(items)
+        if self.max_entries and self.entries > self.max_entries:
+            # Trim to 90% so pruning does not run on every batch once the store is full.
+            self.entries = self.db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            excess = self.entries - self.max_entries * 9 // 10
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY used LIMIT ?)", (excess,)
+                )
+                self.entries -= excess
+        self.db.commit()
+
+
+class Pending:
+    """One request's texts; the batcher fills `vectors` and sets `done`."""
+
+    __slots__ = ("input_type", "keys", "texts", "vectors", "missing", "done", "error")
+
+    def __init__(self, input_type: str, keys: List[bytes], texts: List[str]) -> None:
+        self.input_type = input_type
+        self.keys = keys
+        self.texts = texts
+        self.vectors: List[array | None] = [None] * len(texts)
+        self.missing: List[int] = []
+        self.done = threading.Event()
+        self.error: str | None = None
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        embedder,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        cache_entries: int = 20000,
+        cache_file: str = "",
+        disk_max_entries: int = 500000,
+    ) -> None:
+        self.embedder = embedder
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.cache_entries = cache_entries
+        self.lru: collections.OrderedDict[bytes, array] = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.disk = DiskCache(cache_file, disk_max_entries) if cache_file else None
+        self.queue: queue.Queue[Pending] = queue.Queue()
+        self.started = time.monotonic()
+        self.last_active = self.started
+        self.in_flight = 0
+        self.stats = collections.Counter()
+        self.embed_seconds = 0.0
+        self.max_batch_seen = 0
+        self.prefix = f"{embedder.provider}\0{embedder.model}\0{embedder.dim}\0".encode()
+        threading.Thread(target=self._batcher, name="embed-batcher", daemon=True).start()
+
+    def key(self, input_type: str, text: str) -> bytes:
+        payload = self.prefix + input_type.encode() + b"\0" + text.encode("utf-8", "surrogatepass")
+        return hashlib.sha256(payload).digest()
+
+    def embed(self, texts: List[str], input_type: str = "passage") -> List[array]:
+        """Vectors for `texts`, from the caches where possible; blocks until the batcher has the rest."""
+        pending = Pending(input_type, [self.key(input_type, text) for text in texts], texts)
+        with self.lock:
+            self.in_flight += 1
+            self.last_active = time.monotonic()
+            self.stats["requests"] += 1
+            self.stats["texts"] += len(texts)
+            for idx, key in enumerate(pending.keys):
+                vec = self.lru.get(key)
+                if vec is None:
+                    pending.missing.append(idx)
+                else:
+                    self.lru.move_to_end(key)
+                    pending.vectors[idx] = vec
+            self.stats["memory_hits"] += len(texts) - len(pending.missing)
+        try:
+            if pending.missing:
+                self.queue.put(pending)
+                if not pending.done.wait(REQUEST_TIMEOUT):
+                    raise RuntimeError("embedding timed out")
+                if pending.error:
+                    raise RuntimeError(pending.error)
+            return pending.vectors  # type: ignore[return-value]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.last_active = time.monotonic()
+
+    def _remember(self, items: dict[bytes, array]) -> None:
+        if not self.cache_entries:
+            return
+        with self.lock:
+            for key, vec in items.items():
+                self.lru[key] = vec
+                self.lru.move_to_end(key)
+            while len(self.lru) > self.cache_entries:
+                self.lru.popitem(last=False)
+
+    def _collect(self) -> List[Pending]:
+        batch = [self.queue.get()]
+        size = len(batch[0].missing)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self.queue.get_nowait() if timeout <= 0 else self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item.missing)
+        return batch
+
+    def _batcher(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._run_batch(batch)
+            except Exception as exc:
+                # Whatever the model raised goes back to every waiting request; the batcher keeps serving.
+                for pending in batch:
+                    pending.error = f"{type(exc).__name__}: {exc}"
+            for pending in batch:
+                pending.done.set()
+
+    def _run_batch(self, batch: List[Pending]) -> None:
+        wanted: dict[bytes, tuple[str, str]] = {}
+        for pending in batch:
+            for idx in pending.missing:
+                wanted.setdefault(pending.keys[idx], (pending.input_type, pending.texts[idx]))
+        resolved: dict[bytes, array] = {}
+        if self.disk is not None:
+            resolved = self.disk.get_many(list(wanted))
+            self.stats["disk_hits"] += len(resolved)
+            self._remember(resolved)
+        todo = [(key, spec) for key, spec in wanted.items() if key not in resolved]
+        fresh: dict[bytes, array] = {}
+        for input_type in INPUT_TYPES:
+            group = [(key, text) for key, (kind, text) in todo if kind == input_type]
+            for start in range(0, len(group), self.max_batch):
+                chunk = group[start : start + self.max_batch]
+                started = time.perf_counter()
+                vectors = self.embedder.embed([text for _, text in chunk], input_type)
+                self.embed_seconds += time.perf_counter() - started
+                self.stats["batches"] += 1
+                self.max_batch_seen = max(self.max_batch_seen, len(chunk))
+                fresh.update(zip((key for key, _ in chunk), vectors))
+        if fresh:
+            self.stats["embedded"] += len(fresh)
+            self._remember(fresh)
+            if self.disk is not None:
+                self.disk.put_many(fresh)
+            resolved.update(fresh)
+        # Texts repeated within the batch were embedded once; count the extra copies as hits.
+        self.stats["batch_dedup"] += sum(len(p.missing) for p in batch) - len(wanted)
+        for pending in batch:
+            for idx in pending.missing:
+                pending.vectors[idx] = resolved[pending.keys[idx]]
+
+    def metrics(self) -> dict:
+        with self.lock:
+            stats = dict(self.stats)
+            lru_entries = len(self.lru)
+            in_flight = self.in_flight
+        uptime = time.monotonic() - self.started
+        batches = stats.get("batches", 0)
+        embedded = stats.get("embedded", 0)
+        return {
+            "provider": self.embedder.provider,
+            "model": self.embedder.model,
+            "dim": self.embedder.dim,
+            "uptime_sec": round(uptime, 3),
+            "requests": stats.get("requests", 0),
+            "texts": stats.get("texts", 0),
+            "memory_hits": stats.get("memory_hits", 0),
+            "disk_hits": stats.get("disk_hits", 0),
+            "batch_dedup": stats.get("batch_dedup", 0),
+            "embedded": embedded,
+            "batches": batches,
+            "avg_batch": round(embedded / batches, 2) if batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "model_embeddings_per_sec": round(embedded / self.embed_seconds, 1) if self.embed_seconds else 0.0,
+            "served_texts_per_sec": round(stats.get("texts", 0) / uptime, 1) if uptime else 0.0,
+            "in_flight": in_flight,
+            "queue_depth": self.queue.qsize(),
+            "lru_entries": lru_entries,
+            "disk_entries": self.disk.entries if self.disk is not None else 0,
+        }
+
+
+class SidecarHandler(JsonHandler):
+    server: "SidecarServer"
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        if service is None and self.path in ("/health", "/healthz", "/metrics"):
+            self.reply(503, {"status": "loading"})
+        elif self.path in ("/health", "/healthz"):
+            embedder = service.embedder
+            info = {"status": "ok", "provider": embedder.provider, "model": embedder.model, "dim": embedder.dim}
+            self.reply(200, info)
+        elif self.path == "/metrics":
+            self.reply(200, service.metrics())
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        raw = self.read_body()
+        if self.path not in ("/v1/embeddings", "/embeddings"):
+            self.reply(404, {"error": "not found"})
+            return
+        if service is None:
+            self.reply(503, {"status": "loading"})
+            return
+        try:
+            payload = json.loads(raw or b"{}")
+            texts = payload.get("input")
+            if isinstance(texts, str):
+                texts = [texts]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("input must be a string or a list of strings")
+            if len(texts) > MAX_REQUEST_TEXTS:
+                raise ValueError(f"at most {MAX_REQUEST_TEXTS} inputs per request")
+            input_type = payload.get("input_type") or "passage"
+            if input_type not in INPUT_TYPES:
+                raise ValueError(f"input_type must be one of {', '.join(INPUT_TYPES)}")
+            model = payload.get("model")
+            if model and model != service.embedder.model:
+                raise ValueError(f"this sidecar serves {service.embedder.model}, not {model}")
+        except (ValueError, AttributeError) as exc:
+            self.reply(400, {"error": str(exc)})
+            return
+        try:
+            vectors = service.embed(texts, input_type)
+        except RuntimeError as exc:
+            self.reply(503, {"error": str(exc)})
+            return
+        self.reply(
+            200,
+            {
+                "object": "list",
+                "model": service.embedder.model,
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": vec.tolist()} for i, vec in enumerate(vectors)
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            },
+        )
+
+
+class SidecarServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], service: EmbeddingService | None = None) -> None:
+        super().__init__(address, SidecarHandler)
+        # None while the model loads; the handler answers 503 until serve() attaches the service.
+        self.service = service
+
+
+def build_embedder(args: argparse.Namespace):
+    if args.provider == "stub":
+        return StubEmbedder(args.model, args.dim, args.stub_latency_ms, args.stub_item_ms)
+    return FastEmbedder(args.model, args.max_batch, args.threads)
+
+
+def add_service_args(parser: argparse.ArgumentParser) -> None:
+    """Embedder and batching flags shared by `serve` and embed_bench.py."""
+    parser.add_argument(
+        "--provider",
+        choices=("fastembed", "stub"),
+        default=os.environ.get("MCP_EMBED_SIDECAR_PROVIDER", "fastembed"),
+    )
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL", DEFAULT_MODEL))
+    parser.add_argument("--dim", type=int, default=384, help="stub vector size")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="stub: simulated time per model call")
+    parser.add_argument("--stub-item-ms", type=float, default=0.0, help="stub: simulated time per text")
+    parser.add_argument("--threads", type=int, default=None, help="fastembed/onnxruntime threads")
+    parser.add_argument("--max-batch", type=int, default=env_int("MCP_EMBED_SIDECAR_MAX_BATCH", 64))
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=float(os.environ.get("MCP_EMBED_SIDECAR_MAX_WAIT_MS", "5")),
+        help="how long a batch waits for more requests",
+    )
+    parser.add_argument(
+        "--cache-entries", type=int, default=env_int("MCP_EMBED_SIDECAR_CACHE_ENTRIES", 20000), help="in-memory LRU"
+    )
+    parser.add_argument("--cache-file", default=default_cache_file(), help="sqlite vector cache ('' disables)")
+    parser.add_argument("--disk-max-entries", type=int, default=env_int("MCP_EMBED_SIDECAR_DISK_MAX_ENTRIES", 500000))
+
+
+def log_loop(service: EmbeddingService, interval: float) -> None:
+    last = service.metrics()
+    while True:
+        time.sleep(interval)
+        now = service.metrics()
+        texts = now["texts"] - last["texts"]
+        if texts:
+            embedded = now["embedded"] - last["embedded"]
+            batches = now["batches"] - last["batches"]
+            embed_sec = now["embed_seconds"] - last["embed_seconds"]
+            elapsed = now["uptime_sec"] - last["uptime_sec"]
+            print(
+                f"embed_sidecar: {texts} texts ({texts / elapsed:.1f}/s), embedded {embedded}"
+                f" ({embedded / embed_sec if embed_sec else 0:.1f}/s model) in {batches} batches,"
+                f" hits memory {now['memory_hits'] - last['memory_hits']} disk {now['disk_hits'] - last['disk_hits']}",
+                file=sys.stderr,
+                flush=True,
+            )
+        last = now
+
+
+def idle_loop(server: SidecarServer, timeout: float) -> None:
+    service = server.service
+    while True:
+        time.sleep(min(timeout, 5.0))
+        with service.lock:
+            idle = service.in_flight == 0 and time.monotonic() - service.last_active > timeout
+        if idle:
+            print(f"embed_sidecar: idle for {timeout:g}s, exiting", file=sys.stderr, flush=True)
+            server.shutdown()
+            return
+
+
+def serve(args: argparse.Namespace) -> int:
+    parsed = urllib.parse.urlsplit(args.listen if "://" in args.listen else f"http://{args.listen}")
+    address = (parsed.hostname or "127.0.0.1", parsed.port or 17860)
+    # Bind before loading the model, so a session that lost the autostart race exits here without loading it.
+    try:
+        server = SidecarServer(address)
+    except OSError as exc:
+        # Another session's autostart won the port; that sidecar serves this one too.
+        print(f"embed_sidecar: cannot listen on {address[0]}:{address[1]}: {exc}", file=sys.stderr)
+        return 3
+    serving = threading.Thread(target=server.serve_forever, daemon=True)
+    serving.start()
+    try:
+        embedder = build_embedder(args)
+        service = EmbeddingService(
+            embedder, args.max_batch, args.max_wait_ms, args.cache_entries, args.cache_file, args.disk_max_entries
+        )
+        server.service = service
+        print(
+            f"embed_sidecar: {embedder.provider} {embedder.model} (dim {embedder.dim})"
+            f" on http://{address[0]}:{server.server_port}",
+            file=sys.stderr,
+            flush=True,
+        )
+        if args.log_interval > 0:
+            threading.Thread(target=log_loop, args=(service, args.log_interval), daemon=True).start()
+        if args.idle_timeout > 0:
+            threading.Thread(target=idle_loop, args=(server, args.idle_timeout), daemon=True).start()
+        serving.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Shared embedding sidecar for mcpx-qdrant")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="run the sidecar")
+    serve_parser.add_argument("--listen", default=os.environ.get("MCP_EMBED_SIDECAR_URL", DEFAULT_URL))
+    add_service_args(serve_parser)
+    serve_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=float(os.environ.get("MCP_EMBED_SIDECAR_IDLE_TIMEOUT_SEC", "0")),
+        help="exit after this many idle seconds (0 = never)",
+    )
+    serve_parser.add_argument(
+        "--log-interval",
+        type=float,
+        default=float(os.environ.get("MCP_EMBED_SIDECAR_LOG_INTERVAL_SEC", "60")),
+        help="seconds between stderr throughput lines (0 = off)",
+    )
+    args = parser.parse_args()
+    return serve(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
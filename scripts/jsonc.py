@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+JSONC (JSON with comments) reading and comment-preserving editing.
+
+`loads` tries `json.loads` first and only falls back to the tokenizer when
+the text has comments or trailing commas. `JsoncDocument` keeps the source
+text and applies `set`/`delete` edits as minimal text splices, so comments,
+key order and formatting outside the edited members survive a round trip.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, List, Tuple
+
+WS_RE = re.compile(r"(?:\s+|//[^\n]*|/\*.*?\*/)*", re.S)
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+LITERALS = {"true": True, "false": False, "null": None}
+
+Path = Tuple[Any, ...]
+# key -> (key start, value start, value end)
+Members = Dict[str, Tuple[int, int, int]]
+
+
+class JsoncError(ValueError):
+    def __init__(self, msg: str, text: str, pos: int) -> None:
+        line = text.count("\n", 0, pos) + 1
+        col = pos - text.rfind("\n", 0, pos)
+        super().__init__(f"{msg}: line {line} column {col} (char {pos})")
+        self.pos = pos
+
+
+class _Parser:
+    def __init__(self, text: str, track: bool) -> None:
+        self.text = text
+        # object path -> (open brace, close brace, members); only filled when tracking
+        self.objects: Dict[Path, Tuple[int, int, Members]] | None = {} if track else None
+
+    def ws(self, pos: int) -> int:
+        return WS_RE.match(self.text, pos).end()  # type: ignore[union-attr]
+
+    def parse(self) -> Any:
+        pos = self.ws(0)
+        value, pos = self.value(pos, ())
+        pos = self.ws(pos)
+        if pos != len(self.text):
+            raise JsoncError("Extra data", self.text, pos)
+        return value
+
+    def value(self, pos: int, path: Path) -> Tuple[Any, int]:
+        text = self.text
+        if pos >= len(text):
+            raise JsoncError("Expecting value", text, pos)
+        ch = text[pos]
+        if ch == "{":
+            return self.object(pos, path)
+        if ch == "[":
+            return self.array(pos, path)
+        if ch == '"':
+            try:
+                return scanstring(text, pos + 1)
+            except json.JSONDecodeError as exc:
+                raise JsoncError(exc.msg, text, exc.pos) from None
+        match = NUMBER_RE.match(text, pos)
+        if match:
+            literal = match.group()
+            return (float(literal) if any(c in literal for c in ".eE") else int(literal)), match.end()
+        for word, value in LITERALS.items():
+            if text.startswith(word, pos):
+                return value, pos + len(word)
+        raise JsoncError("Expecting value", text, pos)
+
+    def object(self, start: int, path: Path) -> Tuple[Dict[str, Any], int]:
+        text = self.text
+        obj: Dict[str, Any] = {}
+        members: Members = {}
+        pos = self.ws(start + 1)
+        while text[pos: pos + 1] != "}":
+            if text[pos: pos + 1] != '"':
+                raise JsoncError("Expecting property name enclosed in double quotes", text, pos)
+            key_start = pos
+            key, pos = self.value(pos, path)
+            pos = self.ws(pos)
+            if text[pos: pos + 1] != ":":
+                raise JsoncError("Expecting ':' delimiter", text, pos)
+            value_start = self.ws(pos + 1)
+            obj[key], pos = self.value(value_start, (*path, key))
+            members[key] = (key_start, value_start, pos)
+            pos = self.ws(pos)
+            if text[pos: pos + 1] == ",":
+                pos = self.ws(pos + 1)
+            elif text[pos: pos + 1] != "}":
+                raise JsoncError("Expecting ',' delimiter", text, pos)
+        if self.objects is not None:
+            self.objects[path] = (start, pos, members)
+        return obj, pos + 1
+
+    def array(self, start: int, path: Path) -> Tuple[List[Any], int]:
+        text = self.text
+        items: List[Any] = []
+        pos = self.ws(start + 1)
+        while text[pos: pos + 1] != "]":
+            item, pos = self.value(pos, (*path, len(items)))
+            items.append(item)
+            pos = self.ws(pos)
+            if text[pos: pos + 1] == ",":
+                pos = self.ws(pos + 1)
+            elif text[pos: pos + 1] != "]":
+                raise JsoncError("Expecting ',' delimiter", text, pos)
+        return items, pos + 1
+
+
+def loads(text: str) -> Any:
+    """Parse JSONC; plain JSON goes through the C decoder untouched."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    return _Parser(text, track=False).parse()
+
+
+def _render(value: Any, indent: str) -> str:
+    return json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + indent)
+
+
+class JsoncDocument:
+    """
+    A JSONC text plus its parsed data, editable without losing comments.
+
+    Edits splice the source text and re-parse it, so `data` and `text` always
+    agree. New members copy the indentation of their siblings.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._parse()
+
+    def _parse(self) -> None:
+        parser = _Parser(self.text, track=True)
+        self.data = parser.parse()
+        assert parser.objects is not None
+        self._objects = parser.objects
+
+    def _splice(self, start: int, end: int, replacement: str) -> None:
+        self.text = self.text[:start] + replacement + self.text[end:]
+        self._parse()
+
+    def _indent_at(self, pos: int) -> str:
+        line_start = self.text.rfind("\n", 0, pos) + 1
+        line = self.text[line_start:pos]
+        return line[: len(line) - len(line.lstrip())]
+
+    def _object(self, path: Path) -> Tuple[int, int, Members]:
+        span = self._objects.get(tuple(path))
+        if span is None:
+            raise KeyError(f"no JSON object at {'/'.join(map(str, path)) or '<root>'}")
+        return span
+
+    def set(self, path: Path, value: Any) -> None:
+        """Set `path[-1]` in the object at `path[:-1]`, replacing in place or appending a member."""
+        *parent, key = path
+        open_pos, close_pos, members = self._object(tuple(parent))
+        if key in members:
+            key_start, value_start, value_end = members[key]
+            current = self.data
+            for part in path:
+                current = current[part]
+            if current == value and type(current) is type(value):
+                return
+            self._splice(value_start, value_end, _render(value, self._indent_at(key_start)))
+            return
+
+        text = self.text
+        if members:
+            last_start, _, last_end = max(members.values())
+            indent = self._indent_at(last_start)
+            member = json.dumps(key, ensure_ascii=False) + ": " + _render(value, indent)
+            after = self._ws(last_end)
+            if text[after: after + 1] == ",":
+                # Keep the file's trailing-comma style, and any comment after that comma on its line.
+                pos = after + 1
+                newline = text.find("\n", pos, close_pos)
+                if newline >= 0 and WS_RE.fullmatch(text, pos, newline):
+                    pos = newline
+                self._splice(pos, pos, "\n" + indent + member + ",")
+                return
+            newline = text.find("\n", last_end, close_pos)
+            if newline >= 0 and WS_RE.fullmatch(text, last_end, newline):
+                # Leave a comment trailing the previous value on its own line.
+                self._splice(last_end, newline, "," + text[last_end:newline] + "\n" + indent + member)
+                return
+            self._splice(last_end, last_end, ", " + member)
+            return
+
+        outer = self._indent_at(open_pos)
+        indent = outer + "  "
+        member = json.dumps(key, ensure_ascii=False) + ": " + _render(value, indent)
+        if not text[open_pos + 1: close_pos].strip():
+            self._splice(open_pos + 1, close_pos, "\n" + indent + member + "\n" + outer)
+        else:
+            self._splice(open_pos + 1, open_pos + 1, "\n" + indent + member)
+
+    def delete(self, path: Path) -> bool:
+        """Remove `path[-1]` from the object at `path[:-1]`; returns False when it was absent."""
+        *parent, key = path
+        try:
+            _, _, members = self._object(tuple(parent))
+        except KeyError:
+            return False
+        if key not in members:
+            return False
+        text = self.text
+        key_start, _, value_end = members[key]
+        after = self._ws(value_end)
+        comma = -1
+        if text[after: after + 1] == ",":
+            end = after + 1
+        else:
+            end = value_end
+            earlier = [span for span in members.values() if span[0] < key_start]
+            if earlier:
+                # Last member without a trailing comma: drop the comma that precedes it instead.
+                candidate = self._ws(max(earlier)[2])
+                if text[candidate: candidate + 1] == ",":
+                    comma = candidate
+        start = key_start
+        line_start = text.rfind("\n", 0, start) + 1
+        if not text[line_start:start].strip():
+            start = line_start
+            newline = text.find("\n", end)
+            # A comment left on the member's last line goes with it.
+            if newline >= 0 and WS_RE.fullmatch(text, end, newline):
+                end = newline + 1
+        text = text[:start] + text[end:]
+        if comma >= 0:
+            text = text[:comma] + text[comma + 1:]
+        self.text = text
+        self._parse()
+        return True
+
+    def _ws(self, pos: int) -> int:
+        return WS_RE.match(self.text, pos).end()  # type: ignore[union-attr]
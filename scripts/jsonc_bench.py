@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark opencode.jsonc loading: the previous `node` + `vm` loader versus
+the in-process `jsonc` module (plain-JSON fast path and comment tokenizer),
+plus a full comment-preserving edit of the `mcp` block.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, List
+
+import jsonc
+
+NODE_LOADER = r'''
+const fs = require('fs');
+const vm = require('vm');
+const p = process.argv[1];
+const txt = fs.readFileSync(p, 'utf8');
+let obj;
+try {
+  obj = vm.runInNewContext('(' + txt + ')', {}, { timeout: 1000 });
+} catch (e) {
+  obj = JSON.parse(txt);
+}
+process.stdout.write(JSON.stringify(obj));
+'''
+
+
+def percentile(values: List[float], pct: int) -> float:
+    ordered = sorted(values)
+    idx = max(0, (len(ordered) * pct + 99) // 100 - 1)
+    return ordered[idx]
+
+
+def node_load(path: pathlib.Path) -> dict:
+    # Pre-jsonc stack_apply.load_opencode_jsonc, kept as the comparison baseline.
+    cp = subprocess.run(["node", "-e", NODE_LOADER, str(path)], text=True, capture_output=True)
+    if cp.returncode != 0:
+        raise RuntimeError(cp.stderr)
+    return json.loads(cp.stdout)
+
+
+def sample_config(servers: int, comments: bool) -> str:
+    mcp = {
+        f"server-{i}": {
+            "type": "local",
+            "command": ["uvx", f"server-{i}", "--data-dir", f"/srv/data/{i}"],
+            "environment": {"LOG_LEVEL": "info", "INDEX": str(i)},
+            "enabled": True,
+        }
+        for i in range(servers)
+    }
+    body = json.dumps({"$schema": "https://opencode.ai/config.json", "theme": "dark", "mcp": mcp}, indent=2)
+    if not comments:
+        return body + "\n"
+    lines = ["// opencode config managed in part by stack_apply"]
+    for line in body.splitlines():
+        if line.strip().startswith('"server-'):
+            lines.append("    // " + line.strip().split(":")[0])
+        lines.append(line)
+    # Trailing comma before the closing brace of the root object.
+    lines[-2] = lines[-2] + ","
+    return "\n".join(lines) + "\n"
+
+
+def timed(fn: Callable[[], object], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def _edit(text: str, servers: int) -> str:
+    # What opencode_apply does on a profile switch: drop half the servers, re-add one.
+    doc = jsonc.JsoncDocument(text)
+    for i in range(0, servers, 2):
+        doc.delete(("mcp", f"server-{i}"))
+    doc.set(("mcp", "server-0"), {"type": "local", "command": ["uvx", "server-0"]})
+    return doc.text
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark opencode.jsonc loading (node vs in-process)")
+    parser.add_argument("--servers", type=int, default=14, help="mcp entries in the generated config")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--node-runs", type=int, default=10)
+    args = parser.parse_args()
+
+    work = pathlib.Path(tempfile.mkdtemp(prefix="jsonc-bench-"))
+    try:
+        print("file\timpl\truns\tavg_ms\tp50_ms\tp95_ms")
+        for label, comments in (("plain", False), ("commented", True)):
+            path = work / f"{label}.jsonc"
+            text = sample_config(args.servers, comments)
+            path.write_text(text)
+            expected = jsonc.loads(text)
+
+            cases: List[tuple[str, Callable[[], object], int]] = [
+                ("jsonc.loads", lambda: jsonc.loads(path.read_text()), args.runs),
+                ("jsonc.edit_mcp", lambda: _edit(path.read_text(), args.servers), args.runs),
+            ]
+            if shutil.which("node"):
+                if node_load(path) != expected:
+                    raise RuntimeError(f"node and jsonc disagree on {label}")
+                cases.insert(0, ("node_vm", lambda: node_load(path), args.node_runs))
+            for impl, fn, runs in cases:
+                samples = timed(fn, runs)
+                print(
+                    f"{label}\t{impl}\t{runs}\t{statistics.fmean(samples):.3f}\t"
+                    f"{percentile(samples, 50):.3f}\t{percentile(samples, 95):.3f}"
+                )
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
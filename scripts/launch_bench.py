@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark mcpx wrapper startup: time from spawning the wrapper to the server's
+`initialize` and `tools/list` replies, for the shell resolution path
+(MCP_LAUNCH_CACHE=0), a launcher start with an empty launch cache, and a warm
+launcher start that execs the cached binary directly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+
+import stack_doctor
+from runtime_load_bench import percentile
+
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent
+WRAPPERS = {
+    "qdrant": ("mcpx-qdrant", SCRIPT_DIR / "mcpx_qdrant_auto.sh"),
+    "lsp": ("mcpx-lsp", SCRIPT_DIR / "mcpx_lsp_auto.sh"),
+    "neo4j": ("mcpx-neo4j", SCRIPT_DIR / "mcpx_neo4j_auto.sh"),
+}
+
+
+async def start_once(name: str, wrapper: pathlib.Path, env: dict[str, str], timeout: float) -> dict:
+    metrics: dict = {}
+    stderr_tail: collections.deque = collections.deque(maxlen=3)
+    spec = {"command": str(wrapper), "args": [], "env": env}
+    try:
+        await asyncio.wait_for(stack_doctor.probe_stdio(name, spec, metrics, stderr_tail), timeout)
+    except asyncio.TimeoutError:
+        metrics["error"] = f"no tools/list reply within {timeout:g}s"
+    except (stack_doctor.McpProbeError, OSError, asyncio.IncompleteReadError, ValueError) as exc:
+        metrics["error"] = str(exc) or type(exc).__name__
+    if "error" in metrics and stderr_tail:
+        metrics["error"] += f" (stderr: {stderr_tail[-1]})"
+    return metrics
+
+
+async def bench(args: argparse.Namespace, cache_dir: pathlib.Path) -> int:
+    failed = 0
+    print("server\timpl\truns\tok\tinit_p50_ms\tinit_p95_ms\ttools_p50_ms\ttools_avg_ms")
+    for server in args.servers:
+        name, wrapper = WRAPPERS[server]
+        warm_cache = cache_dir / f"{server}-warm.cache"
+        impls = {
+            "shell": lambda run: {"MCP_LAUNCH_CACHE": "0"},
+            "launch_cold": lambda run: {"MCP_LAUNCH_CACHE_FILE": str(cache_dir / f"{server}-cold-{run}.cache")},
+            "launch": lambda run: {"MCP_LAUNCH_CACHE_FILE": str(warm_cache)},
+        }
+        # Fill the warm cache (and any tool install) outside the measured runs.
+        await start_once(name, wrapper, impls["launch"](0), args.timeout)
+        for impl in args.impls:
+            samples = [await start_once(name, wrapper, impls[impl](run), args.timeout) for run in range(args.runs)]
+            ok = [sample for sample in samples if "error" not in sample]
+            errors = [sample["error"] for sample in samples if "error" in sample]
+            if errors:
+                failed += 1
+                print(f"{server}/{impl}: {len(errors)} failed start(s), e.g. {errors[0]}", file=sys.stderr)
+            if not ok:
+                print(f"{server}\t{impl}\t{args.runs}\t0\tNA\tNA\tNA\tNA")
+                continue
+            init = sorted(sample["initialize_ms"] for sample in ok)
+            tools = sorted(sample["tools_list_ms"] for sample in ok)
+            print(
+                f"{server}\t{impl}\t{args.runs}\t{len(ok)}\t{percentile(init, 50):.1f}\t{percentile(init, 95):.1f}\t"
+                f"{percentile(tools, 50):.1f}\t{statistics.fmean(tools):.1f}"
+            )
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark mcpx wrapper startup (shell vs cached launcher)")
+    parser.add_argument("--servers", default="qdrant,lsp,neo4j", help="comma list of: " + ",".join(WRAPPERS))
+    parser.add_argument("--impls", default="shell,launch_cold,launch", help="comma list of: shell,launch_cold,launch")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-start limit in seconds")
+    parser.add_argument("--workspace", default=os.getcwd(), help="directory the wrappers start in")
+    args = parser.parse_args()
+    args.servers = [item.strip() for item in args.servers.split(",") if item.strip()]
+    args.impls = [item.strip() for item in args.impls.split(",") if item.strip()]
+    unknown = [item for item in args.servers if item not in WRAPPERS]
+    unknown += [item for item in args.impls if item not in ("shell", "launch_cold", "launch")]
+    if unknown:
+        parser.error(f"unknown server/impl: {', '.join(unknown)}")
+
+    os.chdir(args.workspace)
+    with tempfile.TemporaryDirectory(prefix="launch-bench-") as tmp:
+        return asyncio.run(bench(args, pathlib.Path(tmp)))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
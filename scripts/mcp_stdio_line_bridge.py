@@ -4,96 +4,1686 @@ Bridge framed MCP stdio <-> newline-delimited JSON-RPC stdio.
 
 Use this when an MCP server speaks line-delimited JSON on stdio
 but the client expects framed Content-Length transport.
+
+All pipes are driven from a single asyncio event loop: non-blocking stream
+readers on the client stdin and child stdout/stderr, buffered writers on the
+child stdin and client stdout. Client frames are parsed incrementally and
+forwarded with vectored writes, so payloads are never concatenated. Server
+lines are framed per burst and flushed with one write per burst.
+
+Set MCP_BRIDGE_METRICS_FILE (or --metrics-file) to record per-method
+round-trip latency, throughput and queue depth snapshots.
+
+Set MCP_BRIDGE_CACHE=1 (or --cache) to answer repeated idempotent requests
+(tools/list and friends, allowlisted tools/call) from an in-bridge LRU cache.
+
+With MCP_BRIDGE_DAEMON=1 (or --daemon) sessions share one warm server per
+command line: the first session starts a daemon that owns the server and
+listens on a Unix socket, and every session relays its framed stdio there.
+
+With MCP_BRIDGE_POOL_SIZE=N (or --pool N) each session still gets its own
+server, but it is taken from a pool of N children that a background process
+has already spawned and initialized.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import fcntl
+import hashlib
+import itertools
+import json
 import os
+import pathlib
 import signal
+import stat
 import subprocess
 import sys
+import tempfile
 import threading
-from typing import BinaryIO
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, Sequence
 
+READ_CHUNK = 256 * 1024
+STDERR_CHUNK = 4096
+NEWLINE = b"\n"
+WHITESPACE = b" \t\r\n\x0b\x0c"
+# Lines at least this large are written vectored instead of copied into the batch.
+INLINE_FRAME_MAX = 64 * 1024
 
-def _read_framed_message(stream: BinaryIO) -> bytes | None:
-    headers: dict[str, str] = {}
 
-    while True:
-        line = stream.readline()
-        if line == b"":
+# Leading columns match report/data/final_runtime_perf.tsv (runtime_stress_refresh.sh).
+METRICS_COLUMNS = (
+    "target",
+    "test",
+    "runs",
+    "ok",
+    "fail",
+    "avg_ms",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "max_ms",
+    "client_to_server_bps",
+    "server_to_client_bps",
+    "inflight",
+    "server_queue_bytes",
+    "client_queue_bytes",
+    "server_stall_ms",
+    "client_stall_ms",
+    "cache_hits",
+    "cache_misses",
+    "cache_entries",
+    "timestamp",
+)
+# Latency samples kept per method per snapshot window.
+METRICS_WINDOW_MAX = 100_000
+DAEMON_START_TIMEOUT = 10.0
+# Warm-up includes whatever the server does before answering initialize (indexing, uvx resolution).
+POOL_WARM_TIMEOUT = 120.0
+POOL_RETRY_DELAY = 1.0
+POOL_PROTOCOL_VERSION = "2025-06-18"
+CACHE_DEFAULT_METHODS = ("tools/list", "resources/list", "resources/templates/list", "prompts/list")
+# Per-shell noise that should not split otherwise identical pools.
+POOL_ENV_IGNORE = frozenset({"_", "OLDPWD", "PWD", "SHLVL", "TERM_SESSION_ID", "WINDOWID"})
+# A drain that is still blocked after this long is reported as a stall.
+STALL_LOG_AFTER = 0.1
+SCRIPT_PATH = pathlib.Path(__file__).resolve()
+
+
+@dataclass
+class BridgeConfig:
+    max_batch_delay: float = 0.0
+    max_batch_bytes: int = 1024 * 1024
+    metrics_file: str = ""
+    metrics_interval: float = 10.0
+    metrics_label: str = "bridge"
+    idle_timeout: float = 900.0
+    high_water: int = 1024 * 1024
+    low_water: int = 256 * 1024
+    max_message_bytes: int = 256 * 1024 * 1024
+    pool_size: int = 0
+    cache: bool = False
+    cache_methods: tuple[str, ...] = CACHE_DEFAULT_METHODS
+    cache_tools: tuple[str, ...] = ()
+    cache_ttl: float = 300.0
+    cache_max_entries: int = 256
+    cache_max_bytes: int = 16 * 1024 * 1024
+
+
+def percentile(values: list[float], pct: int) -> float:
+    """Nearest-rank percentile, same rule as runtime_stress_refresh.sh."""
+    ordered = sorted(values)
+    idx = max(0, (len(ordered) * pct + 99) // 100 - 1)
+    return ordered[idx]
+
+
+class BridgeMetrics:
+    """
+    Opt-in request/response accounting for the bridge.
+
+    Client requests seen on the framed->line path are matched by JSON-RPC id
+    to server responses on the line->framed path. Latencies, byte counts and
+    queue depths are aggregated per snapshot window and appended as TSV rows
+    (or JSON lines when the file ends in .jsonl).
+    """
+
+    def __init__(self, path: str, label: str) -> None:
+        self.path = path
+        self.label = label
+        self.client_bytes = 0
+        self.server_bytes = 0
+        self.server_queue = 0
+        self.client_queue = 0
+        self._pending: dict[object, tuple[str, float]] = {}
+        self._samples: dict[str, list[float]] = {}
+        self._failures: dict[str, int] = {}
+        self._window_start = time.monotonic()
+        self._writers: dict[str, _PipeWriter | _FileWriter] = {}
+        self._stall_marks: dict[str, float] = {}
+        self._cache: ResponseCache | None = None
+        self._cache_marks = (0, 0)
+
+    def track_writers(self, server: _PipeWriter | _FileWriter, client: _PipeWriter | _FileWriter | None) -> None:
+        self._writers = {"server": server, "client": client} if client is not None else {"server": server}
+        self._stall_marks = {"server": 0.0, "client": 0.0}
+
+    def track_cache(self, cache: ResponseCache | None) -> None:
+        self._cache = cache
+
+    @staticmethod
+    def _messages(payload: bytes | bytearray | memoryview) -> list[dict]:
+        try:
+            msg = json.loads(bytes(payload))
+        except ValueError:
+            return []
+        if isinstance(msg, list):
+            return [m for m in msg if isinstance(m, dict)]
+        return [msg] if isinstance(msg, dict) else []
+
+    @staticmethod
+    def _key(msg_id: object) -> object:
+        return (type(msg_id).__name__, msg_id) if isinstance(msg_id, (str, int)) else None
+
+    def client_message(self, payload: memoryview) -> None:
+        now = time.monotonic()
+        for msg in self._messages(payload):
+            self.request(msg, now)
+
+    def server_message(self, payload: bytes | bytearray | memoryview) -> None:
+        now = time.monotonic()
+        for msg in self._messages(payload):
+            self.response(msg, now)
+
+    def request(self, msg: dict, now: float) -> None:
+        key = self._key(msg.get("id"))
+        if key is not None and isinstance(msg.get("method"), str):
+            self._pending[key] = (msg["method"], now)
+
+    def response(self, msg: dict, now: float) -> None:
+        if "method" in msg:
+            return
+        pending = self._pending.pop(self._key(msg.get("id")), None)
+        if pending is None:
+            return
+        method, started = pending
+        samples = self._samples.setdefault(method, [])
+        if len(samples) < METRICS_WINDOW_MAX:
+            samples.append((now - started) * 1000.0)
+        if "error" in msg:
+            self._failures[method] = self._failures.get(method, 0) + 1
+
+    def discard(self, msg_id: object) -> None:
+        """Forget a request whose response will never be seen (its client went away)."""
+        self._pending.pop(self._key(msg_id), None)
+
+    def observe_queues(self, server_queue: int, client_queue: int) -> None:
+        self.server_queue = max(self.server_queue, server_queue)
+        self.client_queue = max(self.client_queue, client_queue)
+
+    def _rows(self) -> list[dict]:
+        now = time.monotonic()
+        elapsed = max(now - self._window_start, 1e-9)
+        shared = {
+            "client_to_server_bps": f"{self.client_bytes / elapsed:.1f}",
+            "server_to_client_bps": f"{self.server_bytes / elapsed:.1f}",
+            "inflight": len(self._pending),
+            "server_queue_bytes": self.server_queue,
+            "client_queue_bytes": self.client_queue,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        for side in ("server", "client"):
+            writer = self._writers.get(side)
+            total = writer.stall_seconds if writer is not None else 0.0
+            shared[f"{side}_stall_ms"] = f"{(total - self._stall_marks.get(side, 0.0)) * 1000.0:.1f}"
+            self._stall_marks[side] = total
+        if self._cache is not None:
+            hits, misses = self._cache.hits, self._cache.misses
+            shared["cache_hits"] = hits - self._cache_marks[0]
+            shared["cache_misses"] = misses - self._cache_marks[1]
+            shared["cache_entries"] = len(self._cache)
+            self._cache_marks = (hits, misses)
+        else:
+            shared.update({"cache_hits": "NA", "cache_misses": "NA", "cache_entries": "NA"})
+        groups = {"all": [v for values in self._samples.values() for v in values]}
+        groups.update(sorted(self._samples.items()))
+        rows = []
+        for method, values in groups.items():
+            fail = sum(self._failures.values()) if method == "all" else self._failures.get(method, 0)
+            row: dict = {"target": self.label, "test": f"rtt:{method}", "runs": len(values)}
+            row["ok"] = len(values) - fail
+            row["fail"] = fail
+            if values:
+                row["avg_ms"] = f"{sum(values) / len(values):.3f}"
+                for pct in (50, 95, 99):
+                    row[f"p{pct}_ms"] = f"{percentile(values, pct):.3f}"
+                row["max_ms"] = f"{max(values):.3f}"
+            else:
+                row.update({k: "NA" for k in ("avg_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")})
+            row.update(shared)
+            rows.append(row)
+
+        self.client_bytes = self.server_bytes = 0
+        self.server_queue = self.client_queue = 0
+        self._samples.clear()
+        self._failures.clear()
+        self._window_start = now
+        return rows
+
+    def snapshot(self) -> None:
+        rows = self._rows()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                if self.path.endswith(".jsonl"):
+                    for row in rows:
+                        fh.write(json.dumps(row, separators=(",", ":")) + "\n")
+                    return
+                if new_file:
+                    fh.write("\t".join(METRICS_COLUMNS) + "\n")
+                for row in rows:
+                    fh.write("\t".join(str(row[c]) for c in METRICS_COLUMNS) + "\n")
+        except OSError as exc:
+            print(f"mcp-bridge: metrics write failed: {exc}", file=sys.stderr)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.snapshot()
+
+
+class ResponseCache:
+    """
+    LRU cache of server results for idempotent requests.
+
+    Keys are the method plus a hash of the canonicalized params (without
+    _meta, which carries per-request progress tokens). Only allowlisted
+    methods, and tools/call for allowlisted tool names, are cached; errors and
+    isError tool results never are. notifications/<kind>/list_changed drops
+    every <kind>/* entry, notifications/resources/updated drops resources/read.
+    Entries expire after ttl seconds (never when ttl <= 0) and the least
+    recently used are evicted past max_entries or max_bytes.
+    """
+
+    def __init__(
+        self,
+        methods: Sequence[str],
+        tools: Sequence[str],
+        ttl: float,
+        max_entries: int,
+        max_bytes: int,
+    ) -> None:
+        self.methods = frozenset(methods) | ({"tools/call"} if tools else frozenset())
+        self.tools = frozenset(tools)
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        # request id -> cache key, for cacheable requests forwarded to the server
+        self._pending: dict[object, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key_for(self, msg: dict) -> str | None:
+        method = msg.get("method")
+        if method not in self.methods or "id" not in msg:
             return None
-        if line in (b"\n", b"\r\n"):
-            break
-        decoded = line.decode("utf-8", errors="replace").strip()
-        if not decoded:
-            break
-        if ":" in decoded:
-            key, value = decoded.split(":", 1)
-            headers[key.strip().lower()] = value.strip()
-
-    content_length = headers.get("content-length")
-    if content_length is None:
-        return None
+        params = msg.get("params")
+        if not isinstance(params, dict):
+            params = {}
+        if method == "tools/call" and params.get("name") not in self.tools:
+            return None
+        params = {k: v for k, v in params.items() if k != "_meta"}
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return f"{method}\0{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
 
-    try:
-        length = int(content_length)
-    except ValueError:
+    def lookup(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl <= 0 or entry[0] > time.monotonic()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            self._discard(key)
+        self.misses += 1
         return None
 
-    payload = stream.read(length)
-    if len(payload) != length:
-        return None
-    return payload
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
 
+    def store(self, key: str, result: bytes) -> None:
+        if len(result) > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._bytes += len(result)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
 
-def _write_framed_message(stream: BinaryIO, payload: bytes) -> None:
-    header = f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii")
-    stream.write(header)
-    stream.write(payload)
-    stream.flush()
+    def invalidate(self, notification: str) -> None:
+        if notification == "notifications/resources/updated":
+            prefixes: tuple[str, ...] = ("resources/read\0",)
+        elif notification.startswith("notifications/") and notification.endswith("/list_changed"):
+            prefixes = (notification[len("notifications/"): -len("list_changed")],)
+        else:
+            return
+        for key in [k for k in self._entries if k.startswith(prefixes)]:
+            self._discard(key)
 
+    @staticmethod
+    def response(msg_id: object, result: bytes) -> bytes:
+        return b'{"jsonrpc":"2.0","id":%s,"result":%s}' % (_encode(msg_id), result)
 
-def _framed_to_lines(child: subprocess.Popen[bytes]) -> None:
-    while True:
-        payload = _read_framed_message(sys.stdin.buffer)
-        if payload is None:
-            try:
-                child.stdin.close()  # type: ignore[union-attr]
-            except Exception:
-                pass
+    @staticmethod
+    def cacheable_result(msg: dict) -> bytes | None:
+        result = msg.get("result")
+        if "error" in msg or result is None or (isinstance(result, dict) and result.get("isError")):
+            return None
+        return _encode(result)
+
+    # Single-session hooks for the framed<->line pumps. Payloads larger than
+    # INLINE_FRAME_MAX are never cacheable requests and are not inspected.
+
+    def client_request(self, payload: memoryview) -> bytes | None:
+        """Return a ready response payload on a hit; remember the id on a cacheable miss."""
+        if len(payload) > INLINE_FRAME_MAX:
+            return None
+        try:
+            msg = json.loads(bytes(payload))
+        except ValueError:
+            return None
+        if not isinstance(msg, dict) or (key := self.key_for(msg)) is None:
+            return None
+        cached = self.lookup(key)
+        if cached is not None:
+            return self.response(msg["id"], cached)
+        self._pending[BridgeMetrics._key(msg["id"])] = key
+        return None
+
+    def server_message(self, line: bytes | bytearray | memoryview) -> None:
+        if len(line) > self.max_bytes + INLINE_FRAME_MAX:
+            return
+        data = bytes(line)
+        if not self._pending and b"list_changed" not in data and b"resources/updated" not in data:
+            return
+        try:
+            msg = json.loads(data)
+        except ValueError:
             return
+        if not isinstance(msg, dict):
+            return
+        method = msg.get("method")
+        if isinstance(method, str):
+            if "id" not in msg:
+                self.invalidate(method)
+            return
+        key = self._pending.pop(BridgeMetrics._key(msg.get("id")), None)
+        if key is not None and (result := self.cacheable_result(msg)) is not None:
+            self.store(key, result)
+
+
+class FrameError(ValueError):
+    """Raised when the client sends a frame header without a usable (non-negative) Content-Length."""
+
+
+class FrameParser:
+    """
+    Incremental Content-Length frame parser.
+
+    Chunks are parsed in place when they hold whole frames; only a trailing
+    partial frame is copied into the reusable buffer. Payloads are yielded as
+    memoryviews that stay valid until the generator is resumed.
+    """
+
+    def __init__(self, max_frame: int = 0) -> None:
+        self._buf = bytearray()
+        self._max_frame = max_frame
 
+    @staticmethod
+    def _parse_header(data: bytes | bytearray, pos: int) -> tuple[int, int]:
+        """Return (payload_start, length), or (-1, -1) if the header is incomplete."""
+        # Fast path: the canonical single "Content-Length: N\r\n\r\n" header.
+        if data.startswith(b"Content-Length:", pos):
+            nl = data.find(b"\r\n", pos)
+            if nl > 0 and data.startswith(b"\r\n\r\n", nl):
+                try:
+                    length = int(data[pos + 15: nl])
+                except ValueError:
+                    pass
+                else:
+                    if length < 0:
+                        raise FrameError(f"negative Content-Length: {length}")
+                    return nl + 4, length
+        length = -1
+        while True:
+            nl = data.find(b"\n", pos)
+            if nl < 0:
+                return -1, -1
+            if nl == pos or (nl == pos + 1 and data[pos] == 0x0D):
+                if length < 0:
+                    raise FrameError("frame header without Content-Length")
+                return nl + 1, length
+            colon = data.find(b":", pos, nl)
+            if colon > 0 and data[pos:colon].strip().lower() == b"content-length":
+                try:
+                    length = int(data[colon + 1: nl])
+                except ValueError as exc:
+                    raise FrameError(f"invalid Content-Length: {bytes(data[colon + 1: nl])!r}") from exc
+                if length < 0:
+                    raise FrameError(f"negative Content-Length: {length}")
+            pos = nl + 1
+
+    def feed(self, data: bytes) -> Iterator[memoryview]:
+        source: bytes | bytearray = data
+        if self._buf:
+            self._buf += data
+            source = self._buf
+        view = memoryview(source)
+        pos = 0
         try:
-            child.stdin.write(payload + b"\n")  # type: ignore[union-attr]
-            child.stdin.flush()  # type: ignore[union-attr]
-        except Exception:
+            while True:
+                start, length = self._parse_header(source, pos)
+                if start < 0:
+                    break
+                if self._max_frame and length > self._max_frame:
+                    raise FrameError(f"frame of {length} bytes exceeds the {self._max_frame} byte limit")
+                if start + length > len(source):
+                    break
+                payload = view[start: start + length]
+                try:
+                    yield payload
+                finally:
+                    payload.release()
+                pos = start + length
+        finally:
+            view.release()
+            if source is self._buf:
+                del self._buf[:pos]
+            elif pos < len(data):
+                self._buf += memoryview(data)[pos:]
+
+
+class LineSplitter:
+    """
+    Splits a byte stream into newline-terminated lines, carrying partial lines over.
+
+    A line that grows past max_line bytes is dropped (up to its newline) rather
+    than buffered without bound.
+    """
+
+    def __init__(self, max_line: int = 0) -> None:
+        self._partial = bytearray()
+        self._max_line = max_line
+        self._discarding = False
+
+    def feed(self, data: bytes) -> list[bytearray | memoryview]:
+        view = memoryview(data)
+        lines: list[bytearray | memoryview] = []
+        pos = 0
+        while (nl := data.find(b"\n", pos)) >= 0:
+            if self._discarding:
+                self._discarding = False
+            elif self._partial:
+                self._partial += view[pos:nl]
+                # Hand the buffer over instead of copying; a fresh one collects the next line.
+                line, self._partial = self._partial, bytearray()
+                lines.append(line)
+            else:
+                lines.append(view[pos:nl])
+            pos = nl + 1
+        if pos < len(data) and not self._discarding:
+            self._partial += view[pos:]
+            if self._max_line and len(self._partial) > self._max_line:
+                print(f"mcp-bridge: dropping server line longer than {self._max_line} bytes", file=sys.stderr)
+                self._partial = bytearray()
+                self._discarding = True
+        return lines
+
+    def finish(self) -> list[bytearray | memoryview]:
+        if not self._partial:
+            return []
+        line, self._partial = self._partial, bytearray()
+        return [line]
+
+
+def trim(line: bytearray | memoryview) -> bytearray | memoryview:
+    start, end = 0, len(line)
+    while start < end and line[start] in WHITESPACE:
+        start += 1
+    while end > start and line[end - 1] in WHITESPACE:
+        end -= 1
+    if start == 0 and end == len(line):
+        return line
+    return memoryview(line)[start:end]
+
+
+class LineFramer:
+    """
+    Splits child stdout chunks into lines and frames them for the client.
+
+    Small frames are packed into one contiguous batch buffer; large lines are
+    queued as separate parts so they reach writev() without another copy.
+    """
+
+    def __init__(
+        self,
+        on_frame: Callable[[bytearray | memoryview], None] | None = None,
+        max_line: int = 0,
+    ) -> None:
+        self._on_frame = on_frame
+        self._lines = LineSplitter(max_line)
+        self._batch = bytearray()
+        self._parts: list[bytes | bytearray | memoryview] = []
+        self.pending = 0
+
+    def _add(self, line: bytearray | memoryview) -> None:
+        payload = trim(line)
+        size = len(payload)
+        if not size:
             return
+        if self._on_frame is not None:
+            self._on_frame(payload)
+        header = b"Content-Length: %d\r\n\r\n" % size
+        self._batch += header
+        if size < INLINE_FRAME_MAX:
+            self._batch += payload
+        else:
+            self._parts.append(self._batch)
+            self._parts.append(payload)
+            self._batch = bytearray()
+        self.pending += len(header) + size
 
+    def feed(self, data: bytes) -> None:
+        for line in self._lines.feed(data):
+            self._add(line)
 
-def _lines_to_framed(child: subprocess.Popen[bytes]) -> None:
-    while True:
-        line = child.stdout.readline()  # type: ignore[union-attr]
-        if line == b"":
+    def finish(self) -> None:
+        for line in self._lines.finish():
+            self._add(line)
+
+    def take(self) -> list[bytes | bytearray | memoryview]:
+        parts = self._parts
+        if self._batch:
+            parts.append(self._batch)
+        self._parts = []
+        self._batch = bytearray()
+        self.pending = 0
+        return parts
+
+
+class _FileWriter:
+    """Writer for stdio that is a regular file or tty, not a pipe."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self.stalls = 0
+        self.stall_seconds = 0.0
+
+    def writev(self, parts: Sequence[bytes | memoryview]) -> None:
+        for part in parts:
+            self._stream.write(part)
+
+    def buffered(self) -> int:
+        return 0
+
+    async def drain(self) -> None:
+        self._stream.flush()
+
+    def close(self) -> None:
+        self._stream.flush()
+
+
+class _PipeWriter:
+    """
+    StreamWriter wrapper with vectored writes and bounded buffering.
+
+    While the transport has nothing queued, parts go straight to the fd with a
+    single writev(); only the unsent tail is handed to the transport buffer.
+    Once more than high_water bytes are queued, drain() blocks until the
+    buffer falls to low_water, which stops the caller reading its producer.
+    Stalls are counted and timed.
+    """
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        name: str = "",
+        high_water: int = 0,
+        low_water: int = 0,
+    ) -> None:
+        self._writer = writer
+        self._transport = writer.transport
+        pipe = writer.get_extra_info("pipe")
+        self._fd = pipe.fileno() if pipe is not None else -1
+        self.name = name or "writer"
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        if high_water:
+            self._transport.set_write_buffer_limits(high=high_water, low=min(low_water, high_water))
+        self._high_water = self._transport.get_write_buffer_limits()[1]
+
+    def writev(self, parts: Sequence[bytes | memoryview]) -> None:
+        if self._fd < 0 or self._transport.is_closing() or self._transport.get_write_buffer_size():
+            for part in parts:
+                self._writer.write(part)
+            return
+        try:
+            sent = os.writev(self._fd, parts)
+        except BlockingIOError:
+            sent = 0
+        for part in parts:
+            size = len(part)
+            if sent >= size:
+                sent -= size
+                continue
+            self._writer.write(part[sent:] if sent else part)
+            sent = 0
+
+    def buffered(self) -> int:
+        return self._transport.get_write_buffer_size()
+
+    async def drain(self) -> None:
+        queued = self._transport.get_write_buffer_size()
+        if queued <= self._high_water:
+            await self._writer.drain()
             return
-        payload = line.strip()
-        if not payload:
-            continue
-        _write_framed_message(sys.stdout.buffer, payload)
+        started = time.monotonic()
+        self.stalls += 1
+        waiter = asyncio.ensure_future(self._writer.drain())
+        done, _ = await asyncio.wait({waiter}, timeout=STALL_LOG_AFTER)
+        if not done:
+            print(
+                f"mcp-bridge: {self.name} stalled with {queued} bytes queued; pausing reads from its producer",
+                file=sys.stderr,
+            )
+        try:
+            await waiter
+        finally:
+            elapsed = time.monotonic() - started
+            self.stall_seconds += elapsed
+            if not done:
+                print(
+                    f"mcp-bridge: {self.name} resumed after {elapsed * 1000.0:.0f} ms "
+                    f"({self.stalls} stalls, {self.stall_seconds:.1f} s stalled in total)",
+                    file=sys.stderr,
+                )
 
+    def close(self) -> None:
+        self._writer.close()
 
-def _stderr_passthrough(child: subprocess.Popen[bytes]) -> None:
+
+def _is_selectable(stream: BinaryIO) -> bool:
+    try:
+        mode = os.fstat(stream.fileno()).st_mode
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+async def _open_reader(stream: BinaryIO, limit: int) -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    if _is_selectable(stream):
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stream)
+        return reader
+
+    # Files, ttys and /dev/null cannot be polled; pump them from a daemon thread.
+    # Read the raw fd so the thread never holds the BufferedReader lock at exit.
+    fd = stream.fileno()
+
+    def _pump() -> None:
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except (OSError, ValueError):
+                chunk = b""
+            if not chunk:
+                loop.call_soon_threadsafe(reader.feed_eof)
+                return
+            loop.call_soon_threadsafe(reader.feed_data, chunk)
+
+    threading.Thread(target=_pump, daemon=True).start()
+    return reader
+
+
+async def _open_writer(stream: BinaryIO, config: BridgeConfig) -> _PipeWriter | _FileWriter:
+    if not _is_selectable(stream):
+        return _FileWriter(stream)
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, stream)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    return _PipeWriter(writer, "client stdout", config.high_water, config.low_water)
+
+
+def _reader_limit(config: BridgeConfig) -> int:
+    # StreamReader pauses its transport above 2 * limit and resumes at <= limit.
+    return max(config.low_water, config.high_water // 2, 1)
+
+
+async def _framed_to_lines(
+    client_in: asyncio.StreamReader,
+    child_in: _PipeWriter,
+    config: BridgeConfig,
+    metrics: BridgeMetrics | None,
+    cache: ResponseCache | None = None,
+    client_out: _PipeWriter | _FileWriter | None = None,
+) -> None:
+    parser = FrameParser(config.max_message_bytes)
+    try:
+        while True:
+            chunk = await client_in.read(READ_CHUNK)
+            if not chunk:
+                return
+            answered = False
+            for payload in parser.feed(chunk):
+                if cache is not None and client_out is not None:
+                    cached = cache.client_request(payload)
+                    if cached is not None:
+                        client_out.writev((b"Content-Length: %d\r\n\r\n" % len(cached), cached))
+                        answered = True
+                        continue
+                if metrics is not None:
+                    metrics.client_message(payload)
+                child_in.writev((payload, NEWLINE))
+            if metrics is not None:
+                metrics.client_bytes += len(chunk)
+                metrics.observe_queues(child_in.buffered(), 0)
+            await child_in.drain()
+            if answered and client_out is not None:
+                await client_out.drain()
+    except FrameError as exc:
+        print(f"mcp-bridge: {exc}; closing server stdin", file=sys.stderr)
+        return
+    except (BrokenPipeError, ConnectionResetError):
+        return
+    finally:
+        try:
+            child_in.close()
+        except Exception:
+            pass
+
+
+async def _lines_to_framed(
+    child: asyncio.subprocess.Process,
+    client_out: _PipeWriter | _FileWriter,
+    config: BridgeConfig,
+    metrics: BridgeMetrics | None,
+    cache: ResponseCache | None = None,
+) -> None:
+    """
+    Forward child lines as frames, one write per burst.
+
+    Each read returns everything already buffered from the child pipe. With a
+    non-zero max_batch_delay the first pending frame may wait up to that long
+    for more lines before the batch is flushed.
+    """
+    loop = asyncio.get_running_loop()
+    child_out = child.stdout
+    assert child_out is not None
+    hooks = [hook.server_message for hook in (metrics, cache) if hook is not None]
+    on_frame = hooks[0] if len(hooks) == 1 else _chain(hooks) if hooks else None
+    framer = LineFramer(on_frame, config.max_message_bytes)
+    eof = False
+    try:
+        while not eof:
+            chunk = await child_out.read(READ_CHUNK)
+            if not chunk:
+                eof = True
+                framer.finish()
+            else:
+                framer.feed(chunk)
+                if metrics is not None:
+                    metrics.server_bytes += len(chunk)
+            if config.max_batch_delay > 0 and 0 < framer.pending < config.max_batch_bytes and not eof:
+                deadline = loop.time() + config.max_batch_delay
+                while framer.pending < config.max_batch_bytes:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(child_out.read(READ_CHUNK), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if not chunk:
+                        eof = True
+                        framer.finish()
+                        break
+                    framer.feed(chunk)
+                    if metrics is not None:
+                        metrics.server_bytes += len(chunk)
+            if framer.pending:
+                client_out.writev(framer.take())
+                if metrics is not None:
+                    metrics.observe_queues(0, client_out.buffered())
+                await client_out.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        return
+
+
+def _chain(hooks: list[Callable[[bytearray | memoryview], None]]) -> Callable[[bytearray | memoryview], None]:
+    def _call(line: bytearray | memoryview) -> None:
+        for hook in hooks:
+            hook(line)
+
+    return _call
+
+
+def _log_cache(cache: ResponseCache) -> None:
+    print(
+        f"mcp-bridge: cache {cache.hits} hits, {cache.misses} misses, {cache.evictions} evictions, {len(cache)} entries",
+        file=sys.stderr,
+    )
+
+
+def _make_metrics(config: BridgeConfig) -> BridgeMetrics | None:
+    return BridgeMetrics(config.metrics_file, config.metrics_label) if config.metrics_file else None
+
+
+def _make_cache(config: BridgeConfig) -> ResponseCache | None:
+    if not config.cache:
+        return None
+    return ResponseCache(
+        config.cache_methods, config.cache_tools, config.cache_ttl, config.cache_max_entries, config.cache_max_bytes
+    )
+
+
+async def _stderr_passthrough(child: asyncio.subprocess.Process) -> None:
+    child_err = child.stderr
+    assert child_err is not None
     while True:
-        chunk = child.stderr.read(4096)  # type: ignore[union-attr]
+        chunk = await child_err.read(STDERR_CHUNK)
         if not chunk:
             return
         sys.stderr.buffer.write(chunk)
         sys.stderr.buffer.flush()
 
 
+async def _run(command: list[str], config: BridgeConfig) -> int:
+    loop = asyncio.get_running_loop()
+    child = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=os.environ.copy(),
+        limit=_reader_limit(config),
+    )
+
+    def _terminate() -> None:
+        try:
+            child.terminate()
+        except ProcessLookupError:
+            pass
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, _terminate)
+
+    client_in = await _open_reader(sys.stdin.buffer, _reader_limit(config))
+    client_out = await _open_writer(sys.stdout.buffer, config)
+    assert child.stdin is not None
+    child_in = _PipeWriter(child.stdin, "server stdin", config.high_water, config.low_water)
+
+    cache = _make_cache(config)
+    metrics = _make_metrics(config)
+    if metrics is not None:
+        metrics.track_writers(child_in, client_out)
+        metrics.track_cache(cache)
+    t_metrics = asyncio.create_task(metrics.run(config.metrics_interval)) if metrics is not None else None
+
+    t_in = asyncio.create_task(_framed_to_lines(client_in, child_in, config, metrics, cache, client_out))
+    t_out = asyncio.create_task(_lines_to_framed(child, client_out, config, metrics, cache))
+    t_err = asyncio.create_task(_stderr_passthrough(child))
+
+    code = await child.wait()
+    await asyncio.wait({t_out, t_err}, timeout=1)
+    for task in (t_in, t_out, t_err):
+        task.cancel()
+    if metrics is not None and t_metrics is not None:
+        t_metrics.cancel()
+        metrics.snapshot()
+    if cache is not None:
+        _log_cache(cache)
+    try:
+        client_out.close()
+    except Exception:
+        pass
+    return code
+
+
+def _encode(msg: dict) -> bytes:
+    return json.dumps(msg, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _frame_parts(msg: dict) -> tuple[bytes, bytes]:
+    payload = _encode(msg)
+    return b"Content-Length: %d\r\n\r\n" % len(payload), payload
+
+
+def runtime_dir() -> pathlib.Path:
+    base = os.environ.get("MCP_BRIDGE_RUNTIME_DIR") or os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    path = pathlib.Path(base) / f"mcp-bridge-{os.getuid()}"
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return path
+
+
+def socket_path_for(command: list[str]) -> pathlib.Path:
+    """One daemon per distinct server command line (which carries --project-root)."""
+    digest = hashlib.sha256("\0".join(command).encode("utf-8")).hexdigest()[:16]
+    return runtime_dir() / f"{digest}.sock"
+
+
+def pool_socket_path_for(command: list[str]) -> pathlib.Path:
+    """One pool per command line, working directory and environment, since warm children inherit all three."""
+    digest = hashlib.sha256("\0".join(command).encode("utf-8"))
+    digest.update(b"\0\0" + os.getcwd().encode("utf-8"))
+    for key, value in sorted(os.environ.items()):
+        if key not in POOL_ENV_IGNORE:
+            digest.update(f"\0{key}={value}".encode("utf-8", errors="surrogateescape"))
+    return runtime_dir() / f"pool-{digest.hexdigest()[:16]}.sock"
+
+
+class _MuxClient:
+    def __init__(self, cid: int, writer: asyncio.StreamWriter, config: BridgeConfig) -> None:
+        self.cid = cid
+        self.writer = _PipeWriter(writer, f"client {cid}", config.high_water, config.low_water)
+        # daemon id -> client's original id, for requests still waiting on the server
+        self.inflight: dict[int, object] = {}
+
+    def send(self, msg: dict) -> None:
+        self.writer.writev(_frame_parts(msg))
+
+
+class MuxDaemon:
+    """
+    Shares one long-lived line-JSON server between many framed clients.
+
+    Client request ids (and progress tokens) are rewritten to daemon-unique
+    values and mapped back on the way out. The first initialize goes to the
+    server; its result is cached and replayed to every later client, and
+    only the first notifications/initialized is forwarded.
+    """
+
+    def __init__(self, command: list[str], socket_path: pathlib.Path, config: BridgeConfig) -> None:
+        self.command = command
+        self.socket_path = socket_path
+        self.config = config
+        self.idle_timeout = config.idle_timeout
+        self._clients: dict[int, _MuxClient] = {}
+        self._client_ids = itertools.count(1)
+        self._request_ids = itertools.count(1)
+        # daemon request id -> (client, client's request id, rewritten progress token)
+        self._routes: dict[int, tuple[_MuxClient, object, str | None]] = {}
+        self._progress: dict[str, tuple[_MuxClient, object]] = {}
+        self._init_id: int | None = None
+        self._init_result: object = None
+        self._init_waiters: list[tuple[_MuxClient, object]] = []
+        self._initialized_sent = False
+        self._last_client: _MuxClient | None = None
+        self._child_in: _PipeWriter | None = None
+        self._idle_since: float | None = time.monotonic()
+        # Shared by every attached client, so one session's tools/list warms the rest.
+        self._cache = _make_cache(config)
+        self._cache_keys: dict[int, str] = {}
+        # One set of snapshots for the daemon, keyed on daemon request ids; cache hits never reach the server.
+        self._metrics = _make_metrics(config)
+        if self._metrics is not None:
+            self._metrics.track_cache(self._cache)
+
+    def _to_server(self, msg: dict) -> None:
+        assert self._child_in is not None
+        self._child_in.writev((_encode(msg), NEWLINE))
+
+    def _from_client(self, client: _MuxClient, msg: dict) -> None:
+        method = msg.get("method")
+        if method is None:
+            # Response to a server-initiated request; server ids are passed through unchanged.
+            self._to_server(msg)
+            return
+        if "id" not in msg:
+            if method == "notifications/initialized":
+                if self._initialized_sent:
+                    return
+                self._initialized_sent = True
+            elif method == "notifications/cancelled":
+                params = msg.get("params") or {}
+                for new_id, orig in client.inflight.items():
+                    if orig == params.get("requestId"):
+                        msg = {**msg, "params": {**params, "requestId": new_id}}
+                        break
+                else:
+                    return
+            self._to_server(msg)
+            return
+
+        if method == "initialize":
+            if self._init_result is not None:
+                client.send({"jsonrpc": "2.0", "id": msg["id"], "result": self._init_result})
+                return
+            if self._init_id is not None:
+                self._init_waiters.append((client, msg["id"]))
+                return
+
+        cache_key = self._cache.key_for(msg) if self._cache is not None else None
+        if cache_key is not None:
+            assert self._cache is not None
+            cached = self._cache.lookup(cache_key)
+            if cached is not None:
+                payload = self._cache.response(msg["id"], cached)
+                client.writer.writev((b"Content-Length: %d\r\n\r\n" % len(payload), payload))
+                return
+
+        new_id = next(self._request_ids)
+        if cache_key is not None:
+            self._cache_keys[new_id] = cache_key
+        token = None
+        params = msg.get("params")
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        if isinstance(meta, dict) and "progressToken" in meta:
+            token = f"mux-{client.cid}-{new_id}"
+            self._progress[token] = (client, meta["progressToken"])
+            msg = {**msg, "params": {**params, "_meta": {**meta, "progressToken": token}}}
+        self._routes[new_id] = (client, msg["id"], token)
+        client.inflight[new_id] = msg["id"]
+        if method == "initialize":
+            self._init_id = new_id
+        msg = {**msg, "id": new_id}
+        if self._metrics is not None:
+            self._metrics.request(msg, time.monotonic())
+        self._to_server(msg)
+
+    def _from_server(self, msg: dict) -> None:
+        method = msg.get("method")
+        if method is None:
+            route = self._routes.pop(msg.get("id"), None) if isinstance(msg.get("id"), int) else None
+            if route is None:
+                return
+            client, orig_id, token = route
+            client.inflight.pop(msg["id"], None)
+            if self._metrics is not None:
+                self._metrics.response(msg, time.monotonic())
+            cache_key = self._cache_keys.pop(msg["id"], None)
+            if cache_key is not None and self._cache is not None:
+                if (result := self._cache.cacheable_result(msg)) is not None:
+                    self._cache.store(cache_key, result)
+            if token is not None:
+                self._progress.pop(token, None)
+            if msg["id"] == self._init_id:
+                self._init_id = None
+                if "result" in msg:
+                    self._init_result = msg["result"]
+                # Waiters get the same outcome (cached result or the error) as the first client.
+                for waiter, waiter_id in self._init_waiters:
+                    if waiter.cid in self._clients:
+                        waiter.send({**msg, "id": waiter_id})
+                self._init_waiters.clear()
+            if client.cid in self._clients:
+                client.send({**msg, "id": orig_id})
+            return
+
+        if "id" in msg:
+            if method == "ping":
+                self._to_server({"jsonrpc": "2.0", "id": msg["id"], "result": {}})
+                return
+            target = self._last_client if self._last_client and self._last_client.cid in self._clients else None
+            if target is None:
+                self._to_server({"jsonrpc": "2.0", "id": msg["id"], "error": {"code": -32603, "message": "no client attached"}})
+                return
+            target.send(msg)
+            return
+
+        if self._cache is not None:
+            self._cache.invalidate(method)
+        if method == "notifications/progress":
+            params = msg.get("params") or {}
+            route = self._progress.get(str(params.get("progressToken")))
+            if route is not None and route[0].cid in self._clients:
+                route[0].send({**msg, "params": {**params, "progressToken": route[1]}})
+            return
+        for client in list(self._clients.values()):
+            client.send(msg)
+
+    def _drop_client(self, client: _MuxClient) -> None:
+        self._clients.pop(client.cid, None)
+        for new_id in list(client.inflight):
+            self._routes.pop(new_id, None)
+            self._cache_keys.pop(new_id, None)
+            if self._metrics is not None:
+                self._metrics.discard(new_id)
+            if new_id == self._init_id:
+                continue
+            self._to_server(
+                {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": new_id, "reason": "client disconnected"}}
+            )
+        self._progress = {t: r for t, r in self._progress.items() if r[0] is not client}
+        self._init_waiters = [w for w in self._init_waiters if w[0] is not client]
+        if not self._clients:
+            self._idle_since = time.monotonic()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _MuxClient(next(self._client_ids), writer, self.config)
+        self._clients[client.cid] = client
+        self._idle_since = None
+        parser = FrameParser(self.config.max_message_bytes)
+        try:
+            while chunk := await reader.read(READ_CHUNK):
+                self._last_client = client
+                if self._metrics is not None:
+                    self._metrics.client_bytes += len(chunk)
+                for payload in parser.feed(chunk):
+                    try:
+                        msg = json.loads(bytes(payload))
+                    except ValueError:
+                        continue
+                    for item in msg if isinstance(msg, list) else [msg]:
+                        if isinstance(item, dict):
+                            self._from_client(client, item)
+                assert self._child_in is not None
+                if self._metrics is not None:
+                    self._metrics.observe_queues(self._child_in.buffered(), 0)
+                await asyncio.gather(self._child_in.drain(), client.writer.drain())
+        except (FrameError, ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self._drop_client(client)
+            writer.close()
+
+    async def _pump_server(self, child: asyncio.subprocess.Process) -> None:
+        assert child.stdout is not None
+        lines = LineSplitter(self.config.max_message_bytes)
+        while chunk := await child.stdout.read(READ_CHUNK):
+            if self._metrics is not None:
+                self._metrics.server_bytes += len(chunk)
+            for line in lines.feed(chunk):
+                payload = trim(line)
+                if not payload:
+                    continue
+                try:
+                    msg = json.loads(bytes(payload))
+                except ValueError:
+                    continue
+                if isinstance(msg, dict):
+                    self._from_server(msg)
+            # A slow client pauses reads from the shared server until it drains to low water.
+            clients = list(self._clients.values())
+            if self._metrics is not None and clients:
+                self._metrics.observe_queues(0, max(c.writer.buffered() for c in clients))
+            results = await asyncio.gather(*(c.writer.drain() for c in clients), return_exceptions=True)
+            for client, result in zip(clients, results):
+                if isinstance(result, (ConnectionResetError, BrokenPipeError)):
+                    self._drop_client(client)
+
+    async def _idle_watch(self) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, self.idle_timeout))
+            if self._idle_since is not None and time.monotonic() - self._idle_since >= self.idle_timeout:
+                return
+
+    async def serve(self) -> int:
+        loop = asyncio.get_running_loop()
+        child = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=os.environ.copy(),
+            limit=_reader_limit(self.config),
+        )
+        assert child.stdin is not None
+        self._child_in = _PipeWriter(child.stdin, "server stdin", self.config.high_water, self.config.low_water)
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(
+            self._handle_client, path=str(self.socket_path), limit=_reader_limit(self.config)
+        )
+        os.chmod(self.socket_path, 0o600)
+        t_metrics = None
+        if self._metrics is not None:
+            self._metrics.track_writers(self._child_in, None)
+            t_metrics = asyncio.create_task(self._metrics.run(self.config.metrics_interval))
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        waiters = {
+            asyncio.create_task(child.wait()),
+            asyncio.create_task(self._pump_server(child)),
+            asyncio.create_task(self._idle_watch()),
+            asyncio.create_task(stop.wait()),
+        }
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+            for client in list(self._clients.values()):
+                client.writer.close()
+            if self._metrics is not None and t_metrics is not None:
+                t_metrics.cancel()
+                self._metrics.snapshot()
+            if self._cache is not None:
+                _log_cache(self._cache)
+            if child.returncode is None:
+                child.terminate()
+                try:
+                    await asyncio.wait_for(child.wait(), 5)
+                except asyncio.TimeoutError:
+                    child.kill()
+            for task in waiters:
+                task.cancel()
+        return child.returncode or 0
+
+
+class _WarmChild:
+    def __init__(self, proc: asyncio.subprocess.Process, init_result: object) -> None:
+        self.proc = proc
+        self.init_result = init_result
+
+
+class WarmPool:
+    """
+    Keeps pool_size spawned and initialized servers ready for new sessions.
+
+    Each session gets a dedicated child; nothing is shared once it is handed
+    out. The child was initialized by the pool, so the session's initialize is
+    answered from that cached result and its notifications/initialized is
+    dropped. A replacement starts warming as soon as a child is taken.
+    """
+
+    def __init__(self, command: list[str], socket_path: pathlib.Path, config: BridgeConfig) -> None:
+        self.command = command
+        self.socket_path = socket_path
+        self.config = config
+        self.idle_timeout = config.idle_timeout
+        self._ready: asyncio.Queue[_WarmChild] = asyncio.Queue()
+        self._warming = 0
+        self._children: set[asyncio.subprocess.Process] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._sessions = 0
+        self._idle_since: float | None = time.monotonic()
+
+    def _refill(self) -> None:
+        while self._ready.qsize() + self._warming < self.config.pool_size:
+            self._warming += 1
+            task = asyncio.create_task(self._warm())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self) -> None:
+        started = time.monotonic()
+        proc: asyncio.subprocess.Process | None = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                env=os.environ.copy(),
+                limit=_reader_limit(self.config),
+            )
+            self._children.add(proc)
+            init_result = await asyncio.wait_for(self._initialize(proc), POOL_WARM_TIMEOUT)
+        except (asyncio.TimeoutError, OSError, RuntimeError, ValueError) as exc:
+            print(f"mcp-bridge: pool warm-up failed: {exc or type(exc).__name__}", file=sys.stderr)
+            if proc is not None:
+                await self._reap(proc)
+            await asyncio.sleep(POOL_RETRY_DELAY)
+            self._warming -= 1
+            self._refill()
+            return
+        self._warming -= 1
+        print(f"mcp-bridge: pool child {proc.pid} ready in {(time.monotonic() - started) * 1000.0:.0f} ms", file=sys.stderr)
+        self._ready.put_nowait(_WarmChild(proc, init_result))
+
+    @staticmethod
+    async def _initialize(proc: asyncio.subprocess.Process) -> object:
+        assert proc.stdin is not None and proc.stdout is not None
+        params = {
+            "protocolVersion": POOL_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-bridge-pool", "version": "1"},
+        }
+        proc.stdin.write(_encode({"jsonrpc": "2.0", "id": "pool-init", "method": "initialize", "params": params}) + NEWLINE)
+        await proc.stdin.drain()
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"server exited with {await proc.wait()} before answering initialize")
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(msg, dict) and msg.get("id") == "pool-init":
+                break
+        if "result" not in msg:
+            raise RuntimeError(f"initialize failed: {msg.get('error')}")
+        proc.stdin.write(_encode({"jsonrpc": "2.0", "method": "notifications/initialized"}) + NEWLINE)
+        await proc.stdin.drain()
+        return msg["result"]
+
+    async def _reap(self, proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), 5)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+        self._children.discard(proc)
+
+    async def _take(self) -> _WarmChild:
+        while True:
+            if self._ready.empty():
+                self._refill()
+            warm = await self._ready.get()
+            self._refill()
+            if warm.proc.returncode is None:
+                return warm
+            self._children.discard(warm.proc)
+
+    async def _session_to_child(
+        self,
+        reader: asyncio.StreamReader,
+        child_in: _PipeWriter,
+        session_out: _PipeWriter,
+        warm: _WarmChild,
+        metrics: BridgeMetrics | None,
+    ) -> None:
+        parser = FrameParser(self.config.max_message_bytes)
+        handshake = True
+        try:
+            while chunk := await reader.read(READ_CHUNK):
+                if metrics is not None:
+                    metrics.client_bytes += len(chunk)
+                for payload in parser.feed(chunk):
+                    if handshake:
+                        try:
+                            msg = json.loads(bytes(payload))
+                        except ValueError:
+                            msg = None
+                        method = msg.get("method") if isinstance(msg, dict) else None
+                        if method == "initialize" and "id" in msg:
+                            session_out.writev(_frame_parts({"jsonrpc": "2.0", "id": msg["id"], "result": warm.init_result}))
+                            continue
+                        handshake = False
+                        if method == "notifications/initialized":
+                            continue
+                    if metrics is not None:
+                        metrics.client_message(payload)
+                    child_in.writev((payload, NEWLINE))
+                if metrics is not None:
+                    metrics.observe_queues(child_in.buffered(), 0)
+                await asyncio.gather(child_in.drain(), session_out.drain())
+        except (FrameError, ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            child_in.close()
+
+    async def _handle_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._sessions += 1
+        self._idle_since = None
+        session_out = _PipeWriter(writer, "session", self.config.high_water, self.config.low_water)
+        warm: _WarmChild | None = None
+        try:
+            try:
+                warm = await asyncio.wait_for(self._take(), POOL_WARM_TIMEOUT)
+            except asyncio.TimeoutError:
+                print("mcp-bridge: no pool child became ready; dropping session", file=sys.stderr)
+                return
+            assert warm.proc.stdin is not None
+            child_in = _PipeWriter(warm.proc.stdin, "server stdin", self.config.high_water, self.config.low_water)
+            # Sessions own their child, so each keeps its own snapshots, as without a pool.
+            metrics = _make_metrics(self.config)
+            if metrics is not None:
+                metrics.track_writers(child_in, session_out)
+            t_metrics = asyncio.create_task(metrics.run(self.config.metrics_interval)) if metrics is not None else None
+            t_in = asyncio.create_task(self._session_to_child(reader, child_in, session_out, warm, metrics))
+            t_out = asyncio.create_task(_lines_to_framed(warm.proc, session_out, self.config, metrics))
+            await asyncio.wait({t_in, t_out}, return_when=asyncio.FIRST_COMPLETED)
+            if t_in.done():
+                # Session closed: the server sees stdin EOF and gets a moment to flush and exit.
+                await asyncio.wait({t_out}, timeout=1)
+            for task in (t_in, t_out):
+                task.cancel()
+            if metrics is not None and t_metrics is not None:
+                t_metrics.cancel()
+                metrics.snapshot()
+        finally:
+            writer.close()
+            if warm is not None:
+                await self._reap(warm.proc)
+            self._sessions -= 1
+            if not self._sessions:
+                self._idle_since = time.monotonic()
+
+    async def _idle_watch(self) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, self.idle_timeout))
+            if self._idle_since is not None and time.monotonic() - self._idle_since >= self.idle_timeout:
+                return
+
+    async def serve(self) -> int:
+        loop = asyncio.get_running_loop()
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(
+            self._handle_session, path=str(self.socket_path), limit=_reader_limit(self.config)
+        )
+        os.chmod(self.socket_path, 0o600)
+        self._refill()
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        waiters = {asyncio.create_task(self._idle_watch()), asyncio.create_task(stop.wait())}
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+            for task in (*waiters, *self._tasks):
+                task.cancel()
+            await asyncio.gather(*(self._reap(proc) for proc in list(self._children)), return_exceptions=True)
+        return 0
+
+
+def _serve_args(config: BridgeConfig) -> list[str]:
+    """Options a spawned daemon or pool must share with the session that starts it."""
+    args = [
+        f"--idle-timeout={config.idle_timeout}",
+        f"--high-water-bytes={config.high_water}",
+        f"--low-water-bytes={config.low_water}",
+        f"--max-message-bytes={config.max_message_bytes}",
+        f"--pool={config.pool_size}",
+    ]
+    if config.cache:
+        args += [
+            "--cache",
+            f"--cache-methods={','.join(config.cache_methods)}",
+            f"--cache-tools={','.join(config.cache_tools)}",
+            f"--cache-ttl={config.cache_ttl}",
+            f"--cache-max-entries={config.cache_max_entries}",
+            f"--cache-max-bytes={config.cache_max_bytes}",
+        ]
+    if config.metrics_file:
+        args += [
+            f"--metrics-file={os.path.abspath(config.metrics_file)}",
+            f"--metrics-interval={config.metrics_interval}",
+            f"--metrics-label={config.metrics_label}",
+        ]
+    return args
+
+
+async def _connect_daemon(command: list[str], config: BridgeConfig) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to the shared daemon (or warm pool) for this command, starting it if nobody else has."""
+    path = pool_socket_path_for(command) if config.pool_size else socket_path_for(command)
+    limit = _reader_limit(config)
+    try:
+        return await asyncio.open_unix_connection(str(path), limit=limit)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+
+    lock_path = path.with_suffix(".lock")
+    with open(lock_path, "w") as lock:
+        # Serializes concurrent cold starts so only one session spawns the daemon.
+        await asyncio.get_running_loop().run_in_executor(None, fcntl.flock, lock, fcntl.LOCK_EX)
+        try:
+            return await asyncio.open_unix_connection(str(path), limit=limit)
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+        with open(path.with_suffix(".log"), "ab") as log:
+            subprocess.Popen(
+                [sys.executable, str(SCRIPT_PATH), "--serve", *_serve_args(config), "--", *command],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+                start_new_session=True,
+                env=os.environ.copy(),
+            )
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while True:
+            try:
+                return await asyncio.open_unix_connection(str(path), limit=limit)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"bridge daemon did not come up; see {path.with_suffix('.log')}") from None
+                await asyncio.sleep(0.05)
+
+
+async def _relay(reader: asyncio.StreamReader, writer: _PipeWriter | _FileWriter) -> None:
+    while chunk := await reader.read(READ_CHUNK):
+        writer.writev((chunk,))
+        await writer.drain()
+
+
+async def _run_shared(command: list[str], config: BridgeConfig) -> int:
+    """Session side of daemon and pool modes: relay framed stdio to the server socket unchanged."""
+    sock_reader, sock_writer = await _connect_daemon(command, config)
+    client_in = await _open_reader(sys.stdin.buffer, _reader_limit(config))
+    client_out = await _open_writer(sys.stdout.buffer, config)
+    upstream = _PipeWriter(sock_writer, "daemon socket", config.high_water, config.low_water)
+
+    t_up = asyncio.create_task(_relay(client_in, upstream))
+    t_down = asyncio.create_task(_relay(sock_reader, client_out))
+    try:
+        await asyncio.wait({t_up, t_down}, return_when=asyncio.FIRST_COMPLETED)
+        if t_up.done():
+            # Client closed stdin: stop sending, but deliver replies still in flight.
+            if sock_writer.can_write_eof():
+                sock_writer.write_eof()
+            await asyncio.wait({t_down}, timeout=1)
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        for task in (t_up, t_down):
+            task.cancel()
+        sock_writer.close()
+        client_out.close()
+    return 0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _csv(value: str) -> tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Bridge framed stdio MCP to line-jsonrpc MCP")
+    parser.add_argument(
+        "--max-batch-delay-ms",
+        type=float,
+        default=_env_float("MCP_BRIDGE_MAX_DELAY_MS", 0.0),
+        help="Max time a server->client frame may wait for more lines before flushing (env: MCP_BRIDGE_MAX_DELAY_MS)",
+    )
+    parser.add_argument(
+        "--max-batch-bytes",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_MAX_BATCH_BYTES", 1024 * 1024)),
+        help="Flush a server->client batch once it reaches this size (env: MCP_BRIDGE_MAX_BATCH_BYTES)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.environ.get("MCP_BRIDGE_METRICS_FILE", ""),
+        help="Enable latency/throughput instrumentation and append snapshots here; .jsonl for JSON lines, "
+        "otherwise TSV (env: MCP_BRIDGE_METRICS_FILE)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=_env_float("MCP_BRIDGE_METRICS_INTERVAL_SEC", 10.0),
+        help="Seconds between metrics snapshots (env: MCP_BRIDGE_METRICS_INTERVAL_SEC)",
+    )
+    parser.add_argument(
+        "--metrics-label",
+        default=os.environ.get("MCP_BRIDGE_METRICS_LABEL", ""),
+        help="Value for the metrics target column; defaults to the server command name (env: MCP_BRIDGE_METRICS_LABEL)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        default=os.environ.get("MCP_BRIDGE_DAEMON", "") == "1",
+        help="Share one warm server per command line through a Unix-socket daemon (env: MCP_BRIDGE_DAEMON=1)",
+    )
+    parser.add_argument(
+        "--pool",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_POOL_SIZE", 0)),
+        help="Hand each session a dedicated server from a pool of this many pre-spawned, initialized children; "
+        "ignored with --daemon (env: MCP_BRIDGE_POOL_SIZE)",
+    )
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=os.environ.get("MCP_BRIDGE_CACHE", "") == "1",
+        help="Answer repeated idempotent requests from an LRU cache (env: MCP_BRIDGE_CACHE=1)",
+    )
+    parser.add_argument(
+        "--cache-methods",
+        default=os.environ.get("MCP_BRIDGE_CACHE_METHODS", ",".join(CACHE_DEFAULT_METHODS)),
+        help="Comma-separated cacheable methods (env: MCP_BRIDGE_CACHE_METHODS)",
+    )
+    parser.add_argument(
+        "--cache-tools",
+        default=os.environ.get("MCP_BRIDGE_CACHE_TOOLS", ""),
+        help="Comma-separated read-only tool names whose tools/call results may be cached (env: MCP_BRIDGE_CACHE_TOOLS)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=_env_float("MCP_BRIDGE_CACHE_TTL_SEC", 300.0),
+        help="Seconds a cached result stays valid; 0 keeps it until invalidated (env: MCP_BRIDGE_CACHE_TTL_SEC)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_CACHE_MAX_ENTRIES", 256)),
+        help="LRU entry limit (env: MCP_BRIDGE_CACHE_MAX_ENTRIES)",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+        help="LRU size limit over cached result bytes (env: MCP_BRIDGE_CACHE_MAX_BYTES)",
+    )
+    parser.add_argument(
+        "--high-water-bytes",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_HIGH_WATER_BYTES", 1024 * 1024)),
+        help="Queued bytes per direction at which the bridge stops reading the producer (env: MCP_BRIDGE_HIGH_WATER_BYTES)",
+    )
+    parser.add_argument(
+        "--low-water-bytes",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_LOW_WATER_BYTES", 256 * 1024)),
+        help="Queued bytes at which reading resumes after a stall (env: MCP_BRIDGE_LOW_WATER_BYTES)",
+    )
+    parser.add_argument(
+        "--max-message-bytes",
+        type=int,
+        default=int(_env_float("MCP_BRIDGE_MAX_MESSAGE_BYTES", 256 * 1024 * 1024)),
+        help="Largest single message accepted in either direction; 0 disables (env: MCP_BRIDGE_MAX_MESSAGE_BYTES)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=_env_float("MCP_BRIDGE_IDLE_TIMEOUT_SEC", 900.0),
+        help="Daemon/pool mode: stop the shared server or pool after this many seconds without clients "
+        "(env: MCP_BRIDGE_IDLE_TIMEOUT_SEC)",
+    )
     parser.add_argument("command", nargs=argparse.REMAINDER, help="Command to execute")
     args = parser.parse_args()
 
@@ -107,37 +1697,38 @@ def main() -> int:
         print("No server command provided after --", file=sys.stderr)
         return 2
 
-    child = subprocess.Popen(
-        args.command,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        bufsize=0,
-        env=os.environ.copy(),
-    )
-
-    def _terminate(*_args: object) -> None:
-        try:
-            child.terminate()
-        except Exception:
-            pass
-
-    signal.signal(signal.SIGINT, _terminate)
-    signal.signal(signal.SIGTERM, _terminate)
-
-    t_in = threading.Thread(target=_framed_to_lines, args=(child,), daemon=True)
-    t_out = threading.Thread(target=_lines_to_framed, args=(child,), daemon=True)
-    t_err = threading.Thread(target=_stderr_passthrough, args=(child,), daemon=True)
-
-    t_in.start()
-    t_out.start()
-    t_err.start()
-
-    code = child.wait()
-    t_in.join(timeout=1)
-    t_out.join(timeout=1)
-    t_err.join(timeout=1)
-    return code
+    try:
+        config = BridgeConfig(
+            max_batch_delay=max(0.0, args.max_batch_delay_ms) / 1000.0,
+            max_batch_bytes=max(1, args.max_batch_bytes),
+            metrics_file=args.metrics_file,
+            metrics_interval=max(0.1, args.metrics_interval),
+            metrics_label=args.metrics_label or os.path.basename(args.command[0]),
+            idle_timeout=max(1.0, args.idle_timeout),
+            high_water=max(1, args.high_water_bytes),
+            low_water=max(0, min(args.low_water_bytes, args.high_water_bytes)),
+            max_message_bytes=max(0, args.max_message_bytes),
+            pool_size=0 if args.daemon else max(0, args.pool),
+            cache=args.cache,
+            cache_methods=_csv(args.cache_methods),
+            cache_tools=_csv(args.cache_tools),
+            cache_ttl=args.cache_ttl,
+            cache_max_entries=max(1, args.cache_max_entries),
+            cache_max_bytes=max(1, args.cache_max_bytes),
+        )
+        if args.serve and config.pool_size:
+            return asyncio.run(WarmPool(args.command, pool_socket_path_for(args.command), config).serve())
+        if args.serve:
+            return asyncio.run(MuxDaemon(args.command, socket_path_for(args.command), config).serve())
+        if args.daemon or config.pool_size:
+            return asyncio.run(_run_shared(args.command, config))
+        return asyncio.run(_run(args.command, config))
+    except FileNotFoundError as exc:
+        print(f"Failed to start server command: {exc}", file=sys.stderr)
+        return 127
+    except RuntimeError as exc:
+        print(f"mcp-bridge: {exc}", file=sys.stderr)
+        return 1
 
 
 if __name__ == "__main__":
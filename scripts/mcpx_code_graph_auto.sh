@@ -13,5 +13,9 @@ fi
 
 # code-graph-mcp currently speaks newline-delimited JSON-RPC over stdio.
 # Codex expects framed MCP stdio, so we bridge transports here.
+# Bridge metrics stay off unless MCP_BRIDGE_METRICS_FILE is set; MCP_BRIDGE_DAEMON=1
+# shares one warm server per project root across sessions, MCP_BRIDGE_POOL_SIZE=N keeps
+# N initialized servers ready so each session skips the uvx/interpreter startup.
+export MCP_BRIDGE_METRICS_LABEL="${MCP_BRIDGE_METRICS_LABEL:-code_graph_mcp}"
 exec python3 "$SCRIPT_DIR/mcp_stdio_line_bridge.py" -- \
   uvx --from code-graph-mcp code-graph-mcp --project-root "$ROOT"
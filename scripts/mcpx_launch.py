@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+"""
+Resolved-launch cache for the mcpx-qdrant / mcpx-lsp / mcpx-neo4j wrappers.
+
+The shell wrappers re-resolve everything on every start: `git rev-parse`,
+`.mcp-stack.env` parsed with a `tr` subshell per line, a marker `find`, and
+finally `uvx` (re-resolving the tool environment) or `go run` (re-linking
+neo4j-mcp). This launcher does the same resolution in-process once per
+workspace, caches the result and execs the final server binary directly.
+
+Launch entries are keyed on the server, working directory and the environment
+variables the wrapper reads, and stay valid while `.mcp-stack.env` keeps its
+mtime, no `.git` appears or disappears between the cwd and the workspace root,
+and (mcpx-lsp auto mode) workspace_scan reports the same markers. Tool
+environments (the uvx env behind `mcp-server-qdrant`, a `go install`ed
+neo4j-mcp) are cached by package and version. Everything is re-resolved after
+MCP_LAUNCH_CACHE_TTL_SEC (default 86400), with MCP_LAUNCH_REFRESH=1, or when
+the cached binary no longer execs.
+
+Secrets (QDRANT_API_KEY, NEO4J_PASSWORD) are never written to the cache: they
+are left out of entries and keys, and re-read from the environment and
+`.mcp-stack.env` at exec time. The cache file itself is created 0600.
+
+Shell usage (runs on every server start, so it only imports os/marshal/sys/time
+and workspace_scan unless something has to be resolved):
+  mcpx_launch.py qdrant|lsp|neo4j [server args...]
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+import sys
+import time
+
+import workspace_scan
+
+CACHE_VERSION = 2
+CACHE_MAX_ENTRIES = 256
+DEFAULT_TTL_SEC = 86400
+USAGE = "usage: mcpx_launch.py qdrant|lsp|neo4j [server args...]"
+
+QDRANT_KEYS = (
+    "MCP_QDRANT_COLLECTION_MODE",
+    "MCP_QDRANT_COLLECTION",
+    "QDRANT_URL",
+    "QDRANT_API_KEY",
+    "QDRANT_LOCAL_PATH",
+    "EMBEDDING_PROVIDER",
+    "EMBEDDING_MODEL",
+    "TOOL_STORE_DESCRIPTION",
+    "TOOL_FIND_DESCRIPTION",
+    "FASTMCP_LOG_LEVEL",
+    "FASTMCP_DEBUG",
+    "MCP_QDRANT_DRY_RUN",
+    "MCP_QDRANT_EMBED_SIDECAR",
+    "MCP_EMBED_SIDECAR_URL",
+)
+LSP_KEYS = (
+    "MCP_LSP_MODE",
+    "MCP_LSP_PREFERENCE",
+    "MCP_LSP_FALLBACK",
+    "MCP_LANGUAGE_SERVER_BIN",
+    "MCP_TS_LSP",
+    "MCP_PY_LSP",
+    "MCP_LSP_LOG_LEVEL",
+)
+NEO4J_KEYS = (
+    "NEO4J_URI",
+    "NEO4J_USERNAME",
+    "NEO4J_PASSWORD",
+    "NEO4J_DATABASE",
+    "NEO4J_READ_ONLY",
+    "NEO4J_TELEMETRY",
+    "NEO4J_SCHEMA_SAMPLE_SIZE",
+    "MCP_NEO4J_VERSION",
+    "MCP_NEO4J_CMD",
+    "MCP_NEO4J_DRY_RUN",
+)
+# Re-read at every exec instead of being cached (see _read_secrets).
+SECRET_KEYS = ("QDRANT_API_KEY", "NEO4J_PASSWORD")
+# Stands in for a secret's value in cached argv; NUL cannot occur in a real argument.
+SECRET_ARG = "\0secret:"
+# Variables outside the allowlists that still change what gets resolved.
+COMMON_KEYS = ("MCP_WORKSPACE", "PATH", "HOME", "GIT_DIR", "GIT_WORK_TREE", "GIT_CEILING_DIRECTORIES")
+
+QDRANT_DEFAULTS = (
+    ("EMBEDDING_PROVIDER", "fastembed"),
+    ("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+    (
+        "TOOL_STORE_DESCRIPTION",
+        "Store important implementation decisions, snippets, and notes. "
+        "Include metadata.project_path and metadata.project_name when available.",
+    ),
+    (
+        "TOOL_FIND_DESCRIPTION",
+        "Find relevant notes/snippets for the current coding task. "
+        "Prefer records from current project metadata, then fallback to broader matches.",
+    ),
+)
+NEO4J_DEFAULTS = (
+    ("NEO4J_URI", "bolt://127.0.0.1:17687"),
+    ("NEO4J_USERNAME", "neo4j"),
+    ("NEO4J_PASSWORD", "testpass"),
+    ("NEO4J_DATABASE", "neo4j"),
+    ("NEO4J_READ_ONLY", "true"),
+    ("NEO4J_TELEMETRY", "false"),
+    ("NEO4J_SCHEMA_SAMPLE_SIZE", "100"),
+)
+NEO4J_MODULE = "github.com/neo4j/mcp/cmd/neo4j-mcp"
+EMBED_SHIM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qdrant_embed_shim.py")
+DEFAULT_EMBED_SIDECAR_URL = "http://127.0.0.1:17860"
+
+
+class LaunchError(Exception):
+    def __init__(self, message: str, code: int) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def default_cache_path() -> str:
+    return os.environ.get("MCP_LAUNCH_CACHE_FILE") or os.path.join(workspace_scan.stack_cache_dir(), "launch.cache")
+
+
+def which(name: str, path: str | None) -> str | None:
+    """`command -v` for a plain name or a path; shutil.which would pull in fnmatch and friends."""
+    if os.sep in name:
+        return name if os.path.isfile(name) and os.access(name, os.X_OK) else None
+    for directory in (path or "").split(os.pathsep):
+        candidate = os.path.join(directory or ".", name)
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _exists(path: str) -> bool:
+    try:
+        os.lstat(path)
+    except OSError:
+        return False
+    return True
+
+
+def parse_overrides(path: str, allowed: tuple[str, ...]) -> dict[str, str]:
+    """Strict KEY=VALUE lines, same rules as the wrappers' load_workspace_overrides."""
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape") as fh:
+            text = fh.read()
+    except OSError:
+        return {}
+    overrides: dict[str, str] = {}
+    for line in text.split("\n"):
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, val = line.partition("=")
+        key = "".join(key.split())
+        if len(val) >= 2 and val[0] == val[-1] and val[0] in "\"'":
+            val = val[1:-1]
+        if key in allowed:
+            overrides[key] = val
+    return overrides
+
+
+def resolve_workspace(label: str, env: dict[str, str], witness: list) -> str:
+    """MCP_WORKSPACE, else the enclosing git work tree, else $PWD; recorded `.git` lookups go to `witness`."""
+    workspace = env.get("MCP_WORKSPACE", "")
+    if not workspace:
+        cwd = os.getcwd()
+        if env.get("GIT_DIR") or env.get("GIT_WORK_TREE") or env.get("GIT_CEILING_DIRECTORIES"):
+            import subprocess
+
+            proc = subprocess.run(
+                ["git", "-C", cwd, "rev-parse", "--show-toplevel"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            workspace = proc.stdout.strip() if proc.returncode == 0 else ""
+        else:
+            # `git rev-parse --show-toplevel` without the fork: nearest ancestor holding a `.git` entry.
+            directory = cwd
+            while True:
+                marker = os.path.join(directory, ".git")
+                found = _exists(marker)
+                witness.append([marker, found])
+                if found:
+                    workspace = directory
+                    break
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+        if not workspace:
+            pwd = env.get("PWD", "")
+            workspace = pwd if pwd and os.path.realpath(pwd) == cwd else cwd
+    if not os.path.isdir(workspace):
+        raise LaunchError(f"{label}: workspace does not exist: {workspace}", 2)
+    # Logical path like the wrappers' `cd "$workspace"; pwd`.
+    return os.path.normpath(os.path.join(os.getcwd(), workspace))
+
+
+def load_overrides(workspace: str, allowed: tuple[str, ...], env: dict[str, str], witness: list) -> str:
+    path = os.path.join(workspace, ".mcp-stack.env")
+    witness.append([path, _mtime(path)])
+    env.update(parse_overrides(path, allowed))
+    return path
+
+
+def _read_secrets(secrets: list) -> dict[str, str]:
+    """Secret values as resolution saw them: `.mcp-stack.env`, else the environment, else the default."""
+    path, keys = secrets
+    overrides = parse_overrides(path, tuple(keys)) if _mtime(path) is not None else {}
+    defaults = dict(NEO4J_DEFAULTS)
+    values = {}
+    for key in keys:
+        value = overrides.get(key, os.environ.get(key))
+        if not value and key in defaults:
+            value = defaults[key]
+        if value is not None:
+            values[key] = value
+    return values
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path, "rb") as fh:
+            data = marshal.load(fh)
+    except (OSError, EOFError, ValueError, TypeError):
+        return {"launch": {}, "tools": {}}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {"launch": {}, "tools": {}}
+    return data
+
+
+def _save_cache(path: str, data: dict) -> None:
+    for section in ("launch", "tools"):
+        entries = data.get(section, {})
+        if len(entries) > CACHE_MAX_ENTRIES:
+            data[section] = dict(sorted(entries.items(), key=lambda item: item[1]["at"])[-CACHE_MAX_ENTRIES:])
+    data["version"] = CACHE_VERSION
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as fh:
+            marshal.dump(data, fh)
+        os.replace(tmp, path)
+    except OSError:
+        # Not fatal: without a writable cache every start just resolves again.
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _witness_valid(entry: dict) -> bool:
+    for path, expected in entry["witness"]:
+        current = _exists(path) if isinstance(expected, bool) else _mtime(path)
+        if current != expected:
+            return False
+    return True
+
+
+class Resolver:
+    """Resolves one launch; tool lookups go through (and refresh) the shared tool cache."""
+
+    def __init__(self, tools: dict, ttl: float, refresh: bool) -> None:
+        self.tools = tools
+        self.ttl = ttl
+        self.refresh = refresh
+        self.cacheable = True
+
+    def _cached_tool(self, key: str) -> str | None:
+        entry = self.tools.get(key)
+        if entry is None or self.refresh or time.time() - entry["at"] > self.ttl:
+            return None
+        path = entry["path"]
+        return path if os.access(path, os.X_OK) else None
+
+    def uvx_tool(self, package: str, executable: str, env: dict[str, str]) -> str | None:
+        """Path of `executable` inside the environment `uvx <package>` runs, or None to leave it to uvx."""
+        uv_env = ",".join(f"{k}={v}" for k, v in sorted(env.items()) if k.startswith("UV_"))
+        key = f"uvx\0{package}\0{executable}\0{uv_env}\0{env.get('PATH', '')}"
+        path = self._cached_tool(key)
+        if path:
+            return path
+        import subprocess
+
+        probe = "import sysconfig; print(sysconfig.get_path('scripts'))"
+        try:
+            proc = subprocess.run(
+                ["uvx", "--from", package, "python", "-c", probe],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                env=env,
+                text=True,
+            )
+        except OSError:
+            proc = None
+        scripts = proc.stdout.strip().splitlines()[-1] if proc and proc.returncode == 0 and proc.stdout.strip() else ""
+        path = os.path.join(scripts, executable) if scripts else ""
+        if not path or not os.access(path, os.X_OK):
+            self.cacheable = False
+            return None
+        self.tools[key] = {"path": path, "at": time.time()}
+        return path
+
+    def go_tool(self, module: str, version: str, env: dict[str, str]) -> str | None:
+        """`go install module@version` once into the stack cache instead of `go run` on every start."""
+        key = f"go\0{module}@{version}\0{env.get('PATH', '')}"
+        path = self._cached_tool(key)
+        if path:
+            return path
+        import subprocess
+
+        safe_version = "".join(ch if ch.isalnum() or ch in ".-_" else "_" for ch in version)
+        gobin = os.path.join(workspace_scan.stack_cache_dir(), "tools", f"{module.rsplit('/', 1)[-1]}-{safe_version}")
+        try:
+            # stdout is the MCP channel: keep go's output on stderr.
+            proc = subprocess.run(
+                ["go", "install", f"{module}@{version}"],
+                stdin=subprocess.DEVNULL,
+                stdout=sys.stderr,
+                env={**env, "GOBIN": gobin},
+            )
+        except OSError:
+            proc = None
+        path = os.path.join(gobin, module.rsplit("/", 1)[-1])
+        if proc is None or proc.returncode != 0 or not os.access(path, os.X_OK):
+            self.cacheable = False
+            return None
+        self.tools[key] = {"path": path, "at": time.time()}
+        return path
+
+
+def _slugify(raw: str) -> str:
+    slug = []
+    for ch in raw.lower():
+        slug.append(ch if ("a" <= ch <= "z" or "0" <= ch <= "9") else "-")
+    return "-".join(part for part in "".join(slug).split("-") if part)
+
+
+def resolve_qdrant(env: dict[str, str], resolver: Resolver) -> dict:
+    witness: list = []
+    workspace = resolve_workspace("mcpx-qdrant", env, witness)
+    overrides = load_overrides(workspace, QDRANT_KEYS, env, witness)
+    workspace_name = os.path.basename(workspace)
+    workspace_slug = _slugify(workspace_name) or "workspace"
+
+    collection_mode = env.get("MCP_QDRANT_COLLECTION_MODE") or "workspace"
+    if collection_mode == "workspace":
+        collection_name = env.get("MCP_QDRANT_COLLECTION") or f"proj-{workspace_slug}"
+    elif collection_mode == "global":
+        collection_name = env.get("MCP_QDRANT_COLLECTION") or "global"
+    elif collection_mode == "manual":
+        collection_name = ""
+    else:
+        raise LaunchError(f"mcpx-qdrant: unsupported MCP_QDRANT_COLLECTION_MODE={collection_mode}", 2)
+
+    unset: list[str] = []
+    if env.get("QDRANT_LOCAL_PATH"):
+        env.pop("QDRANT_URL", None)
+        unset.append("QDRANT_URL")
+    else:
+        env["QDRANT_URL"] = env.get("QDRANT_URL") or "http://127.0.0.1:6333"
+    for key, default in QDRANT_DEFAULTS:
+        env[key] = env.get(key) or default
+    if collection_name:
+        env["COLLECTION_NAME"] = collection_name
+    else:
+        env.pop("COLLECTION_NAME", None)
+        unset.append("COLLECTION_NAME")
+
+    sidecar = env.get("MCP_QDRANT_EMBED_SIDECAR", "0") == "1"
+    if sidecar:
+        env["MCP_EMBED_SIDECAR_URL"] = env.get("MCP_EMBED_SIDECAR_URL") or DEFAULT_EMBED_SIDECAR_URL
+
+    secrets = [overrides, ["QDRANT_API_KEY"]]
+    entry = {"witness": witness, "unset": unset, "dry": None, "argv": None, "secrets": secrets}
+    if env.get("MCP_QDRANT_DRY_RUN", "0") == "1":
+        entry["dry"] = [
+            f"workspace={workspace}",
+            f"workspace_name={workspace_name}",
+            f"workspace_slug={workspace_slug}",
+            f"collection_mode={collection_mode}",
+            f"collection_name={collection_name or '<manual>'}",
+            f"QDRANT_URL={env.get('QDRANT_URL') or '<unset>'}",
+            f"QDRANT_LOCAL_PATH={env.get('QDRANT_LOCAL_PATH') or '<unset>'}",
+            f"EMBEDDING_PROVIDER={env['EMBEDDING_PROVIDER']}",
+            f"EMBEDDING_MODEL={env['EMBEDDING_MODEL']}",
+            f"embedding_sidecar={env['MCP_EMBED_SIDECAR_URL'] if sidecar else '<off>'}",
+        ]
+        return entry
+
+    if which("uvx", env.get("PATH")) is None:
+        raise LaunchError("mcpx-qdrant: uvx not found in PATH", 127)
+    binary = resolver.uvx_tool("mcp-server-qdrant", "mcp-server-qdrant", env)
+    if binary:
+        # uvx puts the tool environment's bin dir first on PATH; keep that for the direct exec.
+        env["PATH"] = os.path.dirname(binary) + os.pathsep + env.get("PATH", "")
+        # The shim needs the tool environment's interpreter: it imports mcp_server_qdrant.
+        entry["argv"] = [os.path.join(os.path.dirname(binary), "python"), EMBED_SHIM] if sidecar else [binary]
+    elif sidecar:
+        entry["argv"] = ["uvx", "--from", "mcp-server-qdrant", "python", EMBED_SHIM]
+    else:
+        entry["argv"] = ["uvx", "mcp-server-qdrant"]
+    return entry
+
+
+def _pick_lsp_mode(workspace: str, env: dict[str, str], entry: dict) -> str:
+    mode = env.get("MCP_LSP_MODE") or "auto"
+    if mode in ("python", "typescript"):
+        return mode
+    found = workspace_scan.find_markers(workspace, cache_path=workspace_scan.default_cache_path())
+    entry["markers"] = [workspace, found]
+    has_ts, has_py = found.get("typescript", False), found.get("python", False)
+    if has_ts and not has_py:
+        return "typescript"
+    if has_py and not has_ts:
+        return "python"
+    if has_py and has_ts:
+        return env.get("MCP_LSP_PREFERENCE") or "typescript"
+    return env.get("MCP_LSP_FALLBACK") or "typescript"
+
+
+def resolve_lsp(env: dict[str, str], resolver: Resolver) -> dict:
+    witness: list = []
+    workspace = resolve_workspace("mcpx-lsp", env, witness)
+    load_overrides(workspace, LSP_KEYS, env, witness)
+    entry: dict = {"witness": witness, "unset": [], "dry": None, "argv": None, "secrets": None}
+    mode = _pick_lsp_mode(workspace, env, entry)
+    if env.get("MCP_LSP_LOG_LEVEL"):
+        env["LOG_LEVEL"] = env["MCP_LSP_LOG_LEVEL"]
+
+    path = env.get("PATH")
+    mcp_bin = env.get("MCP_LANGUAGE_SERVER_BIN") or which("mcp-language-server", path)
+    if not mcp_bin:
+        fallback = os.path.join(env.get("HOME") or os.path.expanduser("~"), "go", "bin", "mcp-language-server")
+        mcp_bin = fallback if os.access(fallback, os.X_OK) else ""
+    if not mcp_bin or not (os.path.isfile(mcp_bin) and os.access(mcp_bin, os.X_OK)):
+        raise LaunchError(
+            "mcpx-lsp: mcp-language-server not found; set MCP_LANGUAGE_SERVER_BIN or install it in PATH", 3
+        )
+
+    if mode == "python":
+        lsp_pref = env.get("MCP_PY_LSP") or "pyright-langserver"
+    elif mode == "typescript":
+        lsp_pref = env.get("MCP_TS_LSP") or "typescript-language-server"
+    else:
+        raise LaunchError(f"mcpx-lsp: unsupported MCP_LSP_MODE resolved to '{mode}'", 4)
+    lsp_cmd = which(lsp_pref, path) or which(lsp_pref.rsplit("/", 1)[-1], path)
+    if not lsp_cmd:
+        raise LaunchError(f"mcpx-lsp: LSP command not found: {lsp_pref}", 5)
+
+    entry["argv"] = [mcp_bin, "--workspace", workspace, "--lsp", lsp_cmd, "--", "--stdio"]
+    return entry
+
+
+def resolve_neo4j(env: dict[str, str], resolver: Resolver) -> dict:
+    witness: list = []
+    workspace = resolve_workspace("mcpx-neo4j", env, witness)
+    overrides = load_overrides(workspace, NEO4J_KEYS, env, witness)
+    for key, default in NEO4J_DEFAULTS:
+        env[key] = env.get(key) or default
+    version = env.get("MCP_NEO4J_VERSION") or "v1.4.1"
+
+    secrets = [overrides, ["NEO4J_PASSWORD"]]
+    entry: dict = {"witness": witness, "unset": [], "dry": None, "argv": None, "secrets": secrets}
+    if env.get("MCP_NEO4J_DRY_RUN", "0") == "1":
+        entry["dry"] = [f"workspace={workspace}"]
+        entry["dry"] += [f"{key}={env[key]}" for key, _ in NEO4J_DEFAULTS if key != "NEO4J_PASSWORD"]
+        entry["dry"].append(f"MCP_NEO4J_VERSION={version}")
+        return entry
+
+    if env.get("MCP_NEO4J_CMD"):
+        entry["argv"] = [env["MCP_NEO4J_CMD"]]
+        return entry
+    flags = [
+        "--neo4j-uri", env["NEO4J_URI"],
+        "--neo4j-username", env["NEO4J_USERNAME"],
+        "--neo4j-password", SECRET_ARG + "NEO4J_PASSWORD",
+        "--neo4j-database", env["NEO4J_DATABASE"],
+        "--neo4j-read-only", env["NEO4J_READ_ONLY"],
+        "--neo4j-telemetry", env["NEO4J_TELEMETRY"],
+        "--neo4j-schema-sample-size", env["NEO4J_SCHEMA_SAMPLE_SIZE"],
+    ]  # fmt: skip
+    binary = which("neo4j-mcp", env.get("PATH"))
+    if binary:
+        entry["argv"] = [binary, *flags]
+        return entry
+    if which("go", env.get("PATH")) is None:
+        raise LaunchError("mcpx-neo4j: neo4j-mcp not found and go is unavailable for fallback.", 3)
+    binary = resolver.go_tool(NEO4J_MODULE, version, env)
+    entry["argv"] = [binary, *flags] if binary else ["go", "run", f"{NEO4J_MODULE}@{version}", *flags]
+    return entry
+
+
+SERVERS = {
+    "qdrant": (resolve_qdrant, QDRANT_KEYS),
+    "lsp": (resolve_lsp, LSP_KEYS),
+    "neo4j": (resolve_neo4j, NEO4J_KEYS),
+}
+
+
+def _entry_valid(entry: dict, ttl: float) -> bool:
+    if time.time() - entry["at"] > ttl or not _witness_valid(entry):
+        return False
+    markers = entry.get("markers")
+    if markers:
+        workspace, found = markers
+        if workspace_scan.find_markers(workspace, cache_path=workspace_scan.default_cache_path()) != found:
+            return False
+    return True
+
+
+def _exec(entry: dict, args: list[str]) -> None:
+    env = dict(os.environ)
+    for key in entry["unset"]:
+        env.pop(key, None)
+    env.update(entry["env"])
+    secrets = _read_secrets(entry["secrets"]) if entry["secrets"] else {}
+    env.update(secrets)
+    argv = [secrets.get(arg[len(SECRET_ARG) :], "") if arg.startswith(SECRET_ARG) else arg for arg in entry["argv"]]
+    os.execvpe(argv[0], argv + args, env)
+
+
+def main(argv: list[str]) -> int:
+    if not argv or argv[0] not in SERVERS:
+        print(USAGE, file=sys.stderr)
+        return 2
+    server, args = argv[0], argv[1:]
+    resolve, keys = SERVERS[server]
+    use_cache = os.environ.get("MCP_LAUNCH_CACHE", "1") != "0"
+    refresh = os.environ.get("MCP_LAUNCH_REFRESH", "0") == "1"
+    try:
+        ttl = float(os.environ.get("MCP_LAUNCH_CACHE_TTL_SEC", DEFAULT_TTL_SEC))
+    except ValueError:
+        ttl = DEFAULT_TTL_SEC
+
+    cwd = os.getcwd()
+    fingerprint = "\0".join(f"{k}={os.environ.get(k, '')}" for k in (*COMMON_KEYS, *keys) if k not in SECRET_KEYS)
+    key = f"{server}\0{cwd}\0{fingerprint}"
+    cache_path = default_cache_path()
+    data = _load_cache(cache_path) if use_cache else {"launch": {}, "tools": {}}
+    launches = data.setdefault("launch", {})
+
+    entry = launches.get(key)
+    if entry is not None and not refresh and _entry_valid(entry, ttl):
+        if entry["dry"] is not None:
+            print("\n".join(entry["dry"]))
+            return 0
+        try:
+            _exec(entry, args)
+        except OSError:
+            # Cached binary vanished (uv cache pruned, tool uninstalled): resolve again below.
+            refresh = True
+
+    resolver = Resolver(data.setdefault("tools", {}), ttl, refresh)
+    env = dict(os.environ)
+    try:
+        entry = resolve(env, resolver)
+    except LaunchError as exc:
+        print(str(exc), file=sys.stderr)
+        return exc.code
+    # Persist only what differs from the launching environment, and never a secret.
+    entry["env"] = {k: v for k, v in env.items() if os.environ.get(k) != v and k not in SECRET_KEYS}
+    entry["at"] = time.time()
+    if use_cache and resolver.cacheable:
+        launches[key] = entry
+        _save_cache(cache_path, data)
+    if entry["dry"] is not None:
+        print("\n".join(entry["dry"]))
+        return 0
+    try:
+        _exec(entry, args)
+    except OSError as exc:
+        print(f"mcpx-{server}: cannot exec {entry['argv'][0]}: {exc}", file=sys.stderr)
+        return 127
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -1,6 +1,14 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Cached in-process resolution that execs the server binary directly (see mcpx_launch.py);
+# MCP_LAUNCH_CACHE=0 or a missing python3 falls through to the shell resolution below.
+if [ "${MCP_LAUNCH_CACHE:-1}" != "0" ] && command -v python3 >/dev/null 2>&1; then
+  exec python3 -S "$SCRIPT_DIR/mcpx_launch.py" lsp "$@"
+fi
+
 resolve_workspace() {
   local workspace="${MCP_WORKSPACE:-}"
   if [ -z "$workspace" ]; then
@@ -77,8 +85,15 @@ pick_mode() {
 
   local has_ts=false
   local has_py=false
-  if has_ts_markers "$ws"; then has_ts=true; fi
-  if has_py_markers "$ws"; then has_py=true; fi
+  local found
+  # Pruned scandir walk with an on-disk marker cache; plain `find` when python3 is unavailable.
+  if found="$(python3 "$SCRIPT_DIR/workspace_scan.py" markers "$ws" 2>/dev/null)"; then
+    case " $found " in *" typescript "*) has_ts=true ;; esac
+    case " $found " in *" python "*) has_py=true ;; esac
+  else
+    if has_ts_markers "$ws"; then has_ts=true; fi
+    if has_py_markers "$ws"; then has_py=true; fi
+  fi
 
   if [ "$has_ts" = true ] && [ "$has_py" = false ]; then
     echo "typescript"
@@ -1,6 +1,14 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Cached in-process resolution that execs the server binary directly (see mcpx_launch.py);
+# MCP_LAUNCH_CACHE=0 or a missing python3 falls through to the shell resolution below.
+if [ "${MCP_LAUNCH_CACHE:-1}" != "0" ] && command -v python3 >/dev/null 2>&1; then
+  exec python3 -S "$SCRIPT_DIR/mcpx_launch.py" neo4j "$@"
+fi
+
 resolve_workspace() {
   local workspace="${MCP_WORKSPACE:-}"
   if [ -z "$workspace" ]; then
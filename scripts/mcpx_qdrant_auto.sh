@@ -1,6 +1,14 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Cached in-process resolution that execs the server binary directly (see mcpx_launch.py);
+# MCP_LAUNCH_CACHE=0 or a missing python3 falls through to the shell resolution below.
+if [ "${MCP_LAUNCH_CACHE:-1}" != "0" ] && command -v python3 >/dev/null 2>&1; then
+  exec python3 -S "$SCRIPT_DIR/mcpx_launch.py" qdrant "$@"
+fi
+
 resolve_workspace() {
   local workspace="${MCP_WORKSPACE:-}"
   if [ -z "$workspace" ]; then
@@ -46,7 +54,7 @@ load_workspace_overrides() {
     esac
 
     case "$key" in
-      MCP_QDRANT_COLLECTION_MODE | MCP_QDRANT_COLLECTION | QDRANT_URL | QDRANT_API_KEY | QDRANT_LOCAL_PATH | EMBEDDING_PROVIDER | EMBEDDING_MODEL | TOOL_STORE_DESCRIPTION | TOOL_FIND_DESCRIPTION | FASTMCP_LOG_LEVEL | FASTMCP_DEBUG | MCP_QDRANT_DRY_RUN)
+      MCP_QDRANT_COLLECTION_MODE | MCP_QDRANT_COLLECTION | QDRANT_URL | QDRANT_API_KEY | QDRANT_LOCAL_PATH | EMBEDDING_PROVIDER | EMBEDDING_MODEL | TOOL_STORE_DESCRIPTION | TOOL_FIND_DESCRIPTION | FASTMCP_LOG_LEVEL | FASTMCP_DEBUG | MCP_QDRANT_DRY_RUN | MCP_QDRANT_EMBED_SIDECAR | MCP_EMBED_SIDECAR_URL)
         export "$key=$val"
         ;;
       *) ;;
@@ -104,6 +112,12 @@ else
   unset COLLECTION_NAME || true
 fi
 
+embedding_sidecar=""
+if [ "${MCP_QDRANT_EMBED_SIDECAR:-0}" = "1" ]; then
+  export MCP_EMBED_SIDECAR_URL="${MCP_EMBED_SIDECAR_URL:-http://127.0.0.1:17860}"
+  embedding_sidecar="$MCP_EMBED_SIDECAR_URL"
+fi
+
 if [ "${MCP_QDRANT_DRY_RUN:-0}" = "1" ]; then
   echo "workspace=$workspace"
   echo "workspace_name=$workspace_name"
@@ -114,7 +128,13 @@ if [ "${MCP_QDRANT_DRY_RUN:-0}" = "1" ]; then
   echo "QDRANT_LOCAL_PATH=${QDRANT_LOCAL_PATH:-<unset>}"
   echo "EMBEDDING_PROVIDER=$EMBEDDING_PROVIDER"
   echo "EMBEDDING_MODEL=$EMBEDDING_MODEL"
+  echo "embedding_sidecar=${embedding_sidecar:-<off>}"
   exit 0
 fi
 
+if [ -n "$embedding_sidecar" ]; then
+  # Shared embedding sidecar: the shim swaps the fastembed provider for a sidecar client.
+  exec uvx --from mcp-server-qdrant python "$SCRIPT_DIR/qdrant_embed_shim.py" "$@"
+fi
+
 exec uvx mcp-server-qdrant "$@"
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Ingest/query benchmark for Qdrant at `mcpx-qdrant` scale.
+
+Collections mirror what `mcp-server-qdrant` creates: one named 384-dim Cosine
+vector (all-MiniLM-L6-v2 via fastembed) and `document`/`metadata` payloads. The
+dataset is synthetic, generated with NumPy in fixed chunks from `--seed`, and
+clustered so HNSW recall is not trivially perfect. It is streamed to Qdrant,
+so `--points` can go well past what fits in memory.
+
+Every combination of `--points`, `--batch-sizes`, `--workers`, `--hnsw` and
+`--quantization` is ingested into a fresh collection. Each collection is then
+queried for every `--ef` and `--filters` value. Rows report ingest points/sec,
+time until the collection is green (indexed), query QPS and latency, and
+recall@k against an exact NumPy ground truth computed over the same stream.
+Upsert bodies are JSON-encoded ahead of the uploads in `--encoders` processes,
+so the upload threads only send; `encode_s` (summed encode time) and
+`upload_pts_s` (points over the summed in-request upload time, times the worker
+count) separate client-side encoding from what Qdrant sustains.
+Failed searches are counted in `errors` and left out of QPS and latency; they
+score zero recall, and any of them makes the run exit 1.
+
+Needs numpy, which the rest of the stack does not:
+  uv run --no-project --with numpy python scripts/qdrant_bench.py --points 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+from runtime_load_bench import ConnectionPool, percentile
+
+try:
+    import numpy as np
+except ImportError:  # only this benchmark needs numpy; main() reports it
+    np = None
+
+# Points are generated in chunks of this size whatever the upload batch size, so
+# every sweep over the same --points/--seed ingests the same vectors.
+CHUNK_POINTS = 4096
+QUANTIZATION = {
+    "none": None,
+    "scalar": {"scalar": {"type": "int8", "quantile": 0.99, "always_ram": True}},
+    "binary": {"binary": {"always_ram": True}},
+    "product": {"product": {"compression": "x16", "always_ram": True}},
+}
+COLUMNS = (
+    "label",
+    "points",
+    "dim",
+    "batch",
+    "workers",
+    "m",
+    "ef_construct",
+    "quantization",
+    "ingest_pts_s",
+    "encode_s",
+    "upload_pts_s",
+    "index_s",
+    "hnsw_ef",
+    "filter",
+    "queries",
+    "errors",
+    "qps",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "k",
+    "recall",
+)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    points: int
+    dim: int
+    seed: int
+    clusters: int
+    spread: float
+    groups: int
+
+    def centers(self) -> np.ndarray:
+        rng = np.random.default_rng([self.seed, 0])
+        return normalize(rng.standard_normal((self.clusters, self.dim), dtype=np.float32))
+
+    def sample(self, rng: np.random.Generator, count: int, centers: np.ndarray) -> np.ndarray:
+        noise = rng.standard_normal((count, self.dim), dtype=np.float32) * (self.spread / self.dim**0.5)
+        return normalize(centers[rng.integers(self.clusters, size=count)] + noise)
+
+    def chunks(self) -> Iterator[tuple[int, np.ndarray]]:
+        """(first point index, vectors) in CHUNK_POINTS pieces; chunk i always has the same contents."""
+        centers = self.centers()
+        for index, start in enumerate(range(0, self.points, CHUNK_POINTS)):
+            rng = np.random.default_rng([self.seed, 1, index])
+            yield start, self.sample(rng, min(CHUNK_POINTS, self.points - start), centers)
+
+    def queries(self, count: int) -> np.ndarray:
+        return self.sample(np.random.default_rng([self.seed, 2]), count, self.centers())
+
+    def group_of(self, index: np.ndarray | int) -> np.ndarray | int:
+        return index % self.groups
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def iter_batches(dataset: Dataset, batch_size: int) -> Iterator[tuple[int, np.ndarray]]:
+    pending: list[np.ndarray] = []
+    pending_start = 0
+    pending_count = 0
+    for start, vectors in dataset.chunks():
+        if not pending:
+            pending_start = start
+        pending.append(vectors)
+        pending_count += len(vectors)
+        while pending_count >= batch_size:
+            merged = np.concatenate(pending) if len(pending) > 1 else pending[0]
+            yield pending_start, merged[:batch_size]
+            rest = merged[batch_size:]
+            pending = [rest] if len(rest) else []
+            pending_start += batch_size
+            pending_count = len(rest)
+    if pending:
+        yield pending_start, np.concatenate(pending)
+
+
+def ground_truth(dataset: Dataset, queries: np.ndarray, k: int, query_groups: np.ndarray | None) -> np.ndarray:
+    """Exact top-k point ids per query (brute-force dot products over the chunk stream)."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for start, vectors in dataset.chunks():
+        scores = queries @ vectors.T
+        ids = np.arange(start, start + len(vectors), dtype=np.int64)
+        if query_groups is not None:
+            scores[dataset.group_of(ids)[None, :] != query_groups[:, None]] = -np.inf
+        all_scores = np.concatenate([best_scores, scores], axis=1)
+        all_ids = np.concatenate([best_ids, np.broadcast_to(ids, scores.shape)], axis=1)
+        top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(all_scores, top, axis=1)
+        best_ids = np.take_along_axis(all_ids, top, axis=1)
+    return best_ids + 1  # Qdrant point ids are 1-based here
+
+
+def point_vector(vector_name: str, vector: list[float]) -> object:
+    return {vector_name: vector} if vector_name else vector
+
+
+def upsert_body(dataset: Dataset, start: int, vectors: np.ndarray, vector_name: str, document: str) -> bytes:
+    points = [
+        {
+            "id": start + offset + 1,
+            "vector": point_vector(vector_name, row),
+            "payload": {"document": document, "metadata": {"group": int(dataset.group_of(start + offset))}},
+        }
+        for offset, row in enumerate(vectors.astype(np.float64).round(6).tolist())
+    ]
+    return json.dumps({"points": points}, separators=(",", ":")).encode("utf-8")
+
+
+def encode_upsert(
+    dataset: Dataset, start: int, vectors: np.ndarray, vector_name: str, document: str
+) -> tuple[bytes, float]:
+    """upsert_body in an encoder process; also returns the seconds it took."""
+    started = time.perf_counter()
+    body = upsert_body(dataset, start, vectors, vector_name, document)
+    return body, time.perf_counter() - started
+
+
+def check(status: int, body: bytes, action: str) -> None:
+    if status != 200:
+        raise RuntimeError(f"{action} failed: HTTP {status} {body[:200]!r}")
+
+
+def create_collection(
+    pool: ConnectionPool,
+    name: str,
+    dataset: Dataset,
+    vector_name: str,
+    m: int,
+    ef_construct: int,
+    quantization: str,
+) -> None:
+    params = {"size": dataset.dim, "distance": "Cosine"}
+    spec: dict[str, object] = {
+        "vectors": {vector_name: params} if vector_name else params,
+        "hnsw_config": {"m": m, "ef_construct": ef_construct},
+    }
+    if QUANTIZATION[quantization]:
+        spec["quantization_config"] = QUANTIZATION[quantization]
+    pool.fetch("DELETE", f"/collections/{name}", None, {})
+    check(*pool.fetch("PUT", f"/collections/{name}", json.dumps(spec).encode(), JSON_HEADERS), f"create {name}")
+    index = {"field_name": "metadata.group", "field_schema": "integer"}
+    check(*pool.fetch("PUT", f"/collections/{name}/index?wait=true", json.dumps(index).encode(), JSON_HEADERS), f"index {name}")
+
+
+def ingest(
+    pool: ConnectionPool,
+    name: str,
+    dataset: Dataset,
+    vector_name: str,
+    batch_size: int,
+    workers: int,
+    document: str,
+    wait: bool,
+    encoders: int,
+) -> tuple[float, float, float]:
+    """
+    Stream every batch through `encoders` JSON-encoding processes into `workers`
+    concurrent uploads; returns elapsed, summed encode and summed upload seconds.
+    """
+    path = f"/collections/{name}/points?wait={'true' if wait else 'false'}"
+    # Bounds generated-but-unsent batches so memory stays flat at any --points.
+    slots = threading.BoundedSemaphore((workers + encoders) * 2)
+    errors: list[str] = []
+    totals = {"encode": 0.0, "upload": 0.0}
+    lock = threading.Lock()
+
+    def upload(start: int, encoded: Future) -> None:
+        try:
+            if errors:
+                return
+            body, encode_s = encoded.result()
+            sent = time.perf_counter()
+            status, reply = pool.fetch("PUT", path, body, JSON_HEADERS)
+            with lock:
+                totals["encode"] += encode_s
+                totals["upload"] += time.perf_counter() - sent
+            if status != 200:
+                errors.append(f"upsert at {start}: HTTP {status} {reply[:200]!r}")
+        finally:
+            slots.release()
+
+    with ProcessPoolExecutor(max_workers=encoders) as encode_pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        for start, vectors in iter_batches(dataset, batch_size):
+            slots.acquire()
+            if errors:
+                slots.release()
+                break
+            encoded = encode_pool.submit(encode_upsert, dataset, start, vectors, vector_name, document)
+            executor.submit(upload, start, encoded)
+        executor.shutdown(wait=True)
+        elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(errors[0])
+    return elapsed, totals["encode"], totals["upload"]
+
+
+def wait_green(pool: ConnectionPool, name: str, timeout: float) -> float:
+    """Seconds until the optimizers are done with the collection (status green)."""
+    started = time.perf_counter()
+    while True:
+        status, body = pool.fetch("GET", f"/collections/{name}", None, {})
+        check(status, body, f"describe {name}")
+        if json.loads(body)["result"].get("status") == "green":
+            return time.perf_counter() - started
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"{name} not green after {timeout:.0f}s")
+        time.sleep(0.2)
+
+
+def search_bodies(
+    dataset: Dataset,
+    queries: np.ndarray,
+    query_groups: np.ndarray | None,
+    vector_name: str,
+    k: int,
+    ef: int,
+    quantized: bool,
+) -> list[bytes]:
+    params: dict[str, object] = {"hnsw_ef": ef}
+    if quantized:
+        params["quantization"] = {"rescore": True}
+    bodies = []
+    for i, query in enumerate(queries.astype(np.float64).round(6).tolist()):
+        request: dict[str, object] = {
+            "vector": {"name": vector_name, "vector": query} if vector_name else query,
+            "limit": k,
+            "params": params,
+        }
+        if query_groups is not None:
+            request["filter"] = {"must": [{"key": "metadata.group", "match": {"value": int(query_groups[i])}}]}
+        bodies.append(json.dumps(request, separators=(",", ":")).encode("utf-8"))
+    return bodies
+
+
+def run_queries(
+    pool: ConnectionPool, name: str, bodies: list[bytes], concurrency: int
+) -> tuple[list[list[int]], list[float], int, float]:
+    """
+    Closed-loop search over `bodies`; returns result ids per query, latencies (ms)
+    of successful searches, the number of failed ones and wall seconds.
+    """
+    results: list[list[int]] = [[] for _ in bodies]
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+    lock = threading.Lock()
+    path = f"/collections/{name}/points/search"
+
+    def sender() -> None:
+        nonlocal errors
+        while (i := next(counter)) < len(bodies):
+            sent = time.perf_counter()
+            status, body = pool.fetch("POST", path, bodies[i], JSON_HEADERS)
+            elapsed = (time.perf_counter() - sent) * 1000.0
+            if status != 200:
+                # A fast error reply is not a fast search: keep it out of latency and QPS.
+                with lock:
+                    errors += 1
+                continue
+            latencies.append(elapsed)
+            results[i] = [hit["id"] for hit in json.loads(body)["result"]]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, latencies, errors, time.perf_counter() - started
+
+
+def recall(results: list[list[int]], truth: np.ndarray) -> float:
+    # Id 0 pads the truth when a filter matches fewer than k points.
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, truth.tolist()))
+    return hits / max(1, int(np.count_nonzero(truth)))
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def parse_hnsw(value: str) -> list[tuple[int, int]]:
+    configs = []
+    for item in value.split(","):
+        m, _, ef_construct = item.strip().partition(":")
+        configs.append((int(m), int(ef_construct or 100)))
+    return configs
+
+
+def parse_choices(value: str, allowed: tuple[str, ...], flag: str) -> list[str]:
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise SystemExit(f"{flag}: unknown value(s) {', '.join(unknown)} (known: {', '.join(allowed)})")
+    return items
+
+
+def write_rows(out: str, rows: list[dict[str, str]]) -> None:
+    path = pathlib.Path(out)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new = not path.exists() or path.stat().st_size == 0
+    with path.open("a", encoding="utf-8") as fh:
+        if new:
+            fh.write("\t".join(COLUMNS) + "\n")
+        for row in rows:
+            fh.write("\t".join(row[column] for column in COLUMNS) + "\n")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Qdrant ingest/query benchmark with NumPy ground truth.")
+    parser.add_argument("--url", default=os.environ.get("QDRANT_URL", "http://127.0.0.1:6333"), help="Qdrant base URL")
+    parser.add_argument("--points", default="100000", help="Collection sizes to sweep, comma-separated")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (all-MiniLM-L6-v2: 384)")
+    parser.add_argument(
+        "--vector-name",
+        default="fast-all-minilm-l6-v2",
+        help="Named vector, as mcp-server-qdrant creates it (empty for an unnamed vector)",
+    )
+    parser.add_argument("--batch-sizes", default="256", help="Upsert batch sizes to sweep")
+    parser.add_argument("--workers", default="4", help="Parallel upload workers to sweep")
+    parser.add_argument(
+        "--encoders",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes JSON-encoding upsert batches ahead of the uploads (default: CPU count)",
+    )
+    parser.add_argument("--hnsw", default="16:100", help="HNSW m:ef_construct pairs to sweep")
+    parser.add_argument(
+        "--quantization",
+        default="none",
+        help=f"Quantization modes to sweep ({', '.join(QUANTIZATION)})",
+    )
+    parser.add_argument("--ef", default="64,128", help="Search hnsw_ef values to sweep")
+    parser.add_argument(
+        "--filters",
+        default="none,group",
+        help="Query variants: `none` and/or `group` (metadata.group match, 1/--groups of the points)",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Queries per variant (all scored for recall)")
+    parser.add_argument("--top-k", type=int, default=10, help="k for search limit and recall@k")
+    parser.add_argument("--query-concurrency", type=int, default=4, help="Concurrent search senders")
+    parser.add_argument("--groups", type=int, default=16, help="Distinct metadata.group values")
+    parser.add_argument("--clusters", type=int, default=256, help="Cluster centers in the synthetic data")
+    parser.add_argument("--spread", type=float, default=0.6, help="Noise norm around each cluster center")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="Size of each point's `document` payload")
+    parser.add_argument("--seed", type=int, default=1, help="Dataset seed")
+    parser.add_argument("--no-wait", action="store_true", help="Upsert with wait=false (ingest rate excludes WAL apply)")
+    parser.add_argument("--index-timeout", type=float, default=3600.0, help="Seconds to wait for a green collection")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request socket timeout in seconds")
+    parser.add_argument("--label", default="", help="Label column and collection name prefix")
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark collections")
+    parser.add_argument("--out", default="-", help="TSV file to append rows to (`-`: stdout only)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if np is None:
+        print(
+            "qdrant_bench.py needs numpy: uv run --no-project --with numpy python scripts/qdrant_bench.py ...",
+            file=sys.stderr,
+        )
+        return 2
+    label = args.label or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    quantizations = parse_choices(args.quantization, tuple(QUANTIZATION), "--quantization")
+    filters = parse_choices(args.filters, ("none", "group"), "--filters")
+    ingest_sweep = list(
+        itertools.product(parse_ints(args.batch_sizes), parse_ints(args.workers), parse_hnsw(args.hnsw), quantizations)
+    )
+    efs = parse_ints(args.ef)
+    encoders = max(1, args.encoders)
+    document = ("lorem ipsum " * (args.payload_bytes // 12 + 1))[: args.payload_bytes]
+
+    api_key = os.environ.get("QDRANT_API_KEY")
+    pool = ConnectionPool(args.url, args.timeout, {"api-key": api_key} if api_key else None)
+    rows: list[dict[str, str]] = []
+    failed = 0
+    print("\t".join(COLUMNS), flush=True)
+    for points in parse_ints(args.points):
+        dataset = Dataset(points, args.dim, args.seed, args.clusters, args.spread, args.groups)
+        queries = dataset.queries(args.queries)
+        query_groups = np.arange(args.queries) % args.groups
+        started = time.perf_counter()
+        truth = {
+            variant: ground_truth(dataset, queries, args.top_k, query_groups if variant == "group" else None)
+            for variant in filters
+        }
+        print(f"# ground truth for {points} points: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        for n, (batch, workers, (m, ef_construct), quantization) in enumerate(ingest_sweep):
+            name = f"{label}_{points}_{n}"
+            create_collection(pool, name, dataset, args.vector_name, m, ef_construct, quantization)
+            try:
+                ingest_s, encode_s, upload_s = ingest(
+                    pool, name, dataset, args.vector_name, batch, workers, document, not args.no_wait, encoders
+                )
+                index_s = wait_green(pool, name, args.index_timeout)
+                for ef, variant in itertools.product(efs, filters):
+                    bodies = search_bodies(
+                        dataset,
+                        queries,
+                        query_groups if variant == "group" else None,
+                        args.vector_name,
+                        args.top_k,
+                        ef,
+                        quantization != "none",
+                    )
+                    results, latencies, errors, wall = run_queries(pool, name, bodies, args.query_concurrency)
+                    latencies.sort()
+                    if errors:
+                        failed += 1
+                        print(f"# {name} ef={ef} filter={variant}: {errors} failed searches", file=sys.stderr)
+                    row = {
+                        "label": label,
+                        "points": str(points),
+                        "dim": str(args.dim),
+                        "batch": str(batch),
+                        "workers": str(workers),
+                        "m": str(m),
+                        "ef_construct": str(ef_construct),
+                        "quantization": quantization,
+                        "ingest_pts_s": f"{points / ingest_s:.0f}",
+                        "encode_s": f"{encode_s:.1f}",
+                        "upload_pts_s": f"{points * workers / upload_s:.0f}" if upload_s else "NA",
+                        "index_s": f"{index_s:.1f}",
+                        "hnsw_ef": str(ef),
+                        "filter": variant,
+                        "queries": str(len(bodies)),
+                        "errors": str(errors),
+                        "qps": f"{len(latencies) / wall:.1f}",
+                        "p50_ms": f"{percentile(latencies, 50):.3f}" if latencies else "NA",
+                        "p95_ms": f"{percentile(latencies, 95):.3f}" if latencies else "NA",
+                        "p99_ms": f"{percentile(latencies, 99):.3f}" if latencies else "NA",
+                        "k": str(args.top_k),
+                        "recall": f"{recall(results, truth[variant]):.4f}",
+                    }
+                    rows.append(row)
+                    print("\t".join(row[column] for column in COLUMNS), flush=True)
+            finally:
+                if not args.keep:
+                    pool.fetch("DELETE", f"/collections/{name}", None, {})
+    pool.close()
+
+    if args.out != "-":
+        write_rows(args.out, rows)
+        print(f"Appended {len(rows)} rows to: {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Run `mcp-server-qdrant` with its embeddings served by the shared embed_sidecar.py.
+
+mcpx-qdrant execs this with the `uvx mcp-server-qdrant` environment's python when
+MCP_QDRANT_EMBED_SIDECAR=1. Before the server is imported,
+`mcp_server_qdrant.embeddings.fastembed` is replaced by a module whose
+`FastEmbedProvider` posts to the sidecar, so the session never loads fastembed
+or the model. Vector name and size are the in-process provider's, so existing
+collections keep working.
+
+When the sidecar is not reachable and its URL is loopback, one is started with
+this interpreter (which has fastembed) and left running for other sessions
+until MCP_EMBED_SIDECAR_IDLE_TIMEOUT_SEC (default 900) passes without requests.
+If that fails as well, the server runs with its in-process provider.
+
+stdout is the MCP channel: nothing here prints to it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from workspace_scan import stack_cache_dir
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_URL = "http://127.0.0.1:17860"
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+REQUEST_TIMEOUT = 120.0
+
+
+def warn(message: str) -> None:
+    print(f"mcpx-qdrant: {message}", file=sys.stderr, flush=True)
+
+
+def health(url: str, timeout: float = 1.0) -> dict | None:
+    try:
+        with urllib.request.urlopen(f"{url}/healthz", timeout=timeout) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def sidecar_log_path() -> str:
+    return os.path.join(stack_cache_dir(), "embed_sidecar.log")
+
+
+def start_sidecar(url: str, model: str) -> subprocess.Popen | None:
+    log_path = sidecar_log_path()
+    cmd = [
+        sys.executable,
+        os.path.join(SCRIPT_DIR, "embed_sidecar.py"),
+        "serve",
+        "--listen",
+        url,
+        "--model",
+        model,
+        "--provider",
+        os.environ.get("MCP_EMBED_SIDECAR_PROVIDER", "fastembed"),
+        "--idle-timeout",
+        os.environ.get("MCP_EMBED_SIDECAR_IDLE_TIMEOUT_SEC", "900"),
+    ]
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "ab") as log:
+            return subprocess.Popen(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log, start_new_session=True
+            )
+    except OSError as exc:
+        warn(f"cannot start embedding sidecar: {exc}")
+        return None
+
+
+def ensure_sidecar(url: str, model: str) -> dict | None:
+    """Health of a sidecar serving `model` at `url`, starting a local one if needed; None when unavailable."""
+    info = health(url)
+    if info is None:
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if os.environ.get("MCP_EMBED_SIDECAR_AUTOSTART", "1") != "1" or host not in LOOPBACK_HOSTS:
+            warn(f"embedding sidecar not reachable at {url}")
+            return None
+        proc = start_sidecar(url, model)
+        deadline = time.monotonic() + float(os.environ.get("MCP_EMBED_SIDECAR_START_TIMEOUT_SEC", "120"))
+        # A concurrent session may win the port (our child then exits); keep polling for whichever serves.
+        while info is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+            info = health(url)
+            if info is None and proc is not None and proc.poll() not in (None, 3):
+                break
+        if info is None:
+            warn(f"embedding sidecar did not come up at {url} (log: {sidecar_log_path()})")
+            return None
+    if info.get("model") != model:
+        warn(f"embedding sidecar at {url} serves {info.get('model')}, not {model}")
+        return None
+    return info
+
+
+def install_provider(url: str, dim: int) -> None:
+    """
+    Make `FastEmbedProvider` the sidecar client before mcp_server_qdrant imports it.
+
+    The class does not subclass the upstream `EmbeddingProvider`: importing that
+    would run the embeddings package before this module is complete, and the
+    server only calls the four provider methods.
+    """
+
+    class FastEmbedProvider:
+        def __init__(self, model_name: str) -> None:
+            self.model_name = model_name
+
+        def _post(self, texts: list[str], input_type: str) -> list[list[float]]:
+            body = json.dumps({"input": texts, "input_type": input_type, "model": self.model_name}).encode()
+            for attempt in (1, 2):
+                request = urllib.request.Request(
+                    f"{url}/v1/embeddings", data=body, headers={"Content-Type": "application/json"}
+                )
+                try:
+                    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                        data = json.loads(response.read())["data"]
+                    return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+                except urllib.error.HTTPError:
+                    raise
+                except OSError:
+                    # An idle sidecar exits; bring it back once before failing the tool call.
+                    if attempt == 2 or ensure_sidecar(url, self.model_name) is None:
+                        raise
+            raise AssertionError("unreachable")
+
+        async def embed_documents(self, documents: list[str]) -> list[list[float]]:
+            return await asyncio.to_thread(self._post, documents, "passage")
+
+        async def embed_query(self, query: str) -> list[float]:
+            return (await asyncio.to_thread(self._post, [query], "query"))[0]
+
+        def get_vector_name(self) -> str:
+            return f"fast-{self.model_name.split('/')[-1].lower()}"
+
+        def get_vector_size(self) -> int:
+            return dim
+
+    module = types.ModuleType("mcp_server_qdrant.embeddings.fastembed")
+    module.FastEmbedProvider = FastEmbedProvider
+    sys.modules[module.__name__] = module
+
+
+def main() -> int:
+    from importlib.metadata import entry_points
+
+    url = (os.environ.get("MCP_EMBED_SIDECAR_URL") or DEFAULT_URL).rstrip("/")
+    model = os.environ.get("EMBEDDING_MODEL") or DEFAULT_MODEL
+    if os.environ.get("EMBEDDING_PROVIDER", "fastembed") != "fastembed":
+        warn("embedding sidecar only replaces the fastembed provider; running unchanged")
+    else:
+        info = ensure_sidecar(url, model)
+        if info is None:
+            warn("falling back to in-process fastembed")
+        else:
+            install_provider(url, int(info["dim"]))
+
+    matches = list(entry_points(group="console_scripts", name="mcp-server-qdrant"))
+    if not matches:
+        warn("mcp-server-qdrant is not installed in this interpreter's environment")
+        return 127
+    sys.argv[0] = "mcp-server-qdrant"
+    result = matches[0].load()()
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
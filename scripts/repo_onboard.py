@@ -4,10 +4,41 @@ from __future__ import annotations
 import argparse
 import datetime as dt
 import json
+import os
 import pathlib
 import subprocess
+import sys
+import time
 import tomllib
-from typing import Any
+from typing import Any, Callable
+
+import workspace_scan
+
+CACHE_VERSION = 1
+ENTRYPOINT_CANDIDATES = (
+    "src/main.ts",
+    "src/index.ts",
+    "src/app.ts",
+    "main.ts",
+    "src/main.py",
+    "src/app.py",
+    "main.py",
+    "app.py",
+    "manage.py",
+)
+TASKFILE_NAMES = ("Taskfile.yml", "Taskfile.yaml", "taskfile.yml", "taskfile.yaml")
+# Files whose stats feed the language/entrypoint/command/doc fingerprints.
+FINGERPRINT_FILES = (
+    "package.json",
+    "tsconfig.json",
+    "tsconfig.build.json",
+    "pnpm-lock.yaml",
+    "pyproject.toml",
+    "requirements.txt",
+    "README.md",
+    "AGENTS.md",
+    *TASKFILE_NAMES,
+)
 
 
 def run(cmd: list[str], cwd: pathlib.Path) -> str:
@@ -22,6 +53,10 @@ def detect_language(repo_root: pathlib.Path) -> str:
         return "javascript"
     if (repo_root / "pyproject.toml").exists() or (repo_root / "requirements.txt").exists():
         return "python"
+    # No manifest at the root: fall back to the same source-file markers mcpx-lsp uses.
+    found = workspace_scan.find_markers(repo_root, cache_path=workspace_scan.default_cache_path())
+    if found["typescript"] != found["python"]:
+        return "typescript" if found["typescript"] else "python"
     return "polyglot"
 
 
@@ -40,57 +75,12 @@ def load_toml(path: pathlib.Path) -> dict[str, Any]:
 
 
 def list_top_level(repo_root: pathlib.Path) -> tuple[list[str], list[str]]:
-    ignore = {
-        ".git",
-        "node_modules",
-        ".venv",
-        "venv",
-        "dist",
-        "build",
-        "coverage",
-        ".pytest_cache",
-        ".mcp-uv-cache",
-        ".semantic-search",
-        ".sourcerer",
-        ".code-graph-rag",
-        "in-memoria-vectors.db",
-        "lancedb",
-        "logs_llm",
-    }
-    ignore_files = {
-        ".env",
-        ".secrets.env",
-        ".secrets.env.runtime",
-        "debug.log",
-    }
-    dirs: list[str] = []
-    files: list[str] = []
-    for entry in sorted(repo_root.iterdir(), key=lambda p: p.name):
-        if entry.name in ignore:
-            continue
-        if entry.is_dir():
-            dirs.append(entry.name)
-        elif entry.is_file():
-            if entry.name in ignore_files or entry.name.startswith("background-indexing-"):
-                continue
-            files.append(entry.name)
-    return dirs[:40], files[:40]
+    return workspace_scan.scan_top_level(repo_root)
 
 
 def detect_entrypoints(repo_root: pathlib.Path, language: str) -> list[str]:
-    candidates = [
-        "src/main.ts",
-        "src/index.ts",
-        "src/app.ts",
-        "main.ts",
-        "src/main.py",
-        "src/app.py",
-        "main.py",
-        "app.py",
-        "manage.py",
-    ]
     out: list[str] = []
-    for rel in candidates:
+    for rel in ENTRYPOINT_CANDIDATES:
         path = repo_root / rel
         if path.exists():
             out.append(rel)
@@ -132,7 +122,7 @@ def detect_commands(repo_root: pathlib.Path, language: str) -> dict[str, str]:
             commands["test"] = "pytest"
 
     taskfile = None
-    for name in ("Taskfile.yml", "Taskfile.yaml", "taskfile.yml", "taskfile.yaml"):
+    for name in TASKFILE_NAMES:
         candidate = repo_root / name
         if candidate.exists():
             taskfile = candidate
@@ -146,9 +136,8 @@ def detect_commands(repo_root: pathlib.Path, language: str) -> dict[str, str]:
 def detect_docs(repo_root: pathlib.Path) -> list[str]:
     docs: list[str] = []
     docs_dir = repo_root / "docs"
-    if docs_dir.exists():
-        for path in sorted(docs_dir.rglob("*.md")):
-            docs.append(str(path.relative_to(repo_root)))
+    if docs_dir.is_dir():
+        docs.extend(f"docs/{rel}" for rel in workspace_scan.iter_files(docs_dir, (".md",)))
     for rel in ("README.md", "AGENTS.md"):
         if (repo_root / rel).exists():
             docs.append(rel)
@@ -174,14 +163,15 @@ def generate_markdown(
     project: str,
     language: str,
     branch: str,
-    dirty: bool,
+    dirty: bool | None,
     dirs: list[str],
     files: list[str],
     entrypoints: list[str],
     commands: dict[str, str],
     docs: list[str],
+    generated: str = "",
 ) -> str:
-    now = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
+    now = generated or dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
     seeds = build_memory_seeds(repo_root, language, commands, entrypoints, docs)
 
     command_lines = "\n".join(f"- `{k}`: `{v}`" for k, v in commands.items()) or "- none detected"
@@ -199,7 +189,7 @@ def generate_markdown(
         f"- Repository: `{repo_root}`\n"
         f"- Generated: `{now}`\n"
         f"- Branch: `{branch or 'unknown'}`\n"
-        f"- Working tree dirty: `{'yes' if dirty else 'no'}`\n"
+        f"- Working tree dirty: `{'unknown' if dirty is None else 'yes' if dirty else 'no'}`\n"
         f"- Detected language: `{language}`\n\n"
         f"## Top-Level Structure\n\n"
         f"### Directories\n"
@@ -224,35 +214,192 @@ def generate_markdown(
     )
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Generate reusable repo onboarding context map.")
-    parser.add_argument("--repo", required=True, help="Repository root path")
-    parser.add_argument("--company", default="unknown-company", help="Company/organization label")
-    parser.add_argument("--project", default="", help="Project label (defaults to folder name)")
-    parser.add_argument("--language", default="auto", help="Language override (or 'auto')")
-    parser.add_argument("--output", default=".ai/context/repo_context.md", help="Output path relative to repo")
-    parser.add_argument("--force", action="store_true", help="Overwrite existing output")
-    parser.add_argument("--stdout", action="store_true", help="Print output to stdout")
-    args = parser.parse_args()
+def stat_key(path: pathlib.Path) -> list[int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def tree_key(root: pathlib.Path) -> list[list[Any]]:
+    """Directory mtimes under `root`: they change whenever an entry is added, removed or renamed."""
+    out: list[list[Any]] = []
+    stack = [str(root)]
+    while stack:
+        path = stack.pop()
+        try:
+            out.append([path, os.stat(path).st_mtime_ns])
+            with os.scandir(path) as entries:
+                stack.extend(
+                    entry.path
+                    for entry in entries
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in workspace_scan.IGNORE_DIRS
+                )
+        except OSError:
+            continue
+    return sorted(out)
 
-    repo_root = pathlib.Path(args.repo).expanduser().resolve()
-    if not repo_root.exists() or not repo_root.is_dir():
-        raise NotADirectoryError(f"invalid repo path: {repo_root}")
 
-    project = args.project or repo_root.name
-    language = detect_language(repo_root) if args.language == "auto" else args.language
-    dirs, files = list_top_level(repo_root)
-    entrypoints = detect_entrypoints(repo_root, language)
-    commands = detect_commands(repo_root, language)
-    docs = detect_docs(repo_root)
+def git_dirs(repo_root: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path] | None:
+    """(git dir, common dir) for a repo or worktree root; None when `repo_root` has no `.git`."""
+    git_dir = repo_root / ".git"
+    try:
+        if git_dir.is_file():
+            pointer = git_dir.read_text(encoding="utf-8").strip()
+            git_dir = (repo_root / pointer.removeprefix("gitdir:").strip()).resolve()
+        common = git_dir
+        if (git_dir / "commondir").exists():
+            common = (git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()).resolve()
+    except OSError:
+        return None
+    return (git_dir, common) if (git_dir / "HEAD").exists() else None
+
+
+def git_head_key(repo_root: pathlib.Path) -> list[Any] | None:
+    """HEAD plus the ref it points to, read from the git dir without running git."""
+    dirs = git_dirs(repo_root)
+    if dirs is None:
+        return None
+    git_dir, common = dirs
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    ref = head.removeprefix("ref:").strip() if head.startswith("ref:") else ""
+    loose = stat_key(common / ref) if ref else None
+    return [head, loose, stat_key(common / "packed-refs")]
+
+
+def git_branch(repo_root: pathlib.Path) -> str:
+    """Current branch as `git branch --show-current` prints it ('' when detached)."""
+    key = git_head_key(repo_root)
+    if key is None:
+        # Not a repo root (maybe nested in one): let git discover it.
+        return run(["git", "branch", "--show-current"], repo_root)
+    head = key[0]
+    return head.removeprefix("ref:").strip().removeprefix("refs/heads/") if head.startswith("ref:") else ""
+
+
+def git_dirty(repo_root: pathlib.Path, timeout: float) -> bool | None:
+    """
+    Whether the working tree has changes, or None when the probes outlive `timeout`.
+
+    Cheapest probe first, stopping at the first change: staged changes
+    (index vs HEAD, answered from the index's cache-tree), unstaged edits,
+    then untracked files. Index preloading is turned off so the unstaged
+    probe lstat()s entries in order and exits at the first modified one.
+    """
+    if git_dirs(repo_root) is None:
+        return bool(run(["git", "status", "--porcelain"], repo_root))
+    deadline = time.monotonic() + timeout
+    probes = (
+        ["git", "diff", "--cached", "--quiet", "--no-ext-diff", "HEAD", "--"],
+        ["git", "-c", "core.preloadIndex=false", "diff", "--quiet", "--no-ext-diff", "--"],
+        ["git", "ls-files", "--others", "--exclude-standard", "--directory", "--no-empty-directory"],
+    )
+    for cmd in probes:
+        try:
+            result = subprocess.run(
+                cmd,
+                cwd=str(repo_root),
+                check=False,
+                capture_output=True,
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        if result.returncode == 128 and "HEAD" in cmd:
+            # No commit yet: anything in the index counts as a change.
+            if run(["git", "ls-files", "--cached"], repo_root):
+                return True
+            continue
+        if result.returncode == 1 or result.stdout.strip():
+            return True
+    return False
+
+
+def cache_path_for(out_path: pathlib.Path) -> pathlib.Path:
+    return out_path.with_name(f".{out_path.stem}.cache.json")
+
+
+def load_cache(path: pathlib.Path) -> dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    return data
 
-    branch = run(["git", "branch", "--show-current"], repo_root)
-    status = run(["git", "status", "--porcelain"], repo_root)
-    dirty = bool(status.strip())
 
+def build_context_map(
+    repo_root: pathlib.Path,
+    company: str,
+    project: str,
+    language: str,
+    cache: dict[str, Any] | None = None,
+    git_timeout: float = 10.0,
+    git_cache_ttl: float = 0.0,
+) -> tuple[str, dict[str, Any]]:
+    """
+    Render the context map, reusing sections from `cache` whose fingerprints still match.
+
+    Returns the markdown and the cache to store for the next run. The
+    `Generated` timestamp only moves when some rendered input changed.
+    """
+    if not repo_root.exists() or not repo_root.is_dir():
+        raise NotADirectoryError(f"invalid repo path: {repo_root}")
+    previous = (cache or {}).get("sections", {})
+    sections: dict[str, Any] = {}
+
+    def section(name: str, key: Any, compute: Callable[[], Any]) -> Any:
+        # Round-trip through JSON so keys compare equal to the ones loaded from disk.
+        key = json.loads(json.dumps(key))
+        entry = previous.get(name)
+        value = entry["value"] if entry and entry.get("key") == key else json.loads(json.dumps(compute()))
+        sections[name] = {"key": key, "value": value}
+        return value
+
+    files_key = {name: stat_key(repo_root / name) for name in FINGERPRINT_FILES}
+    if language == "auto":
+        # Not a cached section: the source-file fallback is validated by workspace_scan's own cache.
+        language = detect_language(repo_root)
+    dirs, files = section("top_level", stat_key(repo_root), lambda: list_top_level(repo_root))
+    entry_key = [language, files_key, {rel: stat_key(repo_root / rel) for rel in ENTRYPOINT_CANDIDATES}]
+    entrypoints = section("entrypoints", entry_key, lambda: detect_entrypoints(repo_root, language))
+    commands = section("commands", [language, files_key], lambda: detect_commands(repo_root, language))
+    docs = section("docs", [files_key, tree_key(repo_root / "docs")], lambda: detect_docs(repo_root))
+    head_key = git_head_key(repo_root)
+    branch = section("branch", head_key, lambda: git_branch(repo_root)) if head_key else git_branch(repo_root)
+
+    # Working-tree edits leave no cheap trace, so a cached dirty flag is only trusted for `git_cache_ttl`
+    # seconds and only while HEAD and the index are unchanged.
+    git_paths = git_dirs(repo_root)
+    dirty_key = [head_key, stat_key(git_paths[0] / "index") if git_paths else None]
+    cached_dirty = previous.get("dirty", {})
+    if (
+        git_paths
+        and cached_dirty.get("key") == json.loads(json.dumps(dirty_key))
+        and cached_dirty.get("value") is not None
+        and time.time() - cached_dirty.get("checked", 0) < git_cache_ttl
+    ):
+        dirty = cached_dirty["value"]
+        sections["dirty"] = cached_dirty
+    else:
+        dirty = git_dirty(repo_root, git_timeout)
+        sections["dirty"] = {"key": json.loads(json.dumps(dirty_key)), "value": dirty, "checked": time.time()}
+
+    project = project or repo_root.name
+    section_keys = {name: entry["key"] for name, entry in sections.items() if name != "dirty"}
+    render_key = json.loads(json.dumps([company, project, language, branch, dirty, section_keys]))
+    if cache and cache.get("render_key") == render_key:
+        generated = cache.get("generated", "")
+    else:
+        generated = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S %Z")
     markdown = generate_markdown(
         repo_root=repo_root,
-        company=args.company,
+        company=company,
         project=project,
         language=language,
         branch=branch,
@@ -262,20 +409,195 @@ def main() -> int:
         entrypoints=entrypoints,
         commands=commands,
         docs=docs,
+        generated=generated,
     )
+    return markdown, {"version": CACHE_VERSION, "sections": sections, "render_key": render_key, "generated": generated}
 
-    if args.stdout:
-        print(markdown, end="")
-        return 0
 
-    out_path = pathlib.Path(args.output)
+def onboard_repo(
+    repo_root: pathlib.Path,
+    company: str,
+    project: str,
+    language: str,
+    output: str,
+    force: bool,
+    use_cache: bool = True,
+    git_timeout: float = 10.0,
+    git_cache_ttl: float = 0.0,
+) -> tuple[pathlib.Path, bool]:
+    """Detect, render and write the context map for one repository; returns the path and whether it was written."""
+    out_path = pathlib.Path(output)
     if not out_path.is_absolute():
         out_path = repo_root / out_path
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    if out_path.exists() and not args.force:
+    if out_path.exists() and not force:
         raise FileExistsError(f"output already exists: {out_path} (use --force to overwrite)")
-    out_path.write_text(markdown, encoding="utf-8")
-    print(f"Wrote context map: {out_path}")
+    cache_path = cache_path_for(out_path)
+    cache = load_cache(cache_path) if use_cache else {}
+    markdown, cache = build_context_map(repo_root, company, project, language, cache, git_timeout, git_cache_ttl)
+
+    try:
+        unchanged = out_path.read_text(encoding="utf-8") == markdown
+    except OSError:
+        unchanged = False
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if not unchanged:
+        out_path.write_text(markdown, encoding="utf-8")
+    if use_cache:
+        cache_text = json.dumps(cache, sort_keys=True) + "\n"
+        try:
+            stale = cache_path.read_text(encoding="utf-8") != cache_text
+        except OSError:
+            stale = True
+        if stale:
+            cache_path.write_text(cache_text, encoding="utf-8")
+    return out_path, not unchanged
+
+
+def onboard_worker(
+    repo: str,
+    company: str,
+    language: str,
+    output: str,
+    force: bool,
+    use_cache: bool,
+    git_timeout: float,
+    git_cache_ttl: float,
+) -> dict[str, Any]:
+    """Batch-mode unit of work; runs in a pool process and never raises."""
+    start = time.perf_counter()
+    repo_root = pathlib.Path(repo).expanduser().resolve()
+    result: dict[str, Any] = {"repo": str(repo_root), "status": "ok", "detail": ""}
+    try:
+        out_path, written = onboard_repo(
+            repo_root, company, "", language, output, force, use_cache, git_timeout, git_cache_ttl
+        )
+        result.update(status="ok" if written else "unchanged", detail=str(out_path))
+    except FileExistsError as exc:
+        result.update(status="skipped", detail=str(exc))
+    except Exception as exc:
+        # Any error, not just the expected ones: one bad repo must not stop the batch.
+        result.update(status="failed", detail=f"{type(exc).__name__}: {exc}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def read_repo_list(path: str) -> list[str]:
+    text = sys.stdin.read() if path == "-" else pathlib.Path(path).expanduser().read_text(encoding="utf-8")
+    repos: list[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            repos.append(line)
+    return repos
+
+
+def run_batch(repos: list[str], args: argparse.Namespace) -> int:
+    jobs = max(1, min(args.jobs, len(repos)))
+    task_args = [
+        (repo, args.company, args.language, args.output, args.force, not args.no_cache, args.git_timeout, args.git_cache_ttl)
+        for repo in repos
+    ]
+    counts = {"ok": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def report(done: int, result: dict[str, Any]) -> None:
+        counts[result["status"]] += 1
+        print(
+            f"[{done}/{len(repos)}] {result['status']:<9} {result['repo']} "
+            f"({result['seconds']:.2f}s) {result['detail']}",
+            file=sys.stderr if result["status"] == "failed" else sys.stdout,
+        )
+
+    if jobs == 1:
+        for done, task in enumerate(task_args, start=1):
+            report(done, onboard_worker(*task))
+    else:
+        # Imported here: it is the costliest import and single-repo runs (e.g. git hooks) never need it.
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(onboard_worker, *task) for task in task_args]
+            for done, future in enumerate(as_completed(futures), start=1):
+                report(done, future.result())
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Onboarded {len(repos)} repos in {elapsed:.2f}s with {jobs} jobs "
+        f"({len(repos) / elapsed if elapsed else 0.0:.1f} repos/s): "
+        f"{counts['ok']} written, {counts['unchanged']} unchanged, {counts['skipped']} skipped, "
+        f"{counts['failed']} failed"
+    )
+    return 1 if counts["failed"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate reusable repo onboarding context map.")
+    parser.add_argument("--repo", help="Repository root path")
+    parser.add_argument("--repos", nargs="+", default=[], help="Batch mode: repository root paths")
+    parser.add_argument("--repos-from", help="Batch mode: file with one repository path per line ('-' for stdin)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.environ.get("REPO_ONBOARD_JOBS", str(os.cpu_count() or 4))),
+        help="Batch mode: repositories processed in parallel (env: REPO_ONBOARD_JOBS)",
+    )
+    parser.add_argument("--company", default="unknown-company", help="Company/organization label")
+    parser.add_argument("--project", default="", help="Project label (defaults to folder name)")
+    parser.add_argument("--language", default="auto", help="Language override (or 'auto')")
+    parser.add_argument("--output", default=".ai/context/repo_context.md", help="Output path relative to repo")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing output")
+    parser.add_argument("--stdout", action="store_true", help="Print output to stdout")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every section and ignore the fingerprint cache kept next to the output",
+    )
+    parser.add_argument(
+        "--git-timeout",
+        type=float,
+        default=float(os.environ.get("REPO_ONBOARD_GIT_TIMEOUT_SEC", "10")),
+        help="Time budget for the dirty-tree probe; reported as 'unknown' when exceeded "
+        "(env: REPO_ONBOARD_GIT_TIMEOUT_SEC)",
+    )
+    parser.add_argument(
+        "--git-cache-ttl",
+        type=float,
+        default=float(os.environ.get("REPO_ONBOARD_GIT_CACHE_TTL_SEC", "0")),
+        help="Reuse the cached dirty flag for this many seconds while HEAD and the index are unchanged "
+        "(env: REPO_ONBOARD_GIT_CACHE_TTL_SEC)",
+    )
+    args = parser.parse_args()
+
+    repos = list(args.repos)
+    if args.repos_from:
+        repos += read_repo_list(args.repos_from)
+    if repos or not args.repo:
+        if args.repo:
+            repos.insert(0, args.repo)
+        if not repos:
+            parser.error("one of --repo, --repos or --repos-from is required")
+        if args.project or args.stdout:
+            parser.error("--project and --stdout apply to a single --repo")
+        return run_batch(repos, args)
+
+    repo_root = pathlib.Path(args.repo).expanduser().resolve()
+    if args.stdout:
+        markdown, _ = build_context_map(repo_root, args.company, args.project, args.language, None, args.git_timeout)
+        print(markdown, end="")
+        return 0
+
+    out_path, written = onboard_repo(
+        repo_root,
+        args.company,
+        args.project,
+        args.language,
+        args.output,
+        args.force,
+        not args.no_cache,
+        args.git_timeout,
+        args.git_cache_ttl,
+    )
+    print(f"{'Wrote' if written else 'Unchanged'} context map: {out_path}")
     return 0
 
 
@@ -4,6 +4,24 @@ set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 STACK_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
 BACKUP_PATH="${1:-}"
+BACKUP_INDEX="$STACK_ROOT/backups/index.json"
+
+# `--ago N`: the configs as they were before the Nth most recent apply (1 = latest).
+backup_from_index() {
+  local ago="$1"
+  BACKUP_INDEX="$BACKUP_INDEX" AGO="$ago" python3 - <<'PY'
+import json
+import os
+import sys
+from pathlib import Path
+index = Path(os.environ["BACKUP_INDEX"])
+ago = int(os.environ["AGO"])
+applies = json.loads(index.read_text()).get("applies", []) if index.exists() else []
+if ago < 1 or ago > len(applies):
+    sys.exit(f"No backup {ago} applies ago ({len(applies)} recorded in {index})")
+print(index.parent / applies[-ago]["dir"])
+PY
+}
 
 pick_latest_backup() {
   for f in \
@@ -23,12 +41,16 @@ pick_latest_backup() {
   return 1
 }
 
+if [ "$BACKUP_PATH" = "--ago" ]; then
+  BACKUP_PATH="$(backup_from_index "${2:-1}")" || exit 1
+fi
+
 if [ -z "$BACKUP_PATH" ]; then
   BACKUP_PATH="$(pick_latest_backup || true)"
 fi
 
 if [ -z "$BACKUP_PATH" ] || [ ! -d "$BACKUP_PATH" ]; then
-  echo "Backup path missing or invalid. Provide: $0 <backup_dir>" >&2
+  echo "Backup path missing or invalid. Provide: $0 <backup_dir> | --ago N" >&2
   exit 1
 fi
 
@@ -39,7 +61,12 @@ restore_if_exists() {
   local src="$1"
   local dst="$2"
   if [ -f "$src" ]; then
-    cp -a "$src" "$dst"
+    # Backup files may be read-only store blobs: copy the contents only, never their mode.
+    # An existing target keeps its own mode (earlier restores may have left it 0444).
+    if [ -e "$dst" ]; then
+      chmod u+w "$dst"
+    fi
+    cat "$src" >"$dst"
     echo "Restored $dst"
   fi
 }
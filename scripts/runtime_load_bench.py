@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Load generator for the runtime stress targets (`task quality:stress`).
+
+Requests go over pooled keep-alive HTTP/1.1 connections (one per concurrent
+sender), so results measure the services rather than process spawn and
+TCP/curl startup.
+
+Modes:
+  closed  `--concurrency` senders issue requests back to back until a target's runs are done
+  open    requests are scheduled at `--rate` per second regardless of completions; latency is
+          counted from the scheduled send time, so queueing behind a slow server is included.
+          Senders are sized to `--rate` x `--timeout` (at least `--concurrency`, at most
+          OPEN_MAX_SENDERS) so slow replies do not hold back the schedule; requests sent
+          late anyway are reported on stderr, since the offered rate then fell below `--rate`
+
+Rows are appended to report/data/final_runtime_perf.tsv. The leading columns are the
+historical ones (target, test, runs, ok, fail, avg_ms, p50_ms, p95_ms); p99_ms, max_ms,
+rps, concurrency and mode follow and are added to an older header in place (old rows get NA).
+
+`--stub` serves every target from an in-process stub server, for CI and harness checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import pathlib
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_PATH = pathlib.Path(__file__).resolve()
+STACK_ROOT = SCRIPT_PATH.parent.parent
+DEFAULT_OUT = STACK_ROOT / "report" / "data" / "final_runtime_perf.tsv"
+
+LEGACY_COLUMNS = ("target", "test", "runs", "ok", "fail", "avg_ms", "p50_ms", "p95_ms")
+COLUMNS = LEGACY_COLUMNS + ("p99_ms", "max_ms", "rps", "concurrency", "mode")
+
+# Service base URLs; RUNTIME_BENCH_<NAME>_URL overrides one (e.g. RUNTIME_BENCH_QDRANT_URL).
+SERVICES = {
+    "qdrant": "http://127.0.0.1:6333",
+    "archon": "http://127.0.0.1:18081",
+    "archon_mcp": "http://127.0.0.1:18051",
+    "docs_mcp": "http://127.0.0.1:16280",
+    "surreal_mcp": "http://127.0.0.1:18080",
+    "surrealdb": "http://127.0.0.1:18083",
+}
+# Upper bound on open-loop sender threads (and keep-alive connections) per target.
+OPEN_MAX_SENDERS = 1024
+# An open-loop request sent later than this after its scheduled time counts as late.
+OPEN_LATE_SEC = 0.01
+MCP_HEADERS = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+JSON_HEADERS = {"Content-Type": "application/json"}
+MCP_TOOLCALL = {"jsonrpc": "2.0", "id": 77, "method": "tools/call", "params": {"name": "health_check", "arguments": {}}}
+MCP_INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "stress", "version": "1.0"}},
+}
+VECTOR_SIZE = 8
+UPSERT_POINTS = 100
+SEARCH_QUERY = {"vector": [0.11, 0.22, 0.33, 0.44, 0.55, 0.66, 0.77, 0.88], "limit": 5}
+
+
+@dataclass
+class Target:
+    name: str
+    test: str
+    service: str
+    method: str
+    path: str
+    runs: int
+    allowed: tuple[int, ...] = (200,)
+    body: bytes | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def json_body(payload: object) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def upsert_body() -> bytes:
+    points = []
+    for i in range(1, UPSERT_POINTS + 1):
+        vec = [round(((i * j) % 17) / 17.0, 6) for j in range(1, VECTOR_SIZE + 1)]
+        points.append({"id": i, "vector": vec, "payload": {"label": f"p-{i}"}})
+    return json_body({"points": points})
+
+
+def probe_targets() -> list[Target]:
+    return [
+        Target("qdrant_api", "http_probe", "qdrant", "GET", "/healthz", 100),
+        Target("archon_health", "http_probe", "archon", "GET", "/health", 100),
+        Target("archon_mcp_health", "http_probe", "archon_mcp", "GET", "/health", 100),
+        Target("docs_mcp_ui", "http_probe", "docs_mcp", "GET", "/", 60),
+        Target("surreal_mcp_health", "http_probe", "surreal_mcp", "GET", "/health", 60),
+        Target("surrealdb_rpc_probe", "http_probe", "surrealdb", "GET", "/rpc", 60, allowed=(400,)),
+        Target(
+            "archon_mcp_toolcall",
+            "health_check_post",
+            "archon_mcp",
+            "POST",
+            "/mcp",
+            30,
+            body=json_body(MCP_TOOLCALL),
+            headers=MCP_HEADERS,
+        ),
+        Target(
+            "surreal_mcp_initialize",
+            "initialize_post",
+            "surreal_mcp",
+            "POST",
+            "/mcp",
+            30,
+            body=json_body(MCP_INITIALIZE),
+            headers=MCP_HEADERS,
+        ),
+    ]
+
+
+def vector_targets(collection: str) -> list[Target]:
+    points = f"/collections/{collection}/points"
+    return [
+        Target(
+            "qdrant_vector_stress",
+            f"upsert_batch_{UPSERT_POINTS}x10",
+            "qdrant",
+            "PUT",
+            f"{points}?wait=true",
+            10,
+            body=upsert_body(),
+            headers=JSON_HEADERS,
+        ),
+        Target(
+            "qdrant_vector_stress",
+            "search_200",
+            "qdrant",
+            "POST",
+            f"{points}/search",
+            200,
+            body=json_body(SEARCH_QUERY),
+            headers=JSON_HEADERS,
+        ),
+    ]
+
+
+def service_urls(stub_url: str | None) -> dict[str, str]:
+    if stub_url:
+        return {name: stub_url for name in SERVICES}
+    return {name: os.environ.get(f"RUNTIME_BENCH_{name.upper()}_URL", url) for name, url in SERVICES.items()}
+
+
+class ConnectionPool:
+    """Keep-alive connections to one host; a connection is dropped after any error or `Connection: close`."""
+
+    def __init__(self, base_url: str, timeout: float, headers: dict[str, str] | None = None) -> None:
+        parsed = urllib.parse.urlsplit(base_url)
+        self.https = parsed.scheme == "https"
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or (443 if self.https else 80)
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+
+    def acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            return cls(self.host, self.port, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            self.idle.put(conn)
+        else:
+            conn.close()
+
+    def fetch(self, method: str, path: str, body: bytes | None, headers: dict[str, str]) -> tuple[int, bytes]:
+        """Send one request; returns status and body, or (0, b"") on a transport error."""
+        conn = self.acquire()
+        try:
+            conn.request(method, self.prefix + path, body=body, headers={**self.headers, **headers})
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.release(conn, False)
+            return 0, b""
+        self.release(conn, not response.will_close)
+        return response.status, data
+
+    def request(self, method: str, path: str, body: bytes | None, headers: dict[str, str]) -> int:
+        return self.fetch(method, path, body, headers)[0]
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def percentile(values: list[float], pct: int) -> float:
+    """Nearest-rank percentile over sorted values, same rule as the former shell loop."""
+    idx = max(0, (len(values) * pct + 99) // 100 - 1)
+    return values[idx]
+
+
+def run_target(pool: ConnectionPool, target: Target, concurrency: int, rate: float) -> tuple[list[tuple[bool, float]], float]:
+    """Issue `target.runs` requests; `rate` > 0 selects the open-loop schedule."""
+    samples: list[tuple[bool, float]] = []
+    late: list[float] = []
+    counter = itertools.count()
+    headers = {"Connection": "keep-alive", **target.headers}
+    start = time.perf_counter()
+
+    def sender() -> None:
+        while True:
+            i = next(counter)
+            if i >= target.runs:
+                return
+            if rate > 0:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > OPEN_LATE_SEC:
+                    late.append(-delay)
+            else:
+                scheduled = time.perf_counter()
+            status = pool.request(target.method, target.path, target.body, headers)
+            samples.append((status in target.allowed, (time.perf_counter() - scheduled) * 1000.0))
+
+    senders = concurrency
+    if rate > 0:
+        # Each sender has one request in flight; rate x timeout of them keep the schedule even at the timeout.
+        senders = max(concurrency, min(OPEN_MAX_SENDERS, math.ceil(rate * pool.timeout)))
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(max(1, min(senders, target.runs)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if late:
+        print(
+            f"{target.name}: {len(late)}/{target.runs} requests sent late (up to {max(late) * 1000:.0f} ms) with "
+            f"{len(threads)} senders; the offered rate fell below --rate {rate:g}",
+            file=sys.stderr,
+        )
+    return samples, time.perf_counter() - start
+
+
+def summarize(target: Target, label: str, samples: list[tuple[bool, float]], wall: float, concurrency: int, mode: str) -> dict[str, str]:
+    latencies = sorted(ms for _, ms in samples)
+    ok = sum(1 for good, _ in samples if good)
+    row = {
+        "target": target.name,
+        "test": f"{target.test}_{label}",
+        "runs": str(len(samples)),
+        "ok": str(ok),
+        "fail": str(len(samples) - ok),
+        "concurrency": str(concurrency),
+        "mode": mode,
+    }
+    if not latencies:
+        row.update({column: "NA" for column in ("avg_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "rps")})
+        return row
+    row.update(
+        {
+            "avg_ms": f"{sum(latencies) / len(latencies):.3f}",
+            "p50_ms": f"{percentile(latencies, 50):.3f}",
+            "p95_ms": f"{percentile(latencies, 95):.3f}",
+            "p99_ms": f"{percentile(latencies, 99):.3f}",
+            "max_ms": f"{latencies[-1]:.3f}",
+            "rps": f"{len(latencies) / wall:.1f}" if wall > 0 else "NA",
+        }
+    )
+    return row
+
+
+def append_rows(path: pathlib.Path, rows: list[dict[str, str]]) -> None:
+    """
+    Append rows under the file's existing header. A header that is a prefix of
+    COLUMNS (the historical 8 columns) is extended first, padding old rows with NA.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    header = tuple(lines[0].split("\t")) if lines else ()
+    if not header or (header != COLUMNS and COLUMNS[: len(header)] == header):
+        pad = "\tNA" * (len(COLUMNS) - len(header))
+        body = [line + pad for line in lines[1:] if line]
+        tmp = path.with_name(f"{path.name}.tmp")
+        tmp.write_text("\n".join(["\t".join(COLUMNS), *body]) + "\n", encoding="utf-8")
+        tmp.replace(path)
+        header = COLUMNS
+    with path.open("a", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write("\t".join(row.get(column, "NA") for column in header) + "\n")
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """Quiet keep-alive HTTP/1.1 handler with JSON replies; shared with embed_sidecar.py."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, delayed ACKs add ~40ms per response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        # The default writes a stderr line per request.
+        return
+
+    def reply(self, status: int, payload: object) -> None:
+        body = json_body(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+
+class StubHandler(JsonHandler):
+    """Answers every benchmark route with a canned keep-alive response."""
+
+    def do_GET(self) -> None:
+        if self.path == "/rpc":
+            self.reply(400, {"error": "websocket upgrade required"})
+        elif self.path in ("/", "/health", "/healthz"):
+            self.reply(200, {"status": "ok"})
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        body = self.read_body()
+        if self.path == "/mcp":
+            try:
+                message = json.loads(body)
+            except ValueError:
+                self.reply(400, {"error": "invalid json"})
+                return
+            if message.get("method") == "initialize":
+                result = {"protocolVersion": "2025-06-18", "capabilities": {}, "serverInfo": {"name": "stub", "version": "0"}}
+            else:
+                result = {"content": [{"type": "text", "text": "ok"}]}
+            self.reply(200, {"jsonrpc": "2.0", "id": message.get("id"), "result": result})
+        elif self.path.startswith("/collections/") and self.path.endswith("/points/search"):
+            hits = [{"id": i, "score": 1.0 - i / 10, "version": 0} for i in range(1, SEARCH_QUERY["limit"] + 1)]
+            self.reply(200, {"result": hits, "status": "ok", "time": 0.0})
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_PUT(self) -> None:
+        self.read_body()
+        if self.path.startswith("/collections/"):
+            self.reply(200, {"result": True, "status": "ok", "time": 0.0})
+        else:
+            self.reply(404, {"error": "not found"})
+
+    def do_DELETE(self) -> None:
+        self.do_PUT()
+
+
+def start_stub() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Keep-alive load benchmark for the runtime stress targets.")
+    parser.add_argument(
+        "--out",
+        default=os.environ.get("RUNTIME_BENCH_OUT", ""),
+        help=f"TSV to append to (default: {DEFAULT_OUT}; `-` prints only; --stub defaults to `-`)",
+    )
+    parser.add_argument("--label", default=os.environ.get("RUNTIME_BENCH_LABEL", ""), help="Suffix for the test column")
+    parser.add_argument(
+        "--mode",
+        choices=("closed", "open"),
+        default=os.environ.get("RUNTIME_BENCH_MODE", "closed"),
+        help="closed: back-to-back senders; open: fixed arrival --rate",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.environ.get("RUNTIME_BENCH_CONCURRENCY", "1")),
+        help="Concurrent senders (and keep-alive connections) per target; in open mode the minimum, "
+        "raised to --rate x --timeout",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=float(os.environ.get("RUNTIME_BENCH_RATE", "0")),
+        help="Requests per second in open-loop mode; stderr reports requests that could not be sent on schedule",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=int(os.environ.get("RUNTIME_BENCH_RUNS", "0")),
+        help="Requests per target (default: the per-target counts of the former shell loop)",
+    )
+    parser.add_argument(
+        "--targets",
+        default=os.environ.get("RUNTIME_BENCH_TARGETS", ""),
+        help="Comma-separated target names to run (default: all; `qdrant_vector_stress` selects upsert/search)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=float(os.environ.get("RUNTIME_BENCH_TIMEOUT_SEC", "10")),
+        help="Per-request socket timeout in seconds",
+    )
+    parser.add_argument("--stub", action="store_true", help="Benchmark an in-process stub server instead of the stack")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when any request failed")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.mode == "open" and args.rate <= 0:
+        print("--mode open requires --rate > 0", file=sys.stderr)
+        return 2
+    rate = args.rate if args.mode == "open" else 0.0
+    label = args.label or f"refresh_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    out = args.out or ("-" if args.stub else str(DEFAULT_OUT))
+
+    stub = None
+    stub_url = None
+    if args.stub:
+        stub, stub_url = start_stub()
+    urls = service_urls(stub_url)
+    pools = {name: ConnectionPool(url, args.timeout) for name, url in urls.items()}
+
+    collection = "stress_" + "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in label)
+    targets = probe_targets() + vector_targets(collection)
+    if args.targets:
+        wanted = {name.strip() for name in args.targets.split(",") if name.strip()}
+        unknown = wanted - {target.name for target in targets}
+        if unknown:
+            print(f"unknown targets: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 2
+        targets = [target for target in targets if target.name in wanted]
+    if args.runs > 0:
+        targets = [replace(target, runs=args.runs) for target in targets]
+
+    rows: list[dict[str, str]] = []
+    vector = [target for target in targets if target.name == "qdrant_vector_stress"]
+    qdrant = pools["qdrant"]
+    if vector:
+        create = json_body({"vectors": {"size": VECTOR_SIZE, "distance": "Cosine"}})
+        qdrant.request("PUT", f"/collections/{collection}", create, JSON_HEADERS)
+    print("\t".join(COLUMNS))
+    try:
+        for target in targets:
+            samples, wall = run_target(pools[target.service], target, args.concurrency, rate)
+            row = summarize(target, label, samples, wall, args.concurrency, args.mode)
+            rows.append(row)
+            print("\t".join(row[column] for column in COLUMNS), flush=True)
+    finally:
+        if vector:
+            qdrant.request("DELETE", f"/collections/{collection}", None, {})
+        for pool in pools.values():
+            pool.close()
+        if stub is not None:
+            stub.shutdown()
+
+    if out != "-":
+        append_rows(pathlib.Path(out), rows)
+        print(f"Appended {len(rows)} rows to: {out}")
+    print(f"Label: {label}")
+    if args.check and any(row["fail"] != "0" for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,14 +2,24 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
 import pathlib
+import re
 import shlex
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
-from typing import Any, Dict, List
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import jsonc
+import stack_manifest
 
 HOME = pathlib.Path.home()
 SCRIPT_PATH = pathlib.Path(__file__).resolve()
@@ -17,6 +27,26 @@ STACK_ROOT = SCRIPT_PATH.parent.parent
 MANIFEST_PATH = STACK_ROOT / "configs" / "mcp_stack_manifest.json"
 LOG_ROOT = STACK_ROOT / "logs"
 BACKUP_ROOT = STACK_ROOT / "backups"
+BACKUP_OBJECTS = BACKUP_ROOT / "objects"
+BACKUP_INDEX = BACKUP_ROOT / "index.json"
+BACKUP_INDEX_VERSION = 1
+BACKUP_TARGETS = {
+    "codex.config.toml": HOME / ".codex" / "config.toml",
+    "codex-eval.config.toml": HOME / ".codex-mcp-eval" / "config.toml",
+    "claude.json": HOME / ".claude.json",
+    "opencode.jsonc": HOME / ".config" / "opencode" / "opencode.jsonc",
+}
+CLAUDE_CONFIG = HOME / ".claude.json"
+OPENCODE_CONFIG = HOME / ".config" / "opencode" / "opencode.jsonc"
+STATE_PATH = STACK_ROOT / ".stack-apply-state.json"
+STATE_VERSION = 1
+WRITER_MODES = ("auto", "native", "cli")
+TOML_HEADER_RE = re.compile(r"^\s*\[\[?\s*(?P<key>[^\[\]]+?)\s*\]\]?\s*(?:#.*)?$")
+TOML_BARE_KEY_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class NativeWriterUnsupported(RuntimeError):
+    """The config file has a shape the in-process writer will not edit; use the CLI instead."""
 
 
 def run(cmd: List[str], env: Dict[str, str] | None = None, check: bool = True) -> subprocess.CompletedProcess:
@@ -34,39 +64,84 @@ def now_stamp() -> str:
     return time.strftime("%Y%m%d-%H%M%S")
 
 
-def resolve_tokens(value: Any) -> Any:
-    if isinstance(value, str):
-        return (
-            value
-            .replace("${STACK_ROOT}", str(STACK_ROOT))
-            .replace("${HOME}", str(HOME))
-        )
-    if isinstance(value, list):
-        return [resolve_tokens(v) for v in value]
-    if isinstance(value, dict):
-        return {k: resolve_tokens(v) for k, v in value.items()}
-    return value
-
-
 def load_manifest() -> dict:
-    raw = json.loads(MANIFEST_PATH.read_text())
-    return resolve_tokens(raw)
-
-
-def backup_files(stamp: str) -> pathlib.Path:
-    backup_dir = BACKUP_ROOT / f"stack-apply-{stamp}"
-    backup_dir.mkdir(parents=True, exist_ok=True)
-
-    targets = {
-        "codex.config.toml": HOME / ".codex" / "config.toml",
-        "codex-eval.config.toml": HOME / ".codex-mcp-eval" / "config.toml",
-        "claude.json": HOME / ".claude.json",
-        "opencode.jsonc": HOME / ".config" / "opencode" / "opencode.jsonc",
-    }
-    for dst, src in targets.items():
-        if src.exists():
-            (backup_dir / dst).write_text(src.read_text())
-
+    return stack_manifest.load_manifest(MANIFEST_PATH)
+
+
+def load_backup_index() -> List[Dict[str, Any]]:
+    try:
+        data = json.loads(BACKUP_INDEX.read_text())
+    except (FileNotFoundError, ValueError):
+        return []
+    if not isinstance(data, dict) or data.get("version") != BACKUP_INDEX_VERSION:
+        return []
+    return data.get("applies", [])
+
+
+def store_backup_blob(data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    blob = BACKUP_OBJECTS / digest[:2] / digest
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=blob.parent, prefix=f".{digest}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        # Blobs are shared by hardlink across backup dirs; keep them immutable.
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, blob)
+    return digest
+
+
+def link_backup_blob(digest: str, dst: pathlib.Path) -> None:
+    blob = BACKUP_OBJECTS / digest[:2] / digest
+    try:
+        os.link(blob, dst)
+    except OSError:
+        shutil.copyfile(blob, dst)
+
+
+def gc_backups(applies: List[Dict[str, Any]], keep: int) -> List[Dict[str, Any]]:
+    """Drop index entries beyond the newest `keep` (0 keeps all), then the dirs and blobs only they used."""
+    if keep <= 0 or len(applies) <= keep:
+        return applies
+    dropped, kept = applies[:-keep], applies[-keep:]
+    live_dirs = {entry["dir"] for entry in kept}
+    live_blobs = {digest for entry in kept for digest in entry["files"].values()}
+    for entry in dropped:
+        if entry["dir"] not in live_dirs:
+            shutil.rmtree(BACKUP_ROOT / entry["dir"], ignore_errors=True)
+    for digest in {digest for entry in dropped for digest in entry["files"].values()} - live_blobs:
+        (BACKUP_OBJECTS / digest[:2] / digest).unlink(missing_ok=True)
+    return kept
+
+
+def backup_files(stamp: str, profile: str, keep: int) -> pathlib.Path:
+    """
+    Content-addressed backup of the agent configs.
+
+    File contents are stored once under `backups/objects/`; each apply appends
+    an entry to `backups/index.json` and points at a `stack-apply-<stamp>` dir of
+    hardlinks. Applies that see the same contents as an earlier one reuse its dir.
+    """
+    files = {name: store_backup_blob(src.read_bytes()) for name, src in BACKUP_TARGETS.items() if src.exists()}
+    applies = load_backup_index()
+    by_files = {json.dumps(entry["files"], sort_keys=True): entry["dir"] for entry in applies}
+    dir_name = by_files.get(json.dumps(files, sort_keys=True))
+    if dir_name is None or not (BACKUP_ROOT / dir_name).is_dir():
+        dir_name = f"stack-apply-{stamp}"
+        suffix = 1
+        while (BACKUP_ROOT / dir_name).exists():
+            dir_name = f"stack-apply-{stamp}-{suffix}"
+            suffix += 1
+        backup_dir = BACKUP_ROOT / dir_name
+        backup_dir.mkdir(parents=True)
+        for name, digest in files.items():
+            link_backup_blob(digest, backup_dir / name)
+    backup_dir = BACKUP_ROOT / dir_name
+
+    applies.append({"stamp": stamp, "profile": profile, "dir": dir_name, "files": files})
+    applies = gc_backups(applies, keep)
+    atomic_write_text(BACKUP_INDEX, json.dumps({"version": BACKUP_INDEX_VERSION, "applies": applies}, indent=2) + "\n")
     (STACK_ROOT / ".latest-stack-apply-backup").write_text(str(backup_dir) + "\n")
     return backup_dir
 
@@ -137,60 +212,488 @@ def claude_add_profile(profile_servers: List[str], servers: dict) -> None:
         run(cmd)
 
 
-def load_opencode_jsonc(path: pathlib.Path) -> dict:
-    node_script = r'''
-const fs = require('fs');
-const vm = require('vm');
-const p = process.argv[1];
-const txt = fs.readFileSync(p, 'utf8');
-let obj;
-try {
-  obj = vm.runInNewContext('(' + txt + ')', {}, { timeout: 1000 });
-} catch (e) {
-  obj = JSON.parse(txt);
-}
-process.stdout.write(JSON.stringify(obj));
-'''
-    cp = subprocess.run(["node", "-e", node_script, str(path)], text=True, capture_output=True)
-    if cp.returncode != 0:
-        raise RuntimeError(f"failed to parse opencode config: {cp.stderr}")
-    return json.loads(cp.stdout)
+def atomic_write_text(path: pathlib.Path, text: str) -> bool:
+    """Replace `path` with `text` via a same-directory temp file; returns False when content is unchanged."""
+    # Write through symlinks (dotfile managers): replace the real file, not the link.
+    path = path.resolve()
+    try:
+        if path.read_text() == text:
+            return False
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def toml_key(key: str) -> str:
+    return key if TOML_BARE_KEY_RE.match(key) else json.dumps(key, ensure_ascii=False)
+
+
+def toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        # JSON string escapes are a subset of TOML basic-string escapes.
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, list):
+        return "[" + ", ".join(toml_value(v) for v in value) + "]"
+    raise NativeWriterUnsupported(f"cannot render {type(value).__name__} as TOML")
+
+
+def split_toml_key(key: str) -> List[str]:
+    parts: List[str] = []
+    for match in re.finditer(r'\s*("(?:[^"\\]|\\.)*"|\'[^\']*\'|[^.]+?)\s*(?:\.|$)', key):
+        part = match.group(1)
+        if part.startswith('"'):
+            part = json.loads(part)
+        elif part.startswith("'"):
+            part = part[1:-1]
+        parts.append(part)
+    return parts
+
+
+def codex_server_entry(spec: dict) -> Dict[str, Any]:
+    """The `[mcp_servers.<name>]` table `codex mcp add` + codex_set_timeouts would produce."""
+    if spec["kind"] == "http":
+        return {"url": spec["url"]}
+    entry: Dict[str, Any] = {"command": spec["command"], "args": list(spec.get("args", []))}
+    if spec.get("env"):
+        entry["env"] = dict(spec["env"])
+    if spec.get("startup_timeout_sec") is not None:
+        entry["startup_timeout_sec"] = int(spec["startup_timeout_sec"])
+    return entry
+
+
+def render_codex_server(name: str, entry: Dict[str, Any]) -> str:
+    header = f"mcp_servers.{toml_key(name)}"
+    lines = [f"[{header}]"]
+    lines += [f"{toml_key(k)} = {toml_value(v)}" for k, v in entry.items() if not isinstance(v, dict)]
+    for key, table in entry.items():
+        if isinstance(table, dict):
+            lines += ["", f"[{header}.{toml_key(key)}]"]
+            lines += [f"{toml_key(k)} = {toml_value(v)}" for k, v in table.items()]
+    return "\n".join(lines) + "\n"
+
+
+def codex_render_config(text: str, profile_servers: List[str], servers: dict, managed: List[str]) -> str:
+    """
+    Drop every managed/profile `[mcp_servers.*]` table from `text` and append the profile's tables.
+
+    Everything else is kept byte-for-byte. The result is re-parsed and compared
+    with the intended document; any mismatch (dotted keys, inline tables, odd
+    multi-line values) raises NativeWriterUnsupported.
+    """
+    drop = set(managed) | set(profile_servers)
+    try:
+        before = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as exc:
+        raise NativeWriterUnsupported(f"config.toml does not parse: {exc}") from exc
+
+    kept: List[str] = []
+    skipping = False
+    for line in text.splitlines(keepends=True):
+        header = TOML_HEADER_RE.match(line)
+        if header:
+            path = split_toml_key(header.group("key"))
+            skipping = len(path) >= 2 and path[0] == "mcp_servers" and path[1] in drop
+        if not skipping:
+            kept.append(line)
+    body = "".join(kept).rstrip()
+
+    entries = {name: codex_server_entry(servers[name]["codex"]) for name in profile_servers}
+    sections = [render_codex_server(name, entry) for name, entry in entries.items()]
+    result = "\n\n".join(part for part in [body, *(sec.rstrip() for sec in sections)] if part) + "\n"
+    if not body and not sections:
+        result = ""
+
+    expected = dict(before)
+    mcp = {k: v for k, v in (before.get("mcp_servers") or {}).items() if k not in drop}
+    mcp.update(entries)
+    expected.pop("mcp_servers", None)
+    if mcp:
+        expected["mcp_servers"] = mcp
+    try:
+        after = tomllib.loads(result)
+    except tomllib.TOMLDecodeError as exc:
+        raise NativeWriterUnsupported(f"rendered config.toml does not parse: {exc}") from exc
+    if after.get("mcp_servers") == {}:
+        after.pop("mcp_servers")
+    if after != expected:
+        raise NativeWriterUnsupported("config.toml layout is not safe to edit in-process")
+    return result
+
+
+def codex_write_native(home_dir: pathlib.Path, profile_servers: List[str], servers: dict, managed: List[str]) -> None:
+    cfg = home_dir / "config.toml"
+    text = cfg.read_text() if cfg.exists() else ""
+    atomic_write_text(cfg, codex_render_config(text, profile_servers, servers, managed))
 
 
-def write_opencode(path: pathlib.Path, data: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2) + "\n")
+def claude_server_entry(spec: dict) -> Dict[str, Any]:
+    """The user-scope `mcpServers` entry `claude mcp add` would produce."""
+    transport = spec["transport"]
+    if transport in {"http", "sse"}:
+        return {"type": transport, "url": spec["url"]}
+    command = spec["command"]
+    return {"type": "stdio", "command": command[0], "args": list(command[1:]), "env": dict(spec.get("env", {}))}
 
 
-def opencode_apply(profile_servers: List[str], servers: dict, managed: List[str]) -> None:
-    path = HOME / ".config" / "opencode" / "opencode.jsonc"
-    obj = load_opencode_jsonc(path) if path.exists() else {}
+def claude_write_native(profile_servers: List[str], servers: dict, managed: List[str]) -> None:
+    path = CLAUDE_CONFIG
+    try:
+        obj = json.loads(path.read_text()) if path.exists() else {}
+    except ValueError as exc:
+        raise NativeWriterUnsupported(f"{path} is not valid JSON: {exc}") from exc
     if not isinstance(obj, dict):
-        obj = {}
-    mcp = obj.get("mcp")
+        raise NativeWriterUnsupported(f"{path} is not a JSON object")
+    mcp = obj.get("mcpServers")
     if not isinstance(mcp, dict):
         mcp = {}
-    for name in managed:
+    for name in [*managed, *profile_servers]:
         mcp.pop(name, None)
     for name in profile_servers:
-        mcp[name] = servers[name]["opencode"]
-    obj["mcp"] = mcp
-    write_opencode(path, obj)
+        mcp[name] = claude_server_entry(servers[name]["claude"])
+    obj["mcpServers"] = mcp
+    atomic_write_text(path, json.dumps(obj, indent=2, ensure_ascii=False) + "\n")
 
 
-def log_snapshots(stamp: str, codex_targets: List[pathlib.Path]) -> None:
-    LOG_ROOT.mkdir(parents=True, exist_ok=True)
+def with_cli_fallback(writer: str, name: str, native: Callable[[], None], cli: Callable[[], None]) -> Callable[[], None]:
+    def _apply() -> None:
+        if writer == "cli":
+            cli()
+            return
+        try:
+            native()
+        except NativeWriterUnsupported as exc:
+            if writer == "native":
+                raise
+            print(f"[{name}] native writer skipped ({exc}); falling back to CLI", file=sys.stderr)
+            cli()
+
+    return _apply
+
+
+def load_opencode_jsonc(path: pathlib.Path) -> dict:
+    try:
+        return jsonc.loads(path.read_text() or "{}")
+    except ValueError as exc:
+        raise RuntimeError(f"failed to parse opencode config: {exc}") from exc
+
+
+def write_opencode(path: pathlib.Path, text: str) -> None:
+    atomic_write_text(path, text if text.endswith("\n") else text + "\n")
+
+
+def opencode_apply(profile_servers: List[str], servers: dict, managed: List[str]) -> None:
+    """Edit the `mcp` block of opencode.jsonc in place; comments and unrelated keys are kept as written."""
+    path = OPENCODE_CONFIG
+    text = path.read_text() if path.exists() else ""
+    try:
+        doc = jsonc.JsoncDocument(text if text.strip() else "{}")
+    except ValueError as exc:
+        raise RuntimeError(f"failed to parse opencode config: {exc}") from exc
+    if not isinstance(doc.data, dict):
+        doc = jsonc.JsoncDocument("{}")
+    if not isinstance(doc.data.get("mcp"), dict):
+        doc.set(("mcp",), {})
+    for name in managed:
+        doc.delete(("mcp", name))
+    for name in profile_servers:
+        doc.set(("mcp", name), servers[name]["opencode"])
+    write_opencode(path, doc.text)
+
+
+def snapshot_commands(codex_targets: List[pathlib.Path]) -> List[Dict[str, Any]]:
+    """`mcp list` per agent, each with the config file whose fingerprint lets a listing be reused."""
+    commands: List[Dict[str, Any]] = []
     for target in codex_targets:
-        env = os.environ.copy()
-        env["CODEX_HOME"] = str(target)
-        cp = run(["codex", "mcp", "list"], env=env, check=False)
-        (LOG_ROOT / f"codex_mcp_list_{target.name}_{stamp}.txt").write_text(cp.stdout + cp.stderr)
+        commands.append(
+            {
+                "name": f"codex:{target.name}",
+                "cmd": ["codex", "mcp", "list"],
+                "env": {"CODEX_HOME": str(target)},
+                "config": target / "config.toml",
+            }
+        )
+    commands.append({"name": "claude", "cmd": ["claude", "mcp", "list"], "env": {}, "config": CLAUDE_CONFIG})
+    commands.append({"name": "opencode", "cmd": ["opencode", "mcp", "list"], "env": {}, "config": OPENCODE_CONFIG})
+    return commands
+
+
+def latest_snapshot() -> Dict[str, Any]:
+    snapshots = sorted(LOG_ROOT.glob("mcp_list_snapshot_*.json"))
+    if not snapshots:
+        return {}
+    try:
+        return json.loads(snapshots[-1].read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def run_snapshot_command(command: Dict[str, Any], timeout: float, previous: Dict[str, Any] | None) -> Dict[str, Any]:
+    fingerprint = file_fingerprint(command["config"])
+    entry: Dict[str, Any] = {
+        "name": command["name"],
+        "command": command["cmd"],
+        "config": str(command["config"]),
+        "config_fingerprint": fingerprint,
+        "cached": False,
+    }
+    if (
+        previous
+        and fingerprint is not None
+        and previous.get("config_fingerprint") == fingerprint
+        and previous.get("returncode") == 0
+    ):
+        # Config untouched since the last listing: reuse it instead of paying another CLI cold start.
+        entry.update({k: previous.get(k) for k in ("returncode", "stdout", "stderr")})
+        entry.update({"cached": True, "timed_out": False, "duration_ms": 0.0, "listed_at": previous.get("listed_at")})
+        return entry
+
+    env = os.environ.copy()
+    env.update(command["env"])
+    started = time.perf_counter()
+    entry["listed_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    try:
+        cp = subprocess.run(command["cmd"], env=env, text=True, capture_output=True, timeout=timeout)
+        entry.update({"returncode": cp.returncode, "stdout": cp.stdout, "stderr": cp.stderr, "timed_out": False})
+    except subprocess.TimeoutExpired as exc:
+        entry.update(
+            {
+                "returncode": None,
+                "stdout": exc.stdout.decode(errors="replace") if isinstance(exc.stdout, bytes) else exc.stdout or "",
+                "stderr": f"timed out after {timeout:g}s",
+                "timed_out": True,
+            }
+        )
+    except OSError as exc:
+        entry.update({"returncode": None, "stdout": "", "stderr": str(exc), "timed_out": False})
+    entry["duration_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    return entry
+
 
-    cp_claude = run(["claude", "mcp", "list"], check=False)
-    (LOG_ROOT / f"claude_mcp_list_{stamp}.txt").write_text(cp_claude.stdout + cp_claude.stderr)
+def log_snapshots(stamp: str, codex_targets: List[pathlib.Path], timeout: float) -> pathlib.Path:
+    """
+    Run every agent's `mcp list` concurrently and write one JSON snapshot for this apply.
 
-    cp_opencode = run(["opencode", "mcp", "list"], check=False)
-    (LOG_ROOT / f"opencode_mcp_list_{stamp}.txt").write_text(cp_opencode.stdout + cp_opencode.stderr)
+    Each command gets its own timeout; a listing whose agent config has not
+    changed since the previous snapshot is copied from it (`cached: true`).
+    """
+    LOG_ROOT.mkdir(parents=True, exist_ok=True)
+    previous = {c.get("name"): c for c in latest_snapshot().get("commands", []) if isinstance(c, dict)}
+    commands = snapshot_commands(codex_targets)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(commands), thread_name_prefix="mcp-list") as pool:
+        entries = list(pool.map(lambda c: run_snapshot_command(c, timeout, previous.get(c["name"])), commands))
+    snapshot = {
+        "stamp": stamp,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+        "timeout_sec": timeout,
+        "commands": entries,
+    }
+    path = LOG_ROOT / f"mcp_list_snapshot_{stamp}.json"
+    atomic_write_text(path, json.dumps(snapshot, indent=2) + "\n")
+    return path
+
+
+def spawn_background_snapshot(stamp: str, args: argparse.Namespace) -> pathlib.Path:
+    log_path = LOG_ROOT / f"mcp_list_snapshot_{stamp}.log"
+    LOG_ROOT.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [
+                sys.executable,
+                str(SCRIPT_PATH),
+                args.profile,
+                "--codex-target",
+                args.codex_target,
+                "--snapshot-timeout",
+                str(args.snapshot_timeout),
+                "--snapshot-only",
+                stamp,
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    return LOG_ROOT / f"mcp_list_snapshot_{stamp}.json"
+
+
+def take_snapshot(stamp: str, codex_homes: List[pathlib.Path], args: argparse.Namespace) -> None:
+    if args.no_snapshot:
+        return
+    if args.async_snapshot:
+        print(f"Snapshot: running in background -> {spawn_background_snapshot(stamp, args)}")
+        return
+    path = log_snapshots(stamp, codex_homes, args.snapshot_timeout)
+    snapshot = json.loads(path.read_text())
+    failed = [c["name"] for c in snapshot["commands"] if c.get("returncode") != 0]
+    cached = sum(1 for c in snapshot["commands"] if c.get("cached"))
+    print(
+        f"Snapshot: {path} ({len(snapshot['commands'])} listings, {cached} cached, "
+        f"{snapshot['duration_ms']:.0f} ms{'; failed: ' + ', '.join(failed) if failed else ''})"
+    )
+
+
+Step = Tuple[str, Callable[[], None]]
+
+
+def entry_hash(entry: Any) -> str:
+    return hashlib.sha256(json.dumps(entry, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: pathlib.Path) -> List[int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_state() -> Dict[str, Any]:
+    try:
+        state = json.loads(STATE_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return {}
+    targets = state.get("targets")
+    return targets if isinstance(targets, dict) else {}
+
+
+def save_state(targets: Dict[str, Any]) -> None:
+    atomic_write_text(STATE_PATH, json.dumps({"version": STATE_VERSION, "targets": targets}, indent=2, sort_keys=True) + "\n")
+
+
+def agent_entry(agent: str, spec: dict) -> Any:
+    """What the agent's config file holds for a server once applied; its hash is the applied-state key."""
+    if agent == "codex":
+        return codex_server_entry(spec["codex"])
+    if agent == "claude":
+        return claude_server_entry(spec["claude"])
+    return spec["opencode"]
+
+
+def read_applied_entries(agent: str, path: pathlib.Path) -> Dict[str, Any]:
+    """Server entries currently in an agent config file, keyed by name."""
+    if not path.exists():
+        return {}
+    if agent == "codex":
+        table = tomllib.loads(path.read_text()).get("mcp_servers")
+    elif agent == "claude":
+        table = json.loads(path.read_text()).get("mcpServers")
+    else:
+        table = load_opencode_jsonc(path).get("mcp")
+    return table if isinstance(table, dict) else {}
+
+
+def plan_target(
+    agent: str,
+    path: pathlib.Path,
+    saved: Dict[str, Any] | None,
+    desired: Dict[str, str],
+    managed: List[str],
+    force: bool,
+) -> Dict[str, List[str]]:
+    """
+    Diff one agent config against the profile.
+
+    The saved state is trusted while the file's mtime/size still match what was
+    recorded after the last apply; otherwise the file itself is read (catching
+    edits made by hand or by the agent CLI). Unreadable files, or --force, fall
+    back to the full remove-all-managed/re-add-profile apply.
+    """
+    names = set(managed) | set(desired)
+    current: Dict[str, str] | None = None
+    if not force:
+        if saved and saved.get("fingerprint") == file_fingerprint(path):
+            current = dict(saved.get("servers") or {})
+            names |= set(current)
+        else:
+            try:
+                entries = read_applied_entries(agent, path)
+            except (OSError, ValueError, RuntimeError, AttributeError, tomllib.TOMLDecodeError):
+                current = None
+            else:
+                names |= set((saved or {}).get("servers") or {})
+                current = {name: entry_hash(entries[name]) for name in names if name in entries}
+    if current is None:
+        return {"add": list(desired), "remove": sorted(set(managed) - set(desired)), "update": []}
+    return {
+        "add": [n for n in desired if n not in current],
+        "remove": sorted(n for n in current if n not in desired),
+        "update": [n for n in desired if n in current and current[n] != desired[n]],
+    }
+
+
+def describe_plan(plan: Dict[str, List[str]]) -> str:
+    parts = [f"{sign}{name}" for key, sign in (("add", "+"), ("update", "~"), ("remove", "-")) for name in plan[key]]
+    return " ".join(parts) if parts else "no changes"
+
+
+def run_pipeline(name: str, steps: List[Step]) -> List[Dict[str, Any]]:
+    """Run one agent/home pipeline's steps in order; a failing step stops only this pipeline."""
+    results: List[Dict[str, Any]] = []
+    for step, fn in steps:
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:  # isolate failures per pipeline
+            results.append({"pipeline": name, "step": step, "seconds": time.perf_counter() - started, "error": str(exc)})
+            break
+        results.append({"pipeline": name, "step": step, "seconds": time.perf_counter() - started, "error": ""})
+    return results
+
+
+def run_pipelines(pipelines: Dict[str, List[Step]], jobs: int) -> List[Dict[str, Any]]:
+    """
+    Run independent pipelines concurrently with at most `jobs` in flight.
+
+    Each pipeline touches its own config file (one per Codex home, ~/.claude.json,
+    opencode.jsonc), so pipelines never race; steps inside one stay serial.
+    """
+    if not pipelines:
+        return []
+    workers = max(1, min(jobs, len(pipelines)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stack-apply") as pool:
+        futures = [pool.submit(run_pipeline, name, steps) for name, steps in pipelines.items()]
+        return [result for future in futures for result in future.result()]
+
+
+def print_step_report(results: List[Dict[str, Any]], wall_seconds: float) -> None:
+    print("Step timings:")
+    width = max((len(r["pipeline"]) for r in results), default=0)
+    for r in results:
+        status = "ok" if not r["error"] else "FAILED"
+        print(f"  {r['pipeline']:<{width}}  {r['step']:<16} {r['seconds'] * 1000:8.1f} ms  {status}")
+    print(f"Apply wall time: {wall_seconds * 1000:.1f} ms")
+    for r in results:
+        if r["error"]:
+            print(f"[{r['pipeline']}] {r['step']} failed: {r['error']}", file=sys.stderr)
+
+
+def codex_prepare_home(home: pathlib.Path) -> None:
+    home.mkdir(parents=True, exist_ok=True)
+    cfg = home / "config.toml"
+    if not cfg.exists():
+        cfg.write_text("")
 
 
 def main() -> int:
@@ -199,6 +702,45 @@ def main() -> int:
     parser.add_argument("--agents", default="codex,claude,opencode", help="comma-separated subset")
     parser.add_argument("--codex-target", default="both", choices=["user", "eval", "both"], help="Codex config target")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--writer",
+        default=os.environ.get("STACK_APPLY_WRITER", "auto"),
+        choices=WRITER_MODES,
+        help="native: write config.toml/.claude.json in-process; cli: one agent CLI call per server; "
+        "auto: native with CLI fallback (env: STACK_APPLY_WRITER)",
+    )
+    snapshot_mode = parser.add_mutually_exclusive_group()
+    snapshot_mode.add_argument("--no-snapshot", action="store_true", help="skip the post-apply `mcp list` snapshot")
+    snapshot_mode.add_argument(
+        "--async-snapshot",
+        action="store_true",
+        help="take the post-apply `mcp list` snapshot in a background process",
+    )
+    parser.add_argument(
+        "--snapshot-timeout",
+        type=float,
+        default=float(os.environ.get("STACK_APPLY_SNAPSHOT_TIMEOUT_SEC", "30")),
+        help="per-command timeout for `mcp list` snapshots (env: STACK_APPLY_SNAPSHOT_TIMEOUT_SEC)",
+    )
+    parser.add_argument("--snapshot-only", metavar="STAMP", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the saved apply state and remove/re-add every managed server",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.environ.get("STACK_APPLY_JOBS", "4")),
+        help="max agent/home pipelines applied concurrently (env: STACK_APPLY_JOBS)",
+    )
+    parser.add_argument(
+        "--backup-keep",
+        type=int,
+        default=int(os.environ.get("STACK_APPLY_BACKUP_KEEP", "100")),
+        help="applies kept in backups/index.json; older backups are garbage-collected, 0 keeps all "
+        "(env: STACK_APPLY_BACKUP_KEEP)",
+    )
     args = parser.parse_args()
 
     manifest = load_manifest()
@@ -219,42 +761,132 @@ def main() -> int:
 
     profile_servers = profiles[args.profile]
 
+    codex_homes: List[pathlib.Path] = []
+    if args.codex_target in {"user", "both"}:
+        codex_homes.append(HOME / ".codex")
+    if args.codex_target in {"eval", "both"}:
+        codex_homes.append(HOME / ".codex-mcp-eval")
+
+    if args.snapshot_only:
+        print(log_snapshots(args.snapshot_only, codex_homes, args.snapshot_timeout))
+        return 0
+
     print(f"Applying profile: {args.profile}")
     print(f"Servers: {', '.join(profile_servers) if profile_servers else '(none)'}")
     print(f"Agents: {', '.join(selected)}")
     print(f"Stack root: {STACK_ROOT}")
 
-    stamp = now_stamp()
-    backup_dir = backup_files(stamp)
-    print(f"Backup: {backup_dir}")
+    # (pipeline name, state key, agent, config path)
+    targets: List[Tuple[str, str, str, pathlib.Path]] = []
+    if "codex" in selected:
+        targets += [(f"codex:{home.name}", f"codex:{home}", "codex", home / "config.toml") for home in codex_homes]
+    if "claude" in selected:
+        targets.append(("claude", f"claude:{CLAUDE_CONFIG}", "claude", CLAUDE_CONFIG))
+    if "opencode" in selected:
+        targets.append(("opencode", f"opencode:{OPENCODE_CONFIG}", "opencode", OPENCODE_CONFIG))
+
+    state = load_state()
+    plans: Dict[str, Dict[str, List[str]]] = {}
+    desired_by_agent: Dict[str, Dict[str, str]] = {}
+    state_dirty = False
+
+    def applied_record(agent: str, path: pathlib.Path) -> Dict[str, Any]:
+        return {"profile": args.profile, "servers": desired_by_agent[agent], "fingerprint": file_fingerprint(path)}
+
+    for name, key, agent, path in targets:
+        desired = {srv: entry_hash(agent_entry(agent, servers[srv])) for srv in profile_servers}
+        desired_by_agent[agent] = desired
+        plans[name] = plan_target(agent, path, state.get(key), desired, managed, args.force)
+        print(f"Plan {name}: {describe_plan(plans[name])}")
+        if not any(plans[name].values()) and state.get(key) != applied_record(agent, path):
+            # Already in the desired shape (e.g. edited by hand); remember it so the next run skips the read.
+            state[key] = applied_record(agent, path)
+            state_dirty = True
+
+    if not any(any(plan.values()) for plan in plans.values()):
+        if state_dirty and not args.dry_run:
+            save_state(state)
+        print("Already applied; nothing to do")
+        return 0
 
     if args.dry_run:
         return 0
 
-    codex_homes: List[pathlib.Path] = []
-    if args.codex_target in {"user", "both"}:
-        codex_homes.append(HOME / ".codex")
-    if args.codex_target in {"eval", "both"}:
-        codex_homes.append(HOME / ".codex-mcp-eval")
+    stamp = now_stamp()
+    backup_dir = backup_files(stamp, args.profile, args.backup_keep)
+    print(f"Backup: {backup_dir}")
 
-    if "codex" in selected:
-        for home in codex_homes:
-            home.mkdir(parents=True, exist_ok=True)
-            cfg = home / "config.toml"
-            if not cfg.exists():
-                cfg.write_text("")
-            codex_remove_managed(home, managed)
-            codex_add_profile(home, profile_servers, servers)
-            codex_set_timeouts(home, profile_servers, servers)
+    state_lock = threading.Lock()
 
-    if "claude" in selected:
-        claude_remove_managed(managed)
-        claude_add_profile(profile_servers, servers)
+    def record(key: str, agent: str, path: pathlib.Path) -> Callable[[], None]:
+        def _record() -> None:
+            with state_lock:
+                state[key] = applied_record(agent, path)
 
-    if "opencode" in selected:
-        opencode_apply(profile_servers, servers, managed)
+        return _record
 
-    log_snapshots(stamp, codex_homes)
+    pipelines: Dict[str, List[Step]] = {}
+    for name, key, agent, path in targets:
+        plan = plans[name]
+        if not any(plan.values()):
+            continue
+        changed = plan["add"] + plan["update"]
+        dropped = plan["remove"] + plan["update"]
+        # A target that fails mid-apply is diffed against the file itself next time.
+        state.pop(key, None)
+        if agent == "codex":
+            home = path.parent
+
+            def codex_cli(home: pathlib.Path = home, changed: List[str] = changed, dropped: List[str] = dropped) -> None:
+                codex_remove_managed(home, dropped)
+                codex_add_profile(home, changed, servers)
+                codex_set_timeouts(home, changed, servers)
+
+            steps: List[Step] = [
+                ("prepare", lambda home=home: codex_prepare_home(home)),
+                (
+                    "write_config",
+                    with_cli_fallback(
+                        args.writer,
+                        name,
+                        lambda home=home, changed=changed, dropped=dropped: codex_write_native(
+                            home, changed, servers, dropped
+                        ),
+                        codex_cli,
+                    ),
+                ),
+            ]
+        elif agent == "claude":
+
+            def claude_cli(changed: List[str] = changed, dropped: List[str] = dropped) -> None:
+                claude_remove_managed(dropped)
+                claude_add_profile(changed, servers)
+
+            steps = [
+                (
+                    "write_config",
+                    with_cli_fallback(
+                        args.writer,
+                        name,
+                        lambda changed=changed, dropped=dropped: claude_write_native(changed, servers, dropped),
+                        claude_cli,
+                    ),
+                ),
+            ]
+        else:
+            steps = [("apply", lambda changed=changed, dropped=dropped: opencode_apply(changed, servers, dropped))]
+        steps.append(("record_state", record(key, agent, path)))
+        pipelines[name] = steps
+
+    started = time.perf_counter()
+    results = run_pipelines(pipelines, args.jobs)
+    print_step_report(results, time.perf_counter() - started)
+    save_state(state)
+
+    take_snapshot(stamp, codex_homes, args)
+    if any(r["error"] for r in results):
+        print("Done with failures")
+        return 1
     print("Done")
     return 0
 
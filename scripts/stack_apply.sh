@@ -7,6 +7,8 @@ if [ "$#" -lt 1 ]; then
   cat <<'USAGE'
 Usage:
   stack_apply.sh <profile> [--agents codex,claude,opencode] [--codex-target user|eval|both]
+                 [--writer auto|native|cli] [--jobs N] [--force] [--dry-run] [--backup-keep N]
+                 [--no-snapshot | --async-snapshot] [--snapshot-timeout SEC]
 
 Examples:
   stack_apply.sh core
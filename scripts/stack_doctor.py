@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+"""
+Health and config checks for a stack profile (`stack_doctor.sh <profile>`).
+
+Every check runs concurrently on one asyncio loop: HTTP endpoints are probed
+over keep-alive connections shared per host:port, and the `docker compose
+config`, `bash -n` and `codex mcp list` subprocesses run in parallel. Results
+are still printed as PASS/WARN/FAIL lines in a fixed order, so the slowest
+check bounds the run instead of the sum of all of them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import pathlib
+import shutil
+import signal
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Tuple
+
+import stack_manifest
+
+HOME = pathlib.Path.home()
+SCRIPT_PATH = pathlib.Path(__file__).resolve()
+STACK_ROOT = SCRIPT_PATH.parent.parent
+INFRA_SCRIPT = STACK_ROOT / "scripts" / "stack_infra.sh"
+VERSIONS_SCRIPT = STACK_ROOT / "scripts" / "stack_versions.sh"
+MANIFEST_FILE = STACK_ROOT / "configs" / "mcp_stack_manifest.json"
+SECRETS_FILE = STACK_ROOT / ".secrets.env"
+INFRA_RUNTIME_ENV = STACK_ROOT / "tmp" / "ai-mcp-infra.env"
+ARCHON_RUNTIME_ENV = STACK_ROOT / "tmp" / "ai-mcp-archon.env"
+COMPOSE_FILE = STACK_ROOT / "infra" / "docker-compose.yml"
+VERSIONS_ENV = STACK_ROOT / "infra" / "versions.env"
+WRAPPERS = ("mcpx_qdrant_auto.sh", "mcpx_lsp_auto.sh", "mcpx_code_graph_auto.sh", "mcpx_neo4j_auto.sh")
+
+PROFILES = (
+    "core",
+    "core-code-graph",
+    "core-neo4j",
+    "surreal",
+    "archon",
+    "docs",
+    "full",
+    "full-code-graph",
+    "full-neo4j",
+    "full-graph",
+)
+FULL_PROFILES = ("full", "full-code-graph", "full-neo4j", "full-graph")
+# (profiles, [(name, url, accepted status codes)]), in report order.
+ENDPOINT_GROUPS: List[Tuple[Tuple[str, ...], List[Tuple[str, str, Tuple[int, ...]]]]] = [
+    (
+        PROFILES,
+        [
+            ("qdrant-api", "http://127.0.0.1:6333/healthz", (200,)),
+            ("qdrant-dashboard", "http://127.0.0.1:6333/dashboard/", (200,)),
+            ("chroma-api", "http://127.0.0.1:18000/api/v2/heartbeat", (200,)),
+            ("chroma-ui", "http://127.0.0.1:18110", (200,)),
+        ],
+    ),
+    (
+        ("core-neo4j", "full", "full-neo4j", "full-graph"),
+        [("neo4j-http", "http://127.0.0.1:17474", (200, 302))],
+    ),
+    (
+        ("surreal",) + FULL_PROFILES,
+        [
+            ("surreal-mcp", "http://127.0.0.1:18080/mcp", (401, 406, 429)),
+            ("surrealist-ui", "http://127.0.0.1:18082", (200,)),
+            ("surrealdb-rpc", "http://127.0.0.1:18083/rpc", (400, 401, 405)),
+        ],
+    ),
+    (
+        ("archon",) + FULL_PROFILES,
+        [
+            ("archon-api", "http://127.0.0.1:18081/health", (200,)),
+            ("archon-mcp-health", "http://127.0.0.1:18051/health", (200,)),
+            ("archon-ui", "http://127.0.0.1:13737", (200,)),
+        ],
+    ),
+]
+DOCS_PROFILES = ("docs",) + FULL_PROFILES
+# docs-mcp starts slowly after `infra:up`; keep probing it for a while.
+DOCS_TRIES = 8
+RETRY_DELAY = 2.0
+# Doctor profiles named after their infra; the manifest calls the matching agent profile differently.
+MANIFEST_PROFILES = {"surreal": "core-surreal", "archon": "core-archon"}
+MCP_PROTOCOL_VERSION = "2025-06-18"
+# Codex's default for servers without `startup_timeout_sec`.
+DEFAULT_STARTUP_TIMEOUT = 10.0
+# Probes keep waiting past `startup_timeout_sec` by this factor, so slow cold starts get a number.
+MCP_WAIT_FACTOR = 1.5
+# Served through mcp_stdio_line_bridge.py, which reads Content-Length framed client messages.
+FRAMED_STDIO_SERVERS = frozenset({"mcpx-code-graph"})
+MCP_READ_LIMIT = 16 * 1024 * 1024
+MCP_STOP_GRACE = 2.0
+
+Result = Tuple[str, str]
+
+
+@dataclass
+class Check:
+    name: str
+    kind: str
+    run: Callable[[], Awaitable[List[Result]]]
+    results: List[Result] = field(default_factory=list)
+    seconds: float = 0.0
+    metrics: dict = field(default_factory=dict)
+
+
+class HttpProber:
+    """Minimal async HTTP/1.1 client; idle keep-alive connections are shared per host:port."""
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self.idle: dict[tuple[str, int], list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def status(self, url: str) -> int:
+        """Status code of a GET, or 0 when the request fails or times out (curl's `000`)."""
+        try:
+            status, _, _ = await asyncio.wait_for(self.fetch("GET", url), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            return 0
+        return status
+
+    async def fetch(
+        self, method: str, url: str, body: bytes = b"", headers: dict[str, str] | None = None
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Status, lower-cased headers and body of one request; raises on transport errors."""
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.hostname or "127.0.0.1", parsed.port or 80)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+        head = f"{method} {path} HTTP/1.1\r\nHost: {key[0]}:{key[1]}\r\nUser-Agent: stack-doctor\r\n"
+        for name, value in {"Accept": "*/*", **(headers or {})}.items():
+            head += f"{name}: {value}\r\n"
+        if body or method != "GET":
+            head += f"Content-Length: {len(body)}\r\n"
+        request = head.encode("latin-1") + b"\r\n" + body
+
+        pooled = self.idle.get(key)
+        if pooled:
+            reader, writer = pooled.pop()
+            try:
+                return await self._exchange(key, request, reader, writer)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                pass  # the server dropped the idle connection; retry once on a fresh one
+        reader, writer = await asyncio.open_connection(*key)
+        return await self._exchange(key, request, reader, writer)
+
+    async def _exchange(
+        self, key: tuple[str, int], request: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> tuple[int, dict[str, str], bytes]:
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("connection closed")
+            parts = status_line.split(None, 2)
+            if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or not parts[1].isdigit():
+                raise ValueError(f"not an HTTP response: {status_line[:80]!r}")
+            status = int(parts[1])
+            headers: dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body, reusable = await self._read_body(reader, headers)
+        except BaseException:
+            writer.close()
+            raise
+        if reusable and headers.get("connection", "").lower() != "close":
+            self.idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+        return status, headers, body
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> tuple[bytes, bool]:
+        """Read the response body; the flag is False when the connection cannot be reused."""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunks.append((await reader.readexactly(size + 2))[:size])
+                if size == 0:
+                    return b"".join(chunks), True
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"])), True
+        return await reader.read(), False
+
+    async def close(self) -> None:
+        for pooled in self.idle.values():
+            for _, writer in pooled:
+                writer.close()
+        self.idle.clear()
+
+
+async def run_cmd(*cmd: str, env: dict[str, str] | None = None) -> tuple[int, str]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, env=env
+        )
+    except OSError:
+        return 127, ""
+    stdout, _ = await proc.communicate()
+    return proc.returncode, stdout.decode("utf-8", "replace")
+
+
+def read_env_var(key: str, path: pathlib.Path) -> str:
+    if not path.is_file():
+        return ""
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        name, sep, value = line.partition("=")
+        if sep and name == key:
+            return value
+    return ""
+
+
+def check_endpoint(prober: HttpProber, name: str, url: str, expected: Tuple[int, ...], tries: int = 1):
+    async def run() -> List[Result]:
+        code = 0
+        for attempt in range(1, tries + 1):
+            code = await prober.status(url)
+            if code in expected:
+                return [("PASS", f"endpoint {name} -> {code} ({url})")]
+            if attempt < tries:
+                await asyncio.sleep(RETRY_DELAY)
+        expected_csv = ",".join(str(e) for e in expected)
+        return [("FAIL", f"endpoint {name} unexpected status {code:03d} (expected: {expected_csv}, url: {url})")]
+
+    return run
+
+
+def check_command(cmd: str):
+    async def run() -> List[Result]:
+        if shutil.which(cmd):
+            return [("PASS", f"command available: {cmd}")]
+        return [("FAIL", f"missing command: {cmd}")]
+
+    return run
+
+
+def check_file(path: pathlib.Path):
+    async def run() -> List[Result]:
+        if path.is_file():
+            return [("PASS", f"file exists: {path}")]
+        return [("FAIL", f"missing file: {path}")]
+
+    return run
+
+
+def check_bash_syntax(path: pathlib.Path):
+    async def run() -> List[Result]:
+        code, _ = await run_cmd("bash", "-n", str(path))
+        if code == 0:
+            return [("PASS", f"bash syntax ok: {path}")]
+        return [("FAIL", f"bash syntax invalid: {path}")]
+
+    return run
+
+
+def perm_result(path: pathlib.Path) -> List[Result]:
+    if not path.is_file():
+        return []
+    perm = f"{path.stat().st_mode & 0o777:o}"
+    if perm == "600":
+        return [("PASS", f"permissions 600: {path}")]
+    return [("WARN", f"permissions are {perm} (expected 600): {path}")]
+
+
+def check_perm_600_or_warn(path: pathlib.Path):
+    async def run() -> List[Result]:
+        return perm_result(path)
+
+    return run
+
+
+def check_secrets():
+    async def run() -> List[Result]:
+        if SECRETS_FILE.is_file():
+            return [("PASS", f"secrets file exists: {SECRETS_FILE}")] + perm_result(SECRETS_FILE)
+        return [("WARN", f"secrets file not present: {SECRETS_FILE} (required for archon/docs profiles)")]
+
+    return run
+
+
+def check_compose(with_runtime_env: bool):
+    async def run() -> List[Result]:
+        cmd = ["docker", "compose", "--env-file", str(VERSIONS_ENV)]
+        if with_runtime_env:
+            if not INFRA_RUNTIME_ENV.is_file():
+                return []
+            cmd += ["--env-file", str(INFRA_RUNTIME_ENV)]
+        code, _ = await run_cmd(*cmd, "-f", str(COMPOSE_FILE), "config")
+        if with_runtime_env:
+            if code == 0:
+                return [("PASS", "docker compose config resolves with versions.env + runtime env")]
+            return [("FAIL", "docker compose config failed with runtime env")]
+        if code == 0:
+            return [("PASS", "docker compose config resolves with versions.env")]
+        return [("FAIL", "docker compose config failed")]
+
+    return run
+
+
+def check_codex_profile_servers(profile: str):
+    async def run() -> List[Result]:
+        if not shutil.which("codex"):
+            return [("WARN", "codex not found; skipping managed MCP registration check")]
+        if not MANIFEST_FILE.is_file():
+            return [("WARN", "manifest missing; skipping managed MCP registration check")]
+        required = profile_servers(profile)
+        if not required:
+            return [("PASS", f"profile {profile} has no managed MCP servers")]
+
+        env = dict(os.environ, CODEX_HOME=str(HOME / ".codex-mcp-eval"))
+        _, list_out = await run_cmd("codex", "mcp", "list", env=env)
+        if not list_out.strip():
+            return [("WARN", "could not read codex eval mcp list")]
+        present = {line.split()[0] for line in list_out.splitlines()[1:] if line.split()}
+        return [
+            ("PASS", f"codex eval MCP present: {name}")
+            if name in present
+            else ("WARN", f"codex eval MCP missing for profile {profile}: {name}")
+            for name in required
+        ]
+
+    return run
+
+
+def profile_servers(profile: str) -> List[str]:
+    manifest = stack_manifest.load_manifest(MANIFEST_FILE)
+    return manifest.get("profiles", {}).get(MANIFEST_PROFILES.get(profile, profile), [])
+
+
+class McpProbeError(RuntimeError):
+    """The server answered, but not with a usable MCP handshake."""
+
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def rpc_result(message: dict, method: str) -> dict:
+    """The `result` object of a response; any error or a malformed reply raises McpProbeError."""
+    if "error" in message:
+        error = message["error"]
+        if not isinstance(error, dict):
+            raise McpProbeError(f"{method} error: {error!r:.200}")
+        raise McpProbeError(f"{method} error {error.get('code')}: {error.get('message')}")
+    result = message.get("result")
+    if result is None:
+        return {}
+    if not isinstance(result, dict):
+        raise McpProbeError(f"{method} result is not an object: {result!r:.200}")
+    return result
+
+
+class StdioSession:
+    """JSON-RPC over a child's stdin/stdout, newline-delimited or Content-Length framed."""
+
+    def __init__(self, proc: asyncio.subprocess.Process, framed: bool) -> None:
+        self.proc = proc
+        self.framed = framed
+
+    async def send(self, message: dict) -> None:
+        data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        if self.framed:
+            self.proc.stdin.write(b"Content-Length: %d\r\n\r\n" % len(data) + data)
+        else:
+            self.proc.stdin.write(data + b"\n")
+        await self.proc.stdin.drain()
+
+    async def receive(self) -> dict:
+        stdout = self.proc.stdout
+        while True:
+            line = await stdout.readline()
+            if not line:
+                raise McpProbeError(f"server exited (code {await self.proc.wait()}) before replying")
+            if line[:15].lower() == b"content-length:":
+                length = int(line.split(b":", 1)[1])
+                while (await stdout.readline()).strip():
+                    pass
+                payload = await stdout.readexactly(length)
+            else:
+                payload = line.strip()
+                if not payload:
+                    continue
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                continue  # log noise on stdout
+            if isinstance(message, dict):
+                return message
+
+    async def call(self, request_id: int, method: str, params: dict) -> dict:
+        await self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        while True:
+            message = await self.receive()
+            if "method" not in message and message.get("id") == request_id:
+                return rpc_result(message, method)
+            if "method" in message and "id" in message:
+                # Server-to-client requests (roots, sampling): the probe supports none of them.
+                error = {"code": -32601, "message": "not supported by stack-doctor"}
+                await self.send({"jsonrpc": "2.0", "id": message["id"], "error": error})
+
+    async def notify(self, method: str) -> None:
+        await self.send({"jsonrpc": "2.0", "method": method})
+
+
+class HttpSession:
+    """Streamable HTTP MCP client: JSON or SSE responses, `Mcp-Session-Id` carried across requests."""
+
+    def __init__(self, prober: HttpProber, url: str) -> None:
+        self.prober = prober
+        self.url = url
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+
+    async def post(self, message: dict) -> tuple[int, dict[str, str], bytes]:
+        body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        status, headers, data = await self.prober.fetch("POST", self.url, body, self.headers)
+        if status in (401, 403):
+            raise PermissionError(f"HTTP {status}")
+        if status >= 400:
+            raise McpProbeError(f"{message.get('method')} returned HTTP {status}")
+        if "mcp-session-id" in headers:
+            self.headers["Mcp-Session-Id"] = headers["mcp-session-id"]
+        return status, headers, data
+
+    async def call(self, request_id: int, method: str, params: dict) -> dict:
+        _, headers, data = await self.post({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        if "text/event-stream" in headers.get("content-type", ""):
+            events = data.decode("utf-8", "replace").replace("\r\n", "\n").split("\n\n")
+            payloads = [
+                "\n".join(line[5:].lstrip() for line in event.split("\n") if line.startswith("data:"))
+                for event in events
+            ]
+        else:
+            payloads = [data.decode("utf-8", "replace")]
+        for payload in payloads:
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                continue
+            for item in message if isinstance(message, list) else [message]:
+                if isinstance(item, dict) and item.get("id") == request_id and "method" not in item:
+                    return rpc_result(item, method)
+        raise McpProbeError(f"no {method} response in HTTP reply")
+
+    async def notify(self, method: str) -> None:
+        await self.post({"jsonrpc": "2.0", "method": method})
+        self.headers["MCP-Protocol-Version"] = MCP_PROTOCOL_VERSION
+
+    async def close(self) -> None:
+        if "Mcp-Session-Id" in self.headers:
+            try:
+                await asyncio.wait_for(self.prober.fetch("DELETE", self.url, b"", self.headers), 2.0)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                pass
+
+
+async def mcp_handshake(session: StdioSession | HttpSession, metrics: dict, started: float) -> None:
+    params = {
+        "protocolVersion": MCP_PROTOCOL_VERSION,
+        "capabilities": {},
+        "clientInfo": {"name": "stack-doctor", "version": "1.0"},
+    }
+    init = await session.call(1, "initialize", params)
+    metrics["initialize_ms"] = elapsed_ms(started)
+    server = init.get("serverInfo") or {}
+    if not isinstance(server, dict):
+        raise McpProbeError(f"initialize serverInfo is not an object: {server!r:.200}")
+    metrics["server"] = f"{server.get('name', '?')} {server.get('version', '')}".strip()
+    await session.notify("notifications/initialized")
+    tools = await session.call(2, "tools/list", {})
+    metrics["tools_list_ms"] = elapsed_ms(started)
+    listed = tools.get("tools") or []
+    if not isinstance(listed, list):
+        raise McpProbeError(f"tools/list tools is not a list: {listed!r:.200}")
+    metrics["tools"] = len(listed)
+
+
+async def stop_process(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    # Wrappers exec uvx/go/node, which spawn their own children: signal the whole session.
+    for sig, grace in ((signal.SIGTERM, MCP_STOP_GRACE), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(proc.wait(), grace)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+async def probe_stdio(name: str, spec: dict, metrics: dict, stderr_tail: collections.deque) -> None:
+    started = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        spec["command"],
+        *spec.get("args", []),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, **spec.get("env", {})},
+        start_new_session=True,
+        limit=MCP_READ_LIMIT,
+    )
+    metrics["spawn_ms"] = elapsed_ms(started)
+
+    async def drain_stderr() -> None:
+        while line := await proc.stderr.readline():
+            if line.strip():
+                stderr_tail.append(line.decode("utf-8", "replace").strip())
+
+    stderr_task = asyncio.create_task(drain_stderr())
+    try:
+        await mcp_handshake(StdioSession(proc, name in FRAMED_STDIO_SERVERS), metrics, started)
+    finally:
+        await stop_process(proc)
+        stderr_task.cancel()
+
+
+def check_mcp_server(prober: HttpProber, name: str, spec: dict, metrics: dict):
+    async def run() -> List[Result]:
+        transport = spec.get("kind", "stdio")
+        timeout = float(spec.get("startup_timeout_sec") or DEFAULT_STARTUP_TIMEOUT)
+        metrics.update({"transport": transport, "startup_timeout_sec": timeout})
+        stderr_tail: collections.deque = collections.deque(maxlen=3)
+        started = time.perf_counter()
+        session = None
+        try:
+            if transport == "http":
+                session = HttpSession(prober, spec["url"])
+                await asyncio.wait_for(mcp_handshake(session, metrics, started), timeout * MCP_WAIT_FACTOR)
+            else:
+                await asyncio.wait_for(probe_stdio(name, spec, metrics, stderr_tail), timeout * MCP_WAIT_FACTOR)
+        except asyncio.TimeoutError:
+            reason = f"no tools/list reply within {timeout * MCP_WAIT_FACTOR:g}s (startup_timeout_sec {timeout:g})"
+            return [("FAIL", mcp_failure(name, reason, stderr_tail))]
+        except PermissionError as exc:
+            return [("WARN", f"mcp {name}: {exc} from {spec['url']}; server requires auth, handshake not checked")]
+        except (McpProbeError, OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            return [("FAIL", mcp_failure(name, str(exc) or type(exc).__name__, stderr_tail))]
+        finally:
+            if isinstance(session, HttpSession):
+                await session.close()
+
+        cold_start = metrics["tools_list_ms"] / 1000
+        timings = f"initialize {metrics['initialize_ms'] / 1000:.2f}s, tools/list {cold_start:.2f}s"
+        if "spawn_ms" in metrics:
+            timings += f", spawn {metrics['spawn_ms']:.0f}ms"
+        if cold_start > timeout:
+            return [("WARN", f"mcp {name}: cold start {cold_start:.1f}s exceeds startup_timeout_sec {timeout:g} ({timings})")]
+        return [("PASS", f"mcp {name}: {metrics['tools']} tools, {timings}")]
+
+    return run
+
+
+def mcp_failure(name: str, reason: str, stderr_tail: collections.deque) -> str:
+    message = f"mcp {name}: {reason}"
+    if stderr_tail:
+        message += f" (stderr: {stderr_tail[-1][:200]})"
+    return message
+
+
+def build_checks(profile: str, prober: HttpProber, mcp: bool) -> List[Check]:
+    checks = [Check(f"command:{cmd}", "command", check_command(cmd)) for cmd in ("docker", "python3", "curl", "bash")]
+    wrappers = [STACK_ROOT / "scripts" / name for name in WRAPPERS]
+    for path in [INFRA_SCRIPT, VERSIONS_SCRIPT, MANIFEST_FILE, COMPOSE_FILE, VERSIONS_ENV, *wrappers]:
+        checks.append(Check(f"file:{path.name}", "file", check_file(path)))
+    for path in [INFRA_SCRIPT, VERSIONS_SCRIPT, *wrappers]:
+        checks.append(Check(f"bash:{path.name}", "bash_syntax", check_bash_syntax(path)))
+    checks.append(Check("secrets", "file", check_secrets()))
+    for path in (INFRA_RUNTIME_ENV, ARCHON_RUNTIME_ENV):
+        checks.append(Check(f"perm:{path.name}", "permissions", check_perm_600_or_warn(path)))
+    checks.append(Check("compose:versions", "compose", check_compose(False)))
+    checks.append(Check("compose:runtime", "compose", check_compose(True)))
+    checks.append(Check("codex:profile", "codex", check_codex_profile_servers(profile)))
+
+    for profiles, endpoints in ENDPOINT_GROUPS:
+        if profile in profiles:
+            for name, url, expected in endpoints:
+                checks.append(Check(f"endpoint:{name}", "endpoint", check_endpoint(prober, name, url, expected)))
+    if profile in DOCS_PROFILES:
+        port = (
+            os.environ.get("DOCS_MCP_PUBLIC_PORT")
+            or read_env_var("DOCS_MCP_PUBLIC_PORT", INFRA_RUNTIME_ENV)
+            or "16280"
+        )
+        url = f"http://127.0.0.1:{port}"
+        checks.append(Check("endpoint:docs-mcp-ui", "endpoint", check_endpoint(prober, "docs-mcp-ui", url, (200,), DOCS_TRIES)))
+
+    if mcp and MANIFEST_FILE.is_file():
+        servers = stack_manifest.load_manifest(MANIFEST_FILE).get("servers", {})
+        for name in profile_servers(profile):
+            spec = servers.get(name, {}).get("codex")
+            if spec:
+                metrics: dict = {}
+                checks.append(Check(f"mcp:{name}", "mcp", check_mcp_server(prober, name, spec, metrics), metrics=metrics))
+    return checks
+
+
+async def timed(check: Check) -> Check:
+    started = time.perf_counter()
+    try:
+        check.results = await check.run()
+    except Exception as exc:
+        # A broken probe is one FAIL line; it must not abort the other checks and the summary.
+        check.results = [("FAIL", f"{check.name}: {type(exc).__name__}: {exc}")]
+    check.seconds = time.perf_counter() - started
+    return check
+
+
+async def run_checks(profile: str, timeout: float, quiet: bool, mcp: bool) -> tuple[List[Check], float]:
+    prober = HttpProber(timeout)
+    checks = build_checks(profile, prober, mcp)
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(timed(check)) for check in checks]
+    try:
+        # Print in declaration order as soon as each check (and every one before it) is done.
+        for task in tasks:
+            check = await task
+            if not quiet:
+                for status, message in check.results:
+                    print(f"{status}: {message}", flush=True)
+    finally:
+        await prober.close()
+    return checks, time.perf_counter() - started
+
+
+def json_report(profile: str, checks: List[Check], elapsed: float, counts: dict[str, int]) -> dict:
+    return {
+        "profile": profile,
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "duration_ms": round(elapsed * 1000, 1),
+        "summary": {status.lower(): count for status, count in counts.items()},
+        "checks": [
+            {
+                "name": check.name,
+                "kind": check.kind,
+                "duration_ms": round(check.seconds * 1000, 1),
+                "results": [{"status": status, "message": message} for status, message in check.results],
+                **({"metrics": check.metrics} if check.metrics else {}),
+            }
+            for check in checks
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run stack health/config checks for a profile")
+    parser.add_argument("profile", nargs="?", default="full", help=f"one of: {'|'.join(PROFILES)}")
+    parser.add_argument(
+        "--json",
+        metavar="PATH",
+        help="also write a JSON report with per-check timings (`-`: print it instead of the PASS/WARN/FAIL lines)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=float(os.environ.get("STACK_DOCTOR_TIMEOUT_SEC", "5")),
+        help="Per-request HTTP timeout in seconds (default: 5)",
+    )
+    parser.add_argument(
+        "--mcp",
+        action="store_true",
+        default=os.environ.get("STACK_DOCTOR_MCP") == "1",
+        help="Also launch every MCP server of the profile and time initialize -> tools/list",
+    )
+    args = parser.parse_args()
+
+    if args.profile not in PROFILES:
+        print(f"Invalid profile: {args.profile}", file=sys.stderr)
+        print(f"Use one of: {'|'.join(PROFILES)}", file=sys.stderr)
+        return 2
+
+    quiet = args.json == "-"
+    if not quiet:
+        print(f"== stack_doctor :: profile={args.profile} ==")
+    checks, elapsed = asyncio.run(run_checks(args.profile, args.timeout, quiet, args.mcp))
+    counts = {"PASS": 0, "WARN": 0, "FAIL": 0}
+    for check in checks:
+        for status, _ in check.results:
+            counts[status] += 1
+
+    if args.json:
+        report = json.dumps(json_report(args.profile, checks, elapsed, counts), indent=2) + "\n"
+        if quiet:
+            sys.stdout.write(report)
+        else:
+            pathlib.Path(args.json).write_text(report, encoding="utf-8")
+    if not quiet:
+        print()
+        print("== stack_doctor summary ==")
+        print(f"PASS={counts['PASS']} WARN={counts['WARN']} FAIL={counts['FAIL']}")
+        if args.json:
+            print(f"Report: {args.json} ({elapsed:.2f}s)")
+    return 1 if counts["FAIL"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
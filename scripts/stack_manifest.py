@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compiled loader for configs/mcp_stack_manifest.json.
+
+The manifest is parsed once, `${STACK_ROOT}`/`${HOME}` tokens are resolved,
+and the result is stored with `marshal` next to the manifest. Later loads reuse it while the manifest's mtime/size
+(and the STACK_ROOT/HOME it was resolved against) are unchanged.
+
+Shell usage:
+  stack_manifest.py profile <name>   # managed server names, one per line
+  stack_manifest.py profiles         # profile names, one per line
+  stack_manifest.py compile          # refresh the cache, print its path
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import marshal
+import os
+import pathlib
+import re
+import tempfile
+from typing import Any, Dict
+
+HOME = pathlib.Path.home()
+SCRIPT_PATH = pathlib.Path(__file__).resolve()
+STACK_ROOT = SCRIPT_PATH.parent.parent
+MANIFEST_PATH = STACK_ROOT / "configs" / "mcp_stack_manifest.json"
+CACHE_VERSION = 2
+TOKEN_RE = re.compile(r"\$\{(STACK_ROOT|HOME)\}")
+
+
+def cache_path_for(manifest_path: pathlib.Path) -> pathlib.Path:
+    return manifest_path.with_name(f".{manifest_path.stem}.cache")
+
+
+def resolve_tokens(value: Any, tokens: Dict[str, str] | None = None) -> Any:
+    tokens = tokens or {"STACK_ROOT": str(STACK_ROOT), "HOME": str(HOME)}
+    if isinstance(value, str):
+        return TOKEN_RE.sub(lambda m: tokens[m.group(1)], value) if "${" in value else value
+    if isinstance(value, list):
+        return [resolve_tokens(v, tokens) for v in value]
+    if isinstance(value, dict):
+        return {k: resolve_tokens(v, tokens) for k, v in value.items()}
+    return value
+
+
+def compile_manifest(raw: dict) -> Dict[str, Any]:
+    return {"manifest": resolve_tokens(raw)}
+
+
+def _cache_key(manifest_path: pathlib.Path) -> list:
+    st = manifest_path.stat()
+    return [CACHE_VERSION, st.st_mtime_ns, st.st_size, str(STACK_ROOT), str(HOME)]
+
+
+def load_compiled(manifest_path: pathlib.Path = MANIFEST_PATH) -> Dict[str, Any]:
+    """Compiled manifest (`manifest` with tokens resolved), from cache when fresh."""
+    key = _cache_key(manifest_path)
+    cache_path = cache_path_for(manifest_path)
+    try:
+        cached = marshal.loads(cache_path.read_bytes())
+        if isinstance(cached, dict) and cached.get("key") == key:
+            return cached["compiled"]
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+
+    compiled = compile_manifest(json.loads(manifest_path.read_text()))
+    try:
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(marshal.dumps({"key": key, "compiled": compiled}))
+        os.replace(tmp, cache_path)
+    except OSError:
+        # Read-only checkouts still work, just without the cache.
+        pass
+    return compiled
+
+
+def load_manifest(manifest_path: pathlib.Path = MANIFEST_PATH) -> dict:
+    return load_compiled(manifest_path)["manifest"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the compiled MCP stack manifest")
+    parser.add_argument("--manifest", default=str(MANIFEST_PATH), help="manifest path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    profile_cmd = sub.add_parser("profile", help="print the servers of a profile, one per line")
+    profile_cmd.add_argument("name")
+    sub.add_parser("profiles", help="print profile names, one per line")
+    sub.add_parser("compile", help="refresh the compiled cache and print its path")
+    args = parser.parse_args()
+
+    manifest_path = pathlib.Path(args.manifest)
+    compiled = load_compiled(manifest_path)
+    if args.command == "profile":
+        for name in compiled["manifest"].get("profiles", {}).get(args.name, []):
+            print(name)
+    elif args.command == "profiles":
+        for name in compiled["manifest"].get("profiles", {}):
+            print(name)
+    else:
+        print(cache_path_for(manifest_path))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
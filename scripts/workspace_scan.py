@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Bounded, pruned workspace scanning shared by repo_onboard.py and the mcpx wrappers.
+
+Walks use `os.scandir`, skip IGNORE_DIRS (dependency trees, virtualenvs,
+vector stores) and stop as soon as the question is answered. Marker lookups
+are cached on disk: a found marker stays valid while its file exists, a
+missing one while none of the scanned directories' mtimes changed.
+
+Shell usage (runs on every mcpx-lsp start, so it only imports os/marshal/sys/time):
+  workspace_scan.py markers <dir> [--kinds typescript,python] [--max-depth N] [--no-cache]
+      prints the kinds found, space-separated (empty line when none)
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+
+IGNORE_DIRS = frozenset(
+    {
+        ".git",
+        "node_modules",
+        ".venv",
+        "venv",
+        "dist",
+        "build",
+        "coverage",
+        ".pytest_cache",
+        ".mcp-uv-cache",
+        ".semantic-search",
+        ".sourcerer",
+        ".code-graph-rag",
+        "in-memoria-vectors.db",
+        "lancedb",
+        "logs_llm",
+    }
+)
+IGNORE_FILES = frozenset({".env", ".secrets.env", ".secrets.env.runtime", "debug.log"})
+# kind -> (marker files at the workspace root, source suffixes searched below it)
+MARKERS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "typescript": (("tsconfig.json", "package.json"), (".ts", ".tsx")),
+    "python": (("pyproject.toml", "requirements.txt", "setup.py"), (".py",)),
+}
+CACHE_VERSION = 1
+CACHE_MAX_ENTRIES = 256
+# Hits refresh an entry's LRU timestamp (and rewrite the cache) at most this often.
+CACHE_TOUCH_INTERVAL = 3600
+USAGE = "usage: workspace_scan.py markers <dir> [--kinds K1,K2] [--max-depth N] [--no-cache]"
+
+
+def stack_cache_dir() -> str:
+    """`${XDG_CACHE_HOME:-~/.cache}/mcp-stack`: where the stack's scripts keep caches, tools and logs."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mcp-stack")
+
+
+def default_cache_path() -> str:
+    return os.environ.get("MCP_SCAN_CACHE") or os.path.join(stack_cache_dir(), "workspace_markers.cache")
+
+
+def scan_top_level(root: str | os.PathLike, limit: int = 40) -> tuple[list[str], list[str]]:
+    """Sorted top-level directory and file names, minus ignored entries, each capped at `limit`."""
+    dirs: list[str] = []
+    files: list[str] = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name in IGNORE_DIRS:
+                continue
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.is_file():
+                if entry.name in IGNORE_FILES or entry.name.startswith("background-indexing-"):
+                    continue
+                files.append(entry.name)
+    dirs.sort()
+    files.sort()
+    return dirs[:limit], files[:limit]
+
+
+def iter_files(root: str | os.PathLike, suffixes: tuple[str, ...], max_depth: int | None = None) -> Iterator[str]:
+    """
+    Breadth-first walk yielding root-relative paths of files ending in `suffixes`.
+
+    Depth counts like `find -maxdepth`: files directly in `root` are depth 1.
+    Ignored directories and symlinked directories are not entered.
+    """
+    level = [(os.fspath(root), "")]
+    depth = 1
+    while level and (max_depth is None or depth <= max_depth):
+        below: list[tuple[str, str]] = []
+        for path, rel in level:
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name not in IGNORE_DIRS:
+                                below.append((entry.path, rel + name + "/"))
+                        elif name.endswith(suffixes):
+                            yield rel + name
+            except OSError:
+                continue
+        level = below
+        depth += 1
+
+
+def _scan_markers(root: str, kinds: tuple[str, ...], max_depth: int) -> tuple[dict[str, str | None], list[list]]:
+    found: dict[str, str | None] = {kind: None for kind in kinds}
+    for kind in kinds:
+        for name in MARKERS[kind][0]:
+            if os.path.isfile(os.path.join(root, name)):
+                found[kind] = name
+                break
+    visited: list[list] = []
+    pending = [kind for kind in kinds if found[kind] is None]
+    suffix_kind = {suffix: kind for kind in pending for suffix in MARKERS[kind][1]}
+    level = [(root, "")]
+    depth = 1
+    while level and depth <= max_depth and pending:
+        below: list[tuple[str, str]] = []
+        for path, rel in level:
+            try:
+                visited.append([rel, os.stat(path).st_mtime_ns])
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name not in IGNORE_DIRS and depth < max_depth:
+                                below.append((entry.path, rel + name + "/"))
+                            continue
+                        dot = name.rfind(".")
+                        kind = suffix_kind.get(name[dot:]) if dot > 0 else None
+                        if kind is not None and found[kind] is None:
+                            found[kind] = rel + name
+                            pending.remove(kind)
+                            if not pending:
+                                return found, visited
+            except OSError:
+                continue
+        level = below
+        depth += 1
+    return found, visited
+
+
+def _cache_valid(root: str, entry: dict) -> bool:
+    witnesses = entry["found"].values()
+    if any(witness is not None and not os.path.isfile(os.path.join(root, witness)) for witness in witnesses):
+        return False
+    if all(witness is not None for witness in witnesses):
+        return True
+    for rel, mtime in entry["visited"]:
+        try:
+            if os.stat(os.path.join(root, rel)).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _load_cache(path: str) -> dict:
+    try:
+        with open(path, "rb") as fh:
+            data = marshal.load(fh)
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def _save_cache(path: str, entries: dict) -> None:
+    if len(entries) > CACHE_MAX_ENTRIES:
+        entries = dict(sorted(entries.items(), key=lambda item: item[1]["used"])[-CACHE_MAX_ENTRIES:])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "wb") as fh:
+            marshal.dump({"version": CACHE_VERSION, "entries": entries}, fh)
+        os.replace(tmp, path)
+    except OSError:
+        # The cache is an optimisation; an unwritable cache dir only costs a rescan.
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def find_markers(
+    root: str | os.PathLike,
+    kinds: Iterable[str] = tuple(MARKERS),
+    max_depth: int = 3,
+    cache_path: str | None = None,
+) -> dict[str, bool]:
+    """
+    Which of `kinds` the workspace contains: a root marker file, or a source file
+    within `max_depth` levels. Stops scanning once every kind is found.
+    """
+    root = os.path.realpath(root)
+    kinds = tuple(kinds)
+    key = f"{root}\0{','.join(kinds)}\0{max_depth}"
+    entries = _load_cache(cache_path) if cache_path else {}
+    entry = entries.get(key)
+    now = time.time()
+    if entry is None or not _cache_valid(root, entry):
+        found, visited = _scan_markers(root, kinds, max_depth)
+        entry = {"found": found, "visited": visited, "used": now}
+    elif now - entry["used"] > CACHE_TOUCH_INTERVAL:
+        entry["used"] = now
+    else:
+        cache_path = None
+    if cache_path:
+        entries[key] = entry
+        _save_cache(cache_path, entries)
+    return {kind: witness is not None for kind, witness in entry["found"].items()}
+
+
+def main(argv: list[str]) -> int:
+    # Hand-rolled argv parsing: argparse (and the `re` it pulls in) would double this CLI's startup time.
+    if len(argv) < 2 or argv[0] != "markers":
+        print(USAGE, file=sys.stderr)
+        return 2
+    root = argv[1]
+    kinds = list(MARKERS)
+    max_depth = 3
+    cache_path: str | None = default_cache_path()
+    rest = argv[2:]
+    try:
+        while rest:
+            flag = rest.pop(0)
+            if flag == "--no-cache":
+                cache_path = None
+            elif flag == "--kinds":
+                kinds = [kind.strip() for kind in rest.pop(0).split(",") if kind.strip()]
+            elif flag == "--max-depth":
+                max_depth = int(rest.pop(0))
+            else:
+                raise ValueError(flag)
+    except (IndexError, ValueError):
+        print(USAGE, file=sys.stderr)
+        return 2
+    unknown = [kind for kind in kinds if kind not in MARKERS]
+    if unknown:
+        print(f"unknown kinds: {', '.join(unknown)} (known: {', '.join(MARKERS)})", file=sys.stderr)
+        return 2
+    if not os.path.isdir(root):
+        print(f"not a directory: {root}", file=sys.stderr)
+        return 2
+
+    found = find_markers(root, kinds, max_depth, cache_path)
+    print(" ".join(kind for kind, present in found.items() if present))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))